@@ -0,0 +1,80 @@
+"""
+Request body size limit middleware
+
+FastAPI parses (and spools) the whole multipart body before a route runs, so
+a route cannot reject an oversized upload before it has been received. This
+ASGI middleware answers 413 straight away when Content-Length is over the
+limit, and stops chunked bodies without a Content-Length at the chunk that
+crosses it.
+"""
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+
+class _BodyTooLarge(HTTPException):
+    """Raised from ``receive``; an HTTPException so body parsing re-raises it as a 413"""
+
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=f"Request body too large. Max size is {limit / (1024 * 1024):g}MB")
+
+
+class UploadSizeLimitMiddleware:
+    """Reject request bodies larger than the limit for their path with 413"""
+
+    def __init__(self, app, max_bytes: int, path_limits: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            app: ASGI application
+            max_bytes: Default body limit
+            path_limits: Path prefix -> limit, for routes that take larger bodies (bulk uploads)
+        """
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_limits = sorted((path_limits or {}).items(), key=lambda item: -len(item[0]))
+
+    def limit_for(self, path: str) -> int:
+        for prefix, limit in self.path_limits:
+            if path.startswith(prefix):
+                return limit
+        return self.max_bytes
+
+    def _too_large(self, limit: int) -> JSONResponse:
+        return JSONResponse(status_code=413, content={"detail": _BodyTooLarge(limit).detail})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limit_for(scope["path"])
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._too_large(limit)(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise _BodyTooLarge(limit)
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except _BodyTooLarge:
+            if not response_started:
+                await self._too_large(limit)(scope, receive, send)
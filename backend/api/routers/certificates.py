@@ -4,8 +4,9 @@ Certificate API Endpoints
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status, Query
 from fastapi.responses import JSONResponse
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
+import uuid
 import logging
 from bson import ObjectId
 
@@ -19,7 +20,10 @@ from database.models import (
 )
 from database.repositories.certificate_repository import certificate_repository
 from services.storage import storage_service
+from services.job_queue import get_job_queue, QueueFullError
+from services import certificate_pipeline  # noqa: F401 (registers the certificate pipeline)
 from utils.auth import get_current_user
+from utils.uploads import save_upload
 from utils.config import settings
 
 router = APIRouter(prefix="/api/certificates", tags=["certificates"])
@@ -28,6 +32,10 @@ logger = logging.getLogger(__name__)
 # File upload size limit (10MB)
 MAX_FILE_SIZE = settings.MAX_FILE_SIZE_MB * 1024 * 1024
 
+# Local copies of uploads waiting for OCR (shared storage when worker.py runs on other nodes)
+WORK_DIR = "../data/processing"
+job_queue = get_job_queue()
+
 @router.post("/upload", response_model=CertificateInDB, status_code=status.HTTP_201_CREATED)
 async def upload_certificate(
     file: UploadFile = File(...),
@@ -36,18 +44,8 @@ async def upload_certificate(
     """
     Upload and process a certificate file
     """
+    work_path = None
     try:
-        # Validate file size
-        file.file.seek(0, 2)
-        file_size = file.file.tell()
-        file.file.seek(0)
-        
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File too large. Max size is {settings.MAX_FILE_SIZE_MB}MB"
-            )
-        
         # Validate file type
         if file.content_type not in settings.ALLOWED_FILE_TYPES:
             raise HTTPException(
@@ -55,16 +53,24 @@ async def upload_certificate(
                 detail=f"Invalid file type. Allowed types: {', '.join(settings.ALLOWED_FILE_TYPES)}"
             )
         
-        # Save file to storage
-        upload_result = await storage_service.upload_file(
-            file_obj=file,
-            file_path=f"certificates/{current_user['id']}",
-            content_type=file.content_type,
-            metadata={
-                "uploaded_by": current_user['id'],
-                "original_filename": file.filename
-            }
-        )
+        # Stream to a local working copy for processing; aborts with 413 past MAX_FILE_SIZE
+        os.makedirs(WORK_DIR, exist_ok=True)
+        work_path = os.path.join(WORK_DIR, f"{uuid.uuid4()}_{os.path.basename(file.filename or 'upload')}")
+        digest = await save_upload(file, work_path, MAX_FILE_SIZE)
+        
+        # Save file to storage, streamed from the working copy
+        with open(work_path, "rb") as local_file:
+            upload_result = await storage_service.upload_file(
+                file_obj=local_file,
+                file_path=f"certificates/{current_user['id']}",
+                content_type=file.content_type,
+                metadata={
+                    "uploaded_by": current_user['id'],
+                    "original_filename": file.filename,
+                    "sha256": digest.sha256
+                },
+                max_bytes=MAX_FILE_SIZE
+            )
         
         # Create certificate in database (initially as pending)
         certificate_data = CertificateCreate(
@@ -94,7 +100,17 @@ async def upload_certificate(
         
         certificate = await certificate_repository.create(certificate_data)
         
-        # TODO: Start background task for AI processing
+        # Queue AI processing on the working copy (removed when the job finishes)
+        try:
+            job = await job_queue.submit(
+                'certificate',
+                {"file_path": work_path, "content_hash": digest.sha256, "certificate_id": str(certificate.id)},
+                owner=current_user['id']
+            )
+            work_path = None
+            logger.info(f"Queued processing job {job.id} for certificate {certificate.id}")
+        except QueueFullError as e:
+            logger.warning(f"Certificate {certificate.id} saved but not queued for processing: {e}")
         
         return certificate
         
@@ -106,6 +122,10 @@ async def upload_certificate(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to process certificate upload"
         )
+    finally:
+        # Not handed to a job: nothing else will remove it
+        if work_path is not None and os.path.exists(work_path):
+            os.remove(work_path)
 
 @router.get("", response_model=List[CertificateInDB])
 async def list_certificates(
@@ -11,6 +11,7 @@ import uuid
 from services.certificate_service import CertificateService
 from database.mongodb import get_database
 from api.middleware.auth import get_current_user
+from utils.uploads import max_upload_bytes, save_upload
 from utils.validators import validate_file_extension, sanitize_filename
 import logging
 
@@ -48,8 +49,7 @@ async def upload_certificate(
         safe_filename = sanitize_filename(file.filename)
         file_path = os.path.join(UPLOAD_DIR, f"{file_id}_{safe_filename}")
         
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
+        await save_upload(file, file_path, max_upload_bytes())
         
         # Process with certificate service
         certificate_service = CertificateService()
@@ -67,6 +67,8 @@ async def upload_certificate(
         
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing certificate: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing certificate: {str(e)}")
@@ -10,6 +10,9 @@ from bson import ObjectId
 
 from services.llm_service import llm_service
 from services.document_ai_service import document_ai_service
+from services.extraction_cache import extraction_cache
+from services.rule_extractor import fast_path_stats
+from services.registry import service_registry
 from database.mongodb import get_database
 from api.middleware.auth import get_current_user
 import logging
@@ -40,7 +43,7 @@ async def send_message(
         query = request.message
         if request.language != "en":
             logger.info(f"Translating from {request.language} to English")
-            query = document_ai_service.translate_text(query, "en")
+            query = await document_ai_service.translate_text(query, "en")
         
         # Convert chat history to dict format
         history = [{"role": msg.role, "content": msg.content} for msg in request.chat_history]
@@ -55,7 +58,7 @@ async def send_message(
         # Translate back if needed
         if request.language != "en":
             logger.info(f"Translating response to {request.language}")
-            response = document_ai_service.translate_text(response, request.language)
+            response = await document_ai_service.translate_text(response, request.language)
         
         # Store in chat history
         db = get_database()
@@ -97,6 +100,19 @@ async def send_message(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/llm/stats")
+async def get_llm_stats(current_user: dict = Depends(get_current_user)):
+    """LLM provider routing (circuit breaker state, latency and error rates per model), extraction cache, rule fast path and structuring batches"""
+    stats = {
+        **llm_service.get_stats(),
+        'extraction_cache': extraction_cache.get_stats(),
+        'rule_extractor': fast_path_stats.get_stats()
+    }
+    if service_registry.is_ready(['document_ai']):
+        stats.update(document_ai_service.get_stats())
+    return stats
+
+
 @router.get("/history/{supplier_id}")
 async def get_chat_history(
     supplier_id: str,
@@ -1,17 +1,27 @@
 """
 Document upload and OCR processing endpoints
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from datetime import datetime
 from bson import ObjectId
 import os
+import json
+import time
 import uuid
+from typing import List, Optional
 
 from services.ocr_service import ocr_service
-from services.document_ai_service import document_ai_service
+from services.ocr_engines import ENGINE_NAMES
+from services.ocr_profiles import PROFILES, OCRProfile, resolve_profile
+from services.job_queue import get_job_queue, QueueFullError
+from services.bulk_ingest import save_batch
+from services import certificate_pipeline  # noqa: F401 (registers the upload pipeline)
 from database.mongodb import get_database
 from database.chroma_db import chroma_client
 from api.middleware.auth import get_current_user
+from utils.config import settings
+from utils.uploads import max_upload_bytes, save_upload
 from utils.validators import validate_file_extension, sanitize_filename
 import logging
 
@@ -21,88 +31,265 @@ router = APIRouter()
 UPLOAD_DIR = "../data/uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# In-process or durable MongoDB queue (JOB_QUEUE_BACKEND)
+job_queue = get_job_queue()
 
-@router.post("/upload")
+
+def _ocr_profile(profile: Optional[str], current_user: dict, engine: Optional[str] = None) -> OCRProfile:
+    """Resolve the requested or tenant OCR profile and engine, rejecting unknown names"""
+    try:
+        return resolve_profile(profile, current_user.get("user_id"), engine)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/upload", status_code=202)
 async def upload_certificate(
     file: UploadFile = File(...),
+    profile: Optional[str] = None,
+    engine: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Upload certificate photo and extract data
-    
-    Process:
-    1. Save uploaded image
-    2. Extract text with EasyOCR
-    3. Structure data with Gemini
-    4. Store in MongoDB
-    5. Add to ChromaDB for RAG
+    Upload certificate photo and queue it for processing
+    
+    The file is saved and a job is returned immediately; poll
+    `GET /api/documents/jobs/{job_id}` for progress. Background stages:
+    1. Extract text with EasyOCR
+    2. Structure data with Gemini
+    3. Store in MongoDB
+    4. Add to ChromaDB for RAG
     """
     # Validate file type
     if not validate_file_extension(file.filename, ['.jpg', '.jpeg', '.png', '.heic']):
         raise HTTPException(status_code=400, detail="Invalid file type. Use JPG, PNG, or HEIC")
     
+    ocr_profile = _ocr_profile(profile, current_user, engine)
+    
     try:
         # Save file
         file_id = str(uuid.uuid4())
         safe_filename = sanitize_filename(file.filename)
         file_path = os.path.join(UPLOAD_DIR, f"{file_id}_{safe_filename}")
         
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        
-        logger.info(f"📁 Saved file: {file_path}")
+        # Streamed in chunks; the hash computed on the way lets OCR skip re-reading the file for its cache key
+        digest = await save_upload(file, file_path, max_upload_bytes())
         
-        # Step 1: OCR extraction
-        ocr_result = ocr_service.extract_text(file_path)
-        logger.info(f"📝 OCR extracted text ({ocr_result['confidence']:.2%} confidence)")
+        logger.info(f"📁 Saved file: {file_path} ({digest.size / 1024:.0f} KB)")
         
-        # Step 2: Structure with Gemini
-        structured_data = document_ai_service.structure_certificate_data(ocr_result['text'])
-        
-        # Step 3: Store in MongoDB
-        db = get_database()
-        certificate_doc = {
-            "supplier_id": current_user["user_id"],
-            "type": structured_data.get("certificate_type", "Other"),
-            "number": structured_data.get("certificate_number", ""),
-            "issued_by": structured_data.get("issued_by", ""),
-            "issued_to": structured_data.get("issued_to", ""),
-            "issued_date": structured_data.get("issued_date"),
-            "expiry_date": structured_data.get("expiry_date"),
-            "scope": structured_data.get("scope", ""),
-            "file_path": file_path,
-            "verification_status": "pending",
-            "ocr_confidence": ocr_result['confidence'],
-            "created_at": datetime.utcnow()
-        }
-        
-        result = await db.certificates.insert_one(certificate_doc)
-        cert_id = str(result.inserted_id)
-        
-        # Step 4: Add to ChromaDB for RAG
-        chroma_client.add_document(
-            doc_id=cert_id,
-            text=f"Certificate {structured_data.get('certificate_type')}: {ocr_result['text']}",
-            metadata={
-                "supplier_id": current_user["user_id"],
-                "cert_type": structured_data.get("certificate_type"),
-                "cert_number": structured_data.get("certificate_number")
-            }
+        job = await job_queue.submit(
+            'upload',
+            {
+                "file_path": file_path,
+                "content_hash": digest.sha256,
+                "profile": ocr_profile.name,
+                "engine": ocr_profile.engine
+            },
+            owner=current_user["user_id"]
         )
-        
-        logger.info(f"✅ Certificate processed: {cert_id}")
-        
-        return {
-            "certificate_id": cert_id,
-            "structured_data": structured_data,
-            "ocr_confidence": ocr_result['confidence'],
-            "message": "Certificate uploaded and processed successfully"
-        }
-        
+    except QueueFullError as e:
+        os.remove(file_path)
+        raise HTTPException(status_code=503, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Upload failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    logger.info(f"🧵 Queued upload job {job.id}")
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/documents/jobs/{job.id}",
+        "ocr_profile": ocr_profile.name,
+        "message": "Certificate uploaded and queued for processing"
+    }
+
+
+@router.post("/bulk", status_code=202)
+async def bulk_upload_certificates(
+    files: List[UploadFile] = File(...),
+    profile: Optional[str] = None,
+    engine: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Upload a batch of certificates (a ZIP archive and/or several files) for processing
+    
+    Files are streamed to disk and processed as one job with overlapping
+    OCR, structuring and batched database stages. Poll
+    `GET /api/documents/jobs/{job_id}`; the result holds a manifest with
+    one entry per file.
+    """
+    ocr_profile = _ocr_profile(profile, current_user, engine)
+    
+    saved, skipped = await save_batch(files, UPLOAD_DIR)
+    if not saved:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "No processable files in the batch", "files": skipped}
+        )
+    
+    try:
+        job = await job_queue.submit(
+            'bulk',
+            {
+                "files": saved,
+                "skipped": skipped,
+                "profile": ocr_profile.name,
+                "engine": ocr_profile.engine
+            },
+            owner=current_user["user_id"]
+        )
+    except QueueFullError as e:
+        for item in saved:
+            os.remove(item["file_path"])
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    logger.info(f"📦 Queued bulk job {job.id}: {len(saved)} files, {len(skipped)} skipped")
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/documents/jobs/{job.id}",
+        "accepted": [item["filename"] for item in saved],
+        "skipped": skipped,
+        "message": f"{len(saved)} certificates queued for processing"
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Status of a processing job: per-stage state and timings, and the result once done"""
+    job = await job_queue.find(job_id)
+    if job is None or job.owner != current_user["user_id"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.info()
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/ocr/stream")
+async def stream_ocr(
+    file: UploadFile = File(...),
+    language: str = "en",
+    max_pages: int = Query(50, ge=1, le=settings.PDF_STREAM_MAX_PAGES),
+    profile: Optional[str] = None,
+    engine: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream OCR progress for a certificate or audit report as server-sent events
+    
+    Events:
+    - start: page counts for the document
+    - page: text and confidence of each page as soon as it is processed
+    - done: combined text, overall confidence and processing time
+    - error: processing failed
+    """
+    if not validate_file_extension(file.filename, ['.pdf', '.jpg', '.jpeg', '.png']):
+        raise HTTPException(status_code=400, detail="Invalid file type. Use PDF, JPG, or PNG")
+    
+    ocr_profile = _ocr_profile(profile, current_user, engine)
+    
+    file_id = str(uuid.uuid4())
+    safe_filename = sanitize_filename(file.filename)
+    file_path = os.path.join(UPLOAD_DIR, f"{file_id}_{safe_filename}")
+    
+    digest = await save_upload(file, file_path, max_upload_bytes())
+    
+    async def event_stream():
+        start_time = time.time()
+        page_texts = []
+        total_confidence = 0.0
+        total_blocks = 0
+        
+        try:
+            if file_path.lower().endswith('.pdf'):
+                pages = ocr_service.iter_pdf_pages(file_path, language, max_pages, profile=ocr_profile)
+            else:
+                pages = _single_image_page(file_path, language, ocr_profile, digest.sha256)
+            
+            async for page in pages:
+                if page['page'] == 1:
+                    yield _sse_event("start", {
+                        "pages_to_process": page['pages_to_process'],
+                        "total_pages": page['total_pages'],
+                        "profile": ocr_profile.name,
+                        "engine": ocr_profile.engine
+                    })
+                
+                result = page['result']
+                blocks = len(result.get('text_blocks') or result.get('words') or [])
+                page_texts.append(result['text'])
+                total_confidence += result['confidence'] * blocks
+                total_blocks += blocks
+                
+                yield _sse_event("page", {
+                    "page": page['page'],
+                    "pages_to_process": page['pages_to_process'],
+                    "source": page['source'],
+                    "text": result['text'],
+                    "confidence": result['confidence']
+                })
+            
+            yield _sse_event("done", {
+                "text": '\n\n'.join(page_texts),
+                "confidence": total_confidence / total_blocks if total_blocks else 0,
+                "page_count": len(page_texts),
+                "processing_time": time.time() - start_time,
+                "profile": ocr_profile.name
+            })
+            
+        except Exception as e:
+            logger.error(f"❌ Streaming OCR failed: {e}")
+            yield _sse_event("error", {"detail": str(e)})
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _single_image_page(file_path: str, language: str, profile: OCRProfile, content_hash: Optional[str] = None):
+    """Wrap single-image OCR in the page shape yielded by `iter_pdf_pages`"""
+    result = await ocr_service.extract_text(
+        file_path, languages=[language], detail=1, profile=profile, content_hash=content_hash
+    )
+    if result.get('error'):
+        raise RuntimeError(result['error'])
+    
+    yield {
+        'page': 1,
+        'pages_to_process': 1,
+        'total_pages': 1,
+        'source': 'ocr',
+        'result': result
+    }
+
+
+@router.get("/ocr/profiles")
+async def list_ocr_profiles(current_user: dict = Depends(get_current_user)):
+    """Available OCR quality/speed profiles and engines, and this user's defaults"""
+    default = resolve_profile(tenant_id=current_user.get("user_id"))
+    return {
+        "default": default.name,
+        "default_engine": default.engine,
+        "engines": list(ENGINE_NAMES),
+        "profiles": {name: profile.cache_params() for name, profile in PROFILES.items()}
+    }
+
+
+@router.get("/ocr/stats")
+async def get_ocr_stats(current_user: dict = Depends(get_current_user)):
+    """OCR worker, reader memory, batching and cache statistics"""
+    return ocr_service.get_stats()
 
 
 @router.get("/{certificate_id}")
@@ -9,7 +9,9 @@ import os
 import logging
 
 from services.voice_service import voice_service
+from services.registry import service_registry
 from api.middleware.auth import get_current_user
+from utils.uploads import save_upload
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +41,9 @@ async def transcribe_audio(
     Returns:
         Transcription result with text and metadata
     """
+    # Load Whisper off the event loop if warm-up has not done it yet
+    await service_registry.aget('voice')
+    
     if not voice_service.model:
         raise HTTPException(
             status_code=503,
@@ -57,22 +62,14 @@ async def transcribe_audio(
             detail=f"Unsupported audio format. Supported: {', '.join(allowed_types)}"
         )
     
-    # Check file size (max 25MB)
+    # Stream to a temporary file (max 25MB), rejecting larger files as soon as the limit is crossed
     max_size = 25 * 1024 * 1024  # 25MB
-    audio_content = await audio.read()
-    
-    if len(audio_content) > max_size:
-        raise HTTPException(
-            status_code=400,
-            detail="Audio file too large. Maximum size: 25MB"
-        )
+    suffix = f".{audio.filename.split('.')[-1]}"
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        temp_path = temp_file.name
+    await save_upload(audio, temp_path, max_size)
     
     try:
-        # Save audio to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{audio.filename.split('.')[-1]}") as temp_file:
-            temp_file.write(audio_content)
-            temp_path = temp_file.name
-        
         try:
             # Transcribe audio
             result = voice_service.transcribe_audio(
@@ -4,25 +4,16 @@ ChromaDB for vector storage and RAG with Google embeddings
 import os
 import logging
 
-logger = logging.getLogger(__name__)
-
-try:
-    import chromadb
-    from chromadb.config import Settings as ChromaSettings
-    import google.generativeai as genai
-    CHROMADB_AVAILABLE = True
-    GOOGLE_AI_AVAILABLE = True
-except ImportError as e:
-    CHROMADB_AVAILABLE = False
-    GOOGLE_AI_AVAILABLE = False
-    logger.warning(f"⚠️ ChromaDB or Google AI not available: {e}")
-
 from utils.config import settings
+from services.registry import service_registry
+
+logger = logging.getLogger(__name__)
 
 
 class GoogleEmbeddingFunction:
     """Custom embedding function using Google's text-embedding-004"""
-    def __init__(self):
+    def __init__(self, genai):
+        self.genai = genai
         try:
             genai.configure(api_key=settings.GOOGLE_AI_API_KEY)
             self.available = True
@@ -40,7 +31,7 @@ class GoogleEmbeddingFunction:
         try:
             embeddings = []
             for text in input:
-                result = genai.embed_content(
+                result = self.genai.embed_content(
                     model="models/text-embedding-004",
                     content=text,
                     task_type="retrieval_document"
@@ -54,10 +45,16 @@ class GoogleEmbeddingFunction:
 
 class ChromaDBClient:
     def __init__(self):
-        self.available = CHROMADB_AVAILABLE
-        
-        if not CHROMADB_AVAILABLE:
+        # Imported here so that importing the API does not load chromadb/genai
+        try:
+            import chromadb
+            from chromadb.config import Settings as ChromaSettings
+            import google.generativeai as genai
+            self.available = True
+        except ImportError as e:
+            logger.warning(f"⚠️ ChromaDB or Google AI not available: {e}")
             logger.warning("⚠️ ChromaDB not installed - using fallback mode")
+            self.available = False
             self.client = None
             self.collection = None
             return
@@ -74,14 +71,13 @@ class ChromaDBClient:
             
             # Create embedding function
             embedding_function = None
-            if GOOGLE_AI_AVAILABLE:
-                try:
-                    embedding_function = GoogleEmbeddingFunction()
-                    if not embedding_function.available:
-                        embedding_function = None
-                except Exception as e:
-                    logger.warning(f"⚠️ Failed to create Google embedding function: {e}")
+            try:
+                embedding_function = GoogleEmbeddingFunction(genai)
+                if not embedding_function.available:
                     embedding_function = None
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to create Google embedding function: {e}")
+                embedding_function = None
             
             # Create or get collection for supplier documents
             self.collection = self.client.get_or_create_collection(
@@ -115,6 +111,23 @@ class ChromaDBClient:
         except Exception as e:
             logger.error(f"Failed to add document: {e}")
     
+    def add_documents(self, ids: list, texts: list, metadatas: list):
+        """Add several documents to the vector store in one call"""
+        if not ids:
+            return
+        if not self.available or not self.collection:
+            logger.warning(f"ChromaDB not available - {len(ids)} documents not added to vector store")
+            return
+            
+        try:
+            self.collection.add(
+                ids=ids,
+                documents=texts,
+                metadatas=metadatas
+            )
+        except Exception as e:
+            logger.error(f"Failed to add {len(ids)} documents: {e}")
+    
     def search(self, query: str, n_results: int = 5):
         """Search for similar documents"""
         if not self.available or not self.collection:
@@ -144,4 +157,4 @@ class ChromaDBClient:
 
 
 # Global instance
-chroma_client = ChromaDBClient()
+chroma_client = service_registry.register('chroma', ChromaDBClient)
@@ -4,14 +4,15 @@ MongoDB models using Pydantic for data validation
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field, validator
+from pydantic_core import core_schema
 from bson import ObjectId
 from enum import Enum
 
 # Custom ObjectId type for Pydantic
 class PyObjectId(ObjectId):
     @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
+    def __get_pydantic_core_schema__(cls, source_type, handler):
+        return core_schema.no_info_plain_validator_function(cls.validate)
 
     @classmethod
     def validate(cls, v):
@@ -20,8 +21,8 @@ class PyObjectId(ObjectId):
         return str(v)
 
     @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
+    def __get_pydantic_json_schema__(cls, schema, handler):
+        return {"type": "string"}
 
 
 # Enums
@@ -39,6 +40,8 @@ class CertificateType(str, Enum):
     ISO_45001 = "ISO 45001"
     GOTS = "GOTS"
     OCS = "OCS"
+    OEKO_TEX = "OEKO-TEX"
+    SA8000 = "SA8000"
     FAIR_TRADE = "Fair Trade"
     BSCI = "BSCI"
     SMETA = "SMETA"
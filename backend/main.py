@@ -1,15 +1,20 @@
 """
 SCAP Backend - FastAPI Application Entry Point
 """
+import asyncio
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 from api.routes import suppliers, documents, compliance, risk, chat, auth, notifications, brands, certificates
 from api.routes import settings as settings_routes
 from api.middleware.error_handler import add_error_handlers
+from api.middleware.upload_limit import UploadSizeLimitMiddleware
 from database.mongodb import connect_db, close_db
+from services.registry import READY, service_registry
+from services.job_queue import get_job_queue
 from utils.config import settings
 
 
@@ -22,9 +27,24 @@ async def lifespan(app: FastAPI):
     print(f"✅ SCAP Backend running on http://{settings.API_HOST}:{settings.API_PORT}")
     print(f"📚 API Documentation: http://localhost:{settings.API_PORT}/docs")
     
+    # Load models in the background; lightweight routes are served meanwhile
+    warmup_task = None
+    if settings.SERVICE_WARMUP:
+        warmup_task = asyncio.create_task(service_registry.warm_up())
+        print("🔄 Warming up services in the background (see /ready)")
+    
+    # Background workers for queued uploads (indexes only for the durable queue; see worker.py)
+    job_queue = get_job_queue()
+    job_queue.start()
+    
     yield
     
     # Shutdown
+    await job_queue.stop()
+    if service_registry.state('llm') == READY:
+        await service_registry.get('llm').aclose()
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
     await close_db()
     print("👋 Disconnected from MongoDB")
 
@@ -45,6 +65,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized uploads before they are spooled
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.MAX_REQUEST_SIZE_MB * 1024 * 1024,
+    path_limits={"/api/documents/bulk": settings.BULK_MAX_REQUEST_SIZE_MB * 1024 * 1024}
+)
+
 # Add error handlers
 add_error_handlers(app)
 
@@ -82,6 +109,21 @@ async def health_check():
     }
 
 
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check: 200 once every warmed-up service has loaded, 503 before"""
+    ready = service_registry.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "warming_up",
+            "services": service_registry.status(),
+            "memory": service_registry.memory_report()
+        }
+    )
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
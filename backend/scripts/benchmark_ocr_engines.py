@@ -0,0 +1,103 @@
+"""
+Throughput and confidence of each OCR engine on a sample set
+
+Runs every sample certificate through OCRService once per engine (result
+cache and cross-request batching disabled) and reports throughput, latency
+percentiles, mean confidence, extracted characters and how closely each
+engine's text agrees with the first engine's (engines score confidence
+differently, so agreement is the fairer quality comparison).
+
+Usage (from the backend directory):
+    python scripts/benchmark_ocr_engines.py path/to/samples [--engines easyocr,onnx,tesseract] [--profile balanced] [--repeat 3]
+"""
+import argparse
+import asyncio
+import difflib
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Measure OCR itself, not cache hits or batching windows
+os.environ['OCR_CACHE_ENABLED'] = 'false'
+os.environ['OCR_BATCH_WINDOW_MS'] = '0'
+
+from services.ocr_engines import ENGINE_NAMES  # noqa: E402
+from services.ocr_profiles import resolve_profile  # noqa: E402
+from services.ocr_service import OCRService  # noqa: E402
+
+SAMPLE_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png'}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(samples, engine_names, profile_name, language, repeat):
+    service = OCRService()
+    service.warm_up()
+
+    reference = {}
+    print(f"{'engine':<11}{'docs/s':>8}{'p50 s':>8}{'p95 s':>8}{'conf':>8}{'chars':>8}{'agree':>8}{'errors':>8}")
+    print("-" * 67)
+    try:
+        for name in engine_names:
+            profile = resolve_profile(profile_name, engine=name)
+            latencies, confidences, chars, agreement, errors = [], [], [], [], 0
+            started = time.perf_counter()
+            for sample in samples:
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    result = await service.extract_text(str(sample), languages=[language], detail=1, profile=profile)
+                    if result.get('error'):
+                        print(f"  {name} {sample.name}: {result['error']}")
+                        errors += 1
+                        continue
+                    latencies.append(time.perf_counter() - start)
+                    confidences.append(result['confidence'])
+                    chars.append(len(result['text']))
+
+                    # Text agreement with the first engine that read this sample
+                    baseline = reference.setdefault(sample, result['text'])
+                    agreement.append(difflib.SequenceMatcher(None, baseline, result['text']).ratio())
+            elapsed = time.perf_counter() - started
+
+            if not latencies:
+                print(f"{name:<11}{'-':>8}{'-':>8}{'-':>8}{'-':>8}{'-':>8}{'-':>8}{errors:>8}")
+                continue
+            print(
+                f"{name:<11}{len(latencies) / elapsed:>8.2f}{percentile(latencies, 50):>8.2f}"
+                f"{percentile(latencies, 95):>8.2f}{statistics.mean(confidences):>8.3f}"
+                f"{statistics.mean(chars):>8.0f}{statistics.mean(agreement):>8.3f}{errors:>8}"
+            )
+    finally:
+        service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('samples', help='Directory (or single file) of sample certificates')
+    parser.add_argument('--engines', default=','.join(ENGINE_NAMES), help='Comma-separated engine names')
+    parser.add_argument('--profile', default='balanced', help='OCR profile used for every engine')
+    parser.add_argument('--language', default='en', help='Reader language (skips script detection)')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per sample and engine')
+    args = parser.parse_args()
+
+    root = Path(args.samples)
+    samples = [root] if root.is_file() else sorted(
+        p for p in root.rglob('*') if p.suffix.lower() in SAMPLE_EXTENSIONS
+    )
+    if not samples:
+        parser.error(f"No sample certificates found in {root}")
+
+    print(f"📄 {len(samples)} samples x {args.repeat} runs, {args.profile} profile")
+    asyncio.run(run(samples, args.engines.split(','), args.profile, args.language, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Latency vs. recognition confidence for each OCR profile
+
+Runs every sample certificate through OCRService once per profile (result
+cache and cross-request batching disabled) and reports latency percentiles,
+mean recognition confidence and extracted characters per profile.
+
+Usage (from the backend directory):
+    python scripts/benchmark_ocr_profiles.py path/to/samples [--profiles fast,balanced,accurate] [--repeat 3]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Measure OCR itself, not cache hits or batching windows
+os.environ['OCR_CACHE_ENABLED'] = 'false'
+os.environ['OCR_BATCH_WINDOW_MS'] = '0'
+
+from services.ocr_profiles import PROFILES, get_profile  # noqa: E402
+from services.ocr_service import OCRService  # noqa: E402
+
+SAMPLE_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png'}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(samples, profile_names, repeat):
+    service = OCRService()
+    service.warm_up()
+
+    print(f"{'profile':<10}{'p50 s':>8}{'p95 s':>8}{'mean s':>8}{'conf':>8}{'chars':>8}{'errors':>8}")
+    print("-" * 58)
+    try:
+        for name in profile_names:
+            profile = get_profile(name)
+            latencies, confidences, chars, errors = [], [], [], 0
+            for sample in samples:
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    try:
+                        result = await service.extract_text(str(sample), profile=profile)
+                    except Exception as e:
+                        print(f"  {sample.name}: {e}")
+                        errors += 1
+                        continue
+                    latencies.append(time.perf_counter() - start)
+                    confidences.append(result['confidence'])
+                    chars.append(len(result['text']))
+
+            if not latencies:
+                print(f"{name:<10}{'-':>8}{'-':>8}{'-':>8}{'-':>8}{'-':>8}{errors:>8}")
+                continue
+            print(
+                f"{name:<10}{percentile(latencies, 50):>8.2f}{percentile(latencies, 95):>8.2f}"
+                f"{statistics.mean(latencies):>8.2f}{statistics.mean(confidences):>8.3f}"
+                f"{statistics.mean(chars):>8.0f}{errors:>8}"
+            )
+    finally:
+        service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('samples', help='Directory (or single file) of sample certificates')
+    parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma-separated profile names')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per sample and profile')
+    args = parser.parse_args()
+
+    root = Path(args.samples)
+    samples = [root] if root.is_file() else sorted(
+        p for p in root.rglob('*') if p.suffix.lower() in SAMPLE_EXTENSIONS
+    )
+    if not samples:
+        parser.error(f"No sample certificates found in {root}")
+
+    print(f"📄 {len(samples)} samples x {args.repeat} runs")
+    asyncio.run(run(samples, args.profiles.split(','), args.repeat))
+
+
+if __name__ == "__main__":
+    main()
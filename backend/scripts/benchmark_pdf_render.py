@@ -0,0 +1,125 @@
+"""
+Peak memory and per-page time of the PDF render -> preprocess handoff
+
+Compares the previous path (RGB pixmap -> PIL image -> grayscale -> resize ->
+NumPy) with the grayscale pixmap path that wraps the sample buffer with
+np.frombuffer and reuses the preprocessing output buffer across pages. Each
+mode runs in a fresh process so peak RSS is not shared between them.
+
+Usage (from the backend directory):
+    python scripts/benchmark_pdf_render.py [document.pdf] [--pages 20] [--dpi 200]
+"""
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def make_sample_pdf(path: Path, pages: int):
+    """Write a scanned-looking certificate PDF (one full-page image per page)"""
+    from io import BytesIO
+
+    import fitz
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    rng = np.random.default_rng(0)
+    doc = fitz.open()
+    for index in range(pages):
+        scan = Image.fromarray(rng.normal(215, 12, (2339, 1654)).clip(0, 255).astype('uint8'), 'L')
+        draw = ImageDraw.Draw(scan)
+        for row in range(120, 2200, 60):
+            draw.text((120, row), f"GOTS-23-ABC{index:05d}  Valid until 2026-01-14  Scope: spinning", fill=20)
+        buffer = BytesIO()
+        scan.save(buffer, format='PNG')
+        page = doc.new_page(width=595, height=842)  # A4 in points
+        page.insert_image(page.rect, stream=buffer.getvalue())
+    doc.save(str(path))
+    doc.close()
+
+
+def run_legacy(pdf_path: str, pages: int, dpi: int, max_dim: int):
+    """Previous path: RGB render, PIL copy, grayscale + resize in PIL, NumPy copy"""
+    import fitz
+    from PIL import Image
+    from services.ocr_preprocessing import preprocess_image
+
+    doc = fitz.open(pdf_path)
+    for page_num in range(min(pages, len(doc))):
+        page = doc.load_page(page_num)
+        pix = page.get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72), alpha=False)
+        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        preprocess_image(img, max_dim=max_dim)
+    doc.close()
+
+
+def run_zero_copy(pdf_path: str, pages: int, dpi: int, max_dim: int):
+    """Grayscale pixmap wrapped with np.frombuffer, output buffer reused"""
+    import fitz
+    import numpy as np
+    from services.ocr_service import OCRService
+    from services.ocr_preprocessing import preprocess_image
+
+    service = OCRService()
+    buffers = {}
+    doc = fitz.open(pdf_path)
+    try:
+        for page_num in range(min(pages, len(doc))):
+            page = doc.load_page(page_num)
+            pix, gray = service._render_pdf_page(page, dpi, max_dim)
+            out = buffers.get(gray.shape)
+            if out is None:
+                out = buffers[gray.shape] = np.empty(gray.shape, dtype=np.uint8)
+            preprocess_image(gray, max_dim=max_dim, out=out)
+            del pix, gray
+    finally:
+        doc.close()
+        service.shutdown()
+
+
+def measure(mode: str, pdf_path: str, pages: int, dpi: int, max_dim: int, results):
+    """Child process: time the run and record peak Python and process memory"""
+    fn = {'legacy': run_legacy, 'zero-copy': run_zero_copy}[mode]
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(pdf_path, pages, dpi, max_dim)
+    elapsed = time.perf_counter() - start
+    _, traced_peak = tracemalloc.get_traced_memory()
+    # ru_maxrss is in KiB on Linux
+    results[mode] = (elapsed, traced_peak, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pdf', nargs='?', help='PDF to render (a synthetic scanned PDF if omitted)')
+    parser.add_argument('--pages', type=int, default=20, help='Pages to render')
+    parser.add_argument('--dpi', type=int, default=200, help='Render resolution')
+    parser.add_argument('--max-dim', type=int, default=2000, help='Preprocessing resize cap')
+    args = parser.parse_args()
+
+    pdf_path = args.pdf
+    if pdf_path is None:
+        pdf_path = str(Path('benchmark_sample.pdf').resolve())
+        print(f"📄 Writing synthetic {args.pages}-page PDF to {pdf_path}")
+        make_sample_pdf(Path(pdf_path), args.pages)
+
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Manager().dict()
+    for mode in ('legacy', 'zero-copy'):
+        child = ctx.Process(target=measure, args=(mode, pdf_path, args.pages, args.dpi, args.max_dim, results))
+        child.start()
+        child.join()
+
+    print(f"{'mode':<12}{'ms/page':>10}{'traced peak MB':>16}{'peak RSS MB':>14}")
+    print("-" * 52)
+    for mode, (elapsed, traced_peak, rss_peak) in results.items():
+        print(f"{mode:<12}{elapsed * 1000 / args.pages:>10.1f}{traced_peak / 1e6:>16.1f}{rss_peak / 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Micro-benchmark for OCR image preprocessing
+
+Compares the original PIL pipeline with the vectorized NumPy pipeline and
+reports the cost per megapixel for each thresholding mode.
+
+Usage (from the backend directory):
+    python scripts/benchmark_preprocessing.py [--repeat 20] [image ...]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageOps
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.ocr_preprocessing import preprocess_image  # noqa: E402
+
+
+def legacy_preprocess(img: Image.Image) -> np.ndarray:
+    """The original PIL pipeline from OCRService._preprocess_image"""
+    img = img.convert('L')
+    max_dim = 2000
+    if max(img.size) > max_dim:
+        ratio = max_dim / max(img.size)
+        img = img.resize((int(img.size[0] * ratio), int(img.size[1] * ratio)), Image.LANCZOS)
+    img = ImageOps.equalize(img)
+    img = img.point(lambda p: p > 128 and 255)
+    img = img.filter(ImageFilter.SHARPEN)
+    img_array = np.array(img)
+    img_array = (img_array > 150) * 255
+    return img_array.astype(np.uint8)
+
+
+def synthetic_certificate(width: int, height: int) -> Image.Image:
+    """Create a certificate-like grayscale page with text and noise"""
+    rng = np.random.default_rng(0)
+    base = rng.normal(215, 12, (height, width)).clip(0, 255).astype(np.uint8)
+    img = Image.fromarray(base, 'L')
+    draw = ImageDraw.Draw(img)
+    for row in range(60, height - 60, 48):
+        draw.text((60, row), "GOTS-23-ABC12345  Valid until 2026-01-14  Scope: spinning, weaving", fill=20)
+    return img
+
+
+def time_per_megapixel(fn, img: Image.Image, repeat: int) -> float:
+    """Best-of-N runtime in milliseconds per input megapixel"""
+    fn(img)  # Warm-up
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(img)
+        best = min(best, time.perf_counter() - start)
+    megapixels = img.size[0] * img.size[1] / 1e6
+    return best * 1000 / megapixels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', nargs='*', help='Sample certificate images (synthetic pages if omitted)')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per case (best is reported)')
+    args = parser.parse_args()
+
+    if args.images:
+        samples = [(Path(p).name, Image.open(p).convert('L')) for p in args.images]
+    else:
+        samples = [
+            ('A4 @ 150 DPI', synthetic_certificate(1240, 1754)),
+            ('A4 @ 200 DPI', synthetic_certificate(1654, 2339)),
+            ('phone photo 12 MP', synthetic_certificate(4000, 3000)),
+        ]
+
+    pipelines = [
+        ('PIL (original)', legacy_preprocess),
+        ('NumPy legacy', lambda img: preprocess_image(img)),
+        ('NumPy otsu', lambda img: preprocess_image(img, threshold='otsu')),
+        ('NumPy adaptive', lambda img: preprocess_image(img, threshold='adaptive')),
+    ]
+
+    print(f"{'sample':<22}{'pipeline':<18}{'ms/MP':>10}")
+    print("-" * 50)
+    for name, img in samples:
+        identical = np.array_equal(legacy_preprocess(img), preprocess_image(img))
+        for label, fn in pipelines:
+            print(f"{name:<22}{label:<18}{time_per_megapixel(fn, img, args.repeat):>10.2f}")
+        print(f"{'':<22}{'output identical':<18}{'✅' if identical else '❌':>10}")
+
+
+if __name__ == "__main__":
+    main()
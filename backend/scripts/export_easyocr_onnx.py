@@ -0,0 +1,137 @@
+"""
+Export EasyOCR's detector and recognizers to ONNX for the ``onnx`` OCR engine
+
+Writes ``craft.onnx`` and one ``recognizer_<language>.onnx`` per language to
+the model directory (``OCR_ONNX_MODEL_DIR`` by default), checks each export
+against the PyTorch model, and with ``--quantize`` also writes int8
+dynamically-quantized ``*.int8.onnx`` copies (``OCR_ONNX_QUANTIZED=true``).
+
+Usage (from the backend directory):
+    python scripts/export_easyocr_onnx.py [--languages en,hi,ta] [--output ../data/ocr_onnx] [--quantize]
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.ocr_engines import onnx_model_path  # noqa: E402
+
+
+def unwrap(module):
+    """Strip DataParallel wrappers"""
+    return getattr(module, 'module', module)
+
+
+def patch_adaptive_pool(model):
+    """Swap the recognizer's AdaptiveAvgPool2d((None, 1)) for a mean over the last axis
+
+    Adaptive pooling with a free output dimension does not export with a
+    dynamic input width; averaging over the last axis is equivalent.
+    """
+    import torch
+
+    class MeanPool(torch.nn.Module):
+        def forward(self, x):
+            return x.mean(dim=3, keepdim=True)
+
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            if isinstance(child, torch.nn.AdaptiveAvgPool2d) and tuple(child.output_size) == (None, 1):
+                setattr(module, name, MeanPool())
+    return model
+
+
+def check(path: str, model, *inputs, atol: float = 1e-3):
+    """Compare the ONNX export with the PyTorch model on the sample inputs"""
+    import numpy as np
+    import onnxruntime as ort
+    import torch
+
+    session = ort.InferenceSession(path, providers=['CPUExecutionProvider'])
+    feeds = {i.name: x.numpy() for i, x in zip(session.get_inputs(), inputs)}
+    onnx_out = session.run(None, feeds)[0]
+    with torch.no_grad():
+        torch_out = model(*inputs)
+    torch_out = (torch_out[0] if isinstance(torch_out, tuple) else torch_out).numpy()
+    diff = float(np.abs(onnx_out - torch_out).max())
+    status = '✅' if diff <= atol else '⚠️'
+    print(f"   {status} max abs diff vs PyTorch: {diff:.2e}")
+
+
+def quantize(path: str, quantized_path: str):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+    print(f"   int8: {quantized_path} ({os.path.getsize(quantized_path) / 1e6:.1f} MB)")
+
+
+def export_detector(reader, output: str, opset: int, quantized: bool):
+    import torch
+
+    path = onnx_model_path(output, 'craft')
+    model = unwrap(reader.detector).eval()
+    sample = torch.randn(1, 3, 640, 960)
+    torch.onnx.export(
+        model, (sample,), path,
+        input_names=['image'],
+        output_names=['score', 'feature'],
+        dynamic_axes={
+            'image': {0: 'batch', 2: 'height', 3: 'width'},
+            'score': {0: 'batch', 1: 'height', 2: 'width'},
+            'feature': {0: 'batch', 2: 'height', 3: 'width'}
+        },
+        opset_version=opset
+    )
+    print(f"📦 detector: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    check(path, model, sample)
+    if quantized:
+        quantize(path, onnx_model_path(output, 'craft', quantized=True))
+
+
+def export_recognizer(reader, language: str, output: str, opset: int, quantized: bool):
+    import torch
+
+    path = onnx_model_path(output, f'recognizer_{language}')
+    model = patch_adaptive_pool(unwrap(reader.recognizer)).eval()
+    image = torch.randn(4, 1, 64, 320)
+    text = torch.zeros(4, 1, dtype=torch.long)  # Unused by the CRNN; pruned from the graph
+    torch.onnx.export(
+        model, (image, text), path,
+        input_names=['image', 'text'],
+        output_names=['logits'],
+        dynamic_axes={'image': {0: 'batch', 3: 'width'}, 'logits': {0: 'batch', 1: 'steps'}},
+        opset_version=opset
+    )
+    print(f"📦 recognizer ({language}): {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    check(path, model, image, text)
+    if quantized:
+        quantize(path, onnx_model_path(output, f'recognizer_{language}', quantized=True))
+
+
+def main():
+    from utils.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--languages', default='en', help='Comma-separated reader languages')
+    parser.add_argument('--output', default=settings.OCR_ONNX_MODEL_DIR, help='Model directory')
+    parser.add_argument('--opset', type=int, default=17, help='ONNX opset version')
+    parser.add_argument('--quantize', action='store_true', help='Also write int8-quantized models')
+    args = parser.parse_args()
+
+    import easyocr
+
+    os.makedirs(args.output, exist_ok=True)
+    detector_done = False
+    for language in args.languages.split(','):
+        print(f"🔤 Loading EasyOCR reader for '{language}'")
+        reader = easyocr.Reader([language], gpu=False, verbose=False)
+        if not detector_done:
+            export_detector(reader, args.output, args.opset, args.quantize)
+            detector_done = True
+        export_recognizer(reader, language, args.output, args.opset, args.quantize)
+
+
+if __name__ == "__main__":
+    main()
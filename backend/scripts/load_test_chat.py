@@ -0,0 +1,85 @@
+"""
+Concurrent load test for the chat endpoint
+
+Fires chat requests at a running API with a fixed number in flight and
+reports throughput, latency percentiles and the overlap factor (sum of
+request latencies / wall time). When LLM calls block the event loop the
+requests serialize and the overlap stays near 1; with async clients it
+approaches the concurrency level.
+
+Usage (from the backend directory, API running):
+    python scripts/load_test_chat.py --token <JWT> [--url http://localhost:8000] [--concurrency 20] [--requests 100]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(url, token, message, concurrency, total, timeout):
+    latencies, errors = [], []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(client, i):
+        async with slots:
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/api/chat/message",
+                    json={"message": f"{message} (#{i})", "language": "en", "chat_history": []}
+                )
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                errors.append(str(e))
+                return
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=url,
+        headers={"Authorization": f"Bearer {token}"},
+        limits=limits,
+        timeout=timeout
+    ) as client:
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(total)))
+        wall = time.perf_counter() - wall_start
+
+    print(f"requests      {total} ({concurrency} concurrent)")
+    print(f"succeeded     {len(latencies)}")
+    print(f"errors        {len(errors)}")
+    if errors:
+        print(f"first error   {errors[0]}")
+    if not latencies:
+        return
+    print(f"wall time     {wall:.2f}s")
+    print(f"throughput    {len(latencies) / wall:.2f} req/s")
+    print(f"latency p50   {percentile(latencies, 50):.2f}s")
+    print(f"latency p95   {percentile(latencies, 95):.2f}s")
+    print(f"latency mean  {statistics.mean(latencies):.2f}s")
+    print(f"overlap       {sum(latencies) / wall:.1f}x (1.0 = fully serialized, {concurrency} = fully concurrent)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8000', help='API base URL')
+    parser.add_argument('--token', required=True, help='JWT access token of a test user')
+    parser.add_argument('--message', default='What does a GOTS certificate cover?', help='Chat message to send')
+    parser.add_argument('--concurrency', type=int, default=20, help='Requests in flight')
+    parser.add_argument('--requests', type=int, default=100, help='Total requests')
+    parser.add_argument('--timeout', type=float, default=120.0, help='Per-request timeout in seconds')
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.token, args.message, args.concurrency, args.requests, args.timeout))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+How often the rule-based extractor can replace the LLM
+
+Runs ``services.rule_extractor`` over OCR text and reports the fast-path rate
+(documents whose required fields were all filled confidently, so Gemini is
+skipped), the hit rate per field and, where the certificate was already
+structured by the LLM, how often the confident rule values agree with it.
+
+Text comes from the ``ocr_text`` of certificates stored in MongoDB, or from
+a directory of .txt files (one OCR text per file; a sibling .json with the
+expected fields enables the agreement columns).
+
+Usage (from the backend directory):
+    python scripts/report_rule_extractor.py --mongo [--limit 1000]
+    python scripts/report_rule_extractor.py --dir path/to/ocr_texts
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.rule_extractor import FIELDS, extract_fields  # noqa: E402
+from utils.config import settings  # noqa: E402
+
+# Stored certificate keys for each field, by pipeline (``certificate_document``) and by legacy service
+STORED_KEYS = {
+    'certificate_type': ('type', 'certificate_type'),
+    'certificate_number': ('number', 'certificate_number'),
+    'issued_by': ('issued_by',),
+    'issued_to': ('issued_to',),
+    'issued_date': ('issued_date',),
+    'expiry_date': ('expiry_date',),
+    'scope': ('scope',),
+}
+
+
+def stored_value(doc, name):
+    for key in STORED_KEYS[name]:
+        if doc.get(key):
+            return str(doc[key])
+    return None
+
+
+def from_mongo(limit):
+    from pymongo import MongoClient
+    client = MongoClient(settings.MONGODB_URI)
+    cursor = client[settings.MONGODB_DB_NAME].certificates.find({'ocr_text': {'$nin': [None, '']}}).limit(limit)
+    for doc in cursor:
+        yield doc['ocr_text'], {name: stored_value(doc, name) for name in FIELDS}
+
+
+def from_dir(directory):
+    for path in sorted(Path(directory).glob('*.txt')):
+        expected_path = path.with_suffix('.json')
+        expected = json.loads(expected_path.read_text()) if expected_path.exists() else {}
+        yield path.read_text(encoding='utf-8', errors='replace'), expected
+
+
+def same(a, b):
+    return ' '.join(str(a).upper().split()) == ' '.join(str(b).upper().split())
+
+
+def report(samples, threshold, required):
+    documents = fast = 0
+    hits = {name: 0 for name in FIELDS}
+    compared = {name: 0 for name in FIELDS}
+    agreed = {name: 0 for name in FIELDS}
+
+    for text, expected in samples:
+        documents += 1
+        rules = extract_fields(text)
+        confident = rules.confident(threshold)
+        if not rules.missing(threshold, required):
+            fast += 1
+        for name, value in confident.items():
+            hits[name] += 1
+            if expected.get(name):
+                compared[name] += 1
+                agreed[name] += same(value, expected[name])
+
+    if not documents:
+        print("No OCR text found")
+        return
+
+    print(f"documents      {documents}")
+    print(f"fast path      {fast} ({fast / documents:.1%}) — Gemini skipped at confidence ≥ {threshold}")
+    print()
+    print(f"{'field':<20}{'filled':>9}{'agree':>9}{'compared':>10}")
+    print("-" * 48)
+    for name in FIELDS:
+        agree = f"{agreed[name] / compared[name]:.1%}" if compared[name] else '-'
+        print(f"{name:<20}{hits[name] / documents:>9.1%}{agree:>9}{compared[name]:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--mongo', action='store_true', help='Use ocr_text of stored certificates')
+    source.add_argument('--dir', help='Directory of OCR .txt files (optional .json expected fields)')
+    parser.add_argument('--limit', type=int, default=1000, help='Certificates read from MongoDB')
+    parser.add_argument('--threshold', type=float, default=settings.RULE_EXTRACTOR_MIN_CONFIDENCE)
+    args = parser.parse_args()
+
+    samples = from_mongo(args.limit) if args.mongo else from_dir(args.dir)
+    report(samples, args.threshold, settings.RULE_EXTRACTOR_REQUIRED_FIELDS)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,10 +3,12 @@ AI Service for certificate data extraction using Google's Gemini model
 """
 import os
 import json
+import asyncio
 import logging
 from typing import Dict, List, Optional, Any
 import google.generativeai as genai
-from ..utils.config import settings
+from utils.config import settings
+from services.extraction_cache import extraction_cache, prompt_version
 
 logger = logging.getLogger(__name__)
 
@@ -77,6 +79,11 @@ class AIService:
                 "additionalProperties": False
             }
             
+            # Changes whenever the prompt template, schema or model changes
+            self.prompt_version = prompt_version(
+                self._build_prompt('', ''), json.dumps(self.certificate_schema, sort_keys=True), 'gemini-pro'
+            )
+            
             logger.info("✅ AI Service initialized with Gemini model")
             
         except Exception as e:
@@ -98,14 +105,20 @@ class AIService:
             if not text.strip():
                 raise ValueError("No text provided for processing")
             
-            # Prepare the prompt
-            prompt = self._build_prompt(text, language)
-            
-            # Generate response from the model
-            response = await self._generate_ai_response(prompt)
+            async def extract() -> Dict[str, Any]:
+                # Prepare the prompt
+                prompt = self._build_prompt(text, language)
+                
+                # Generate response from the model
+                response = await self._generate_ai_response(prompt)
+                
+                # Parse and validate the response
+                return self._parse_ai_response(response.text)
             
-            # Parse and validate the response
-            result = self._parse_ai_response(response.text)
+            # Same text, language, prompt and schema: reuse the earlier extraction
+            result = await extraction_cache.get_or_extract(
+                'ai_service', self.prompt_version, text, extract, context=language
+            )
             
             return {
                 "success": True,
@@ -0,0 +1,335 @@
+"""
+Bulk certificate ingestion
+
+Brands onboarding a supplier network send hundreds of scans at once. The
+files of a ZIP or multipart batch are streamed to disk in chunks (never held
+in memory whole), then run through overlapping stages connected by small
+bounded queues:
+
+    files → OCR (N workers) → Gemini structuring (M workers) → batched writer
+
+While one file is being structured the next ones are already in OCR, and a
+full queue makes the stage before it wait (backpressure), so a slow Gemini
+cannot pile up OCR results in memory. The writer collects certificates into
+batches for a single ``insert_many`` and a single ChromaDB ``add``. Every
+file ends up in the manifest as processed, failed (with the stage and error)
+or skipped.
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+import zipfile
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from services.certificate_pipeline import certificate_document, index_entry, run_ocr, structure_text
+from utils.config import settings
+from utils.uploads import UPLOAD_CHUNK_SIZE, UploadDigest, UploadTooLargeError, max_upload_bytes, save_upload
+from utils.validators import sanitize_filename, validate_file_extension
+
+logger = logging.getLogger(__name__)
+
+BULK_EXTENSIONS = ['.pdf', '.jpg', '.jpeg', '.png']
+
+PROCESSED = 'processed'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+def copy_limited(src: BinaryIO, dst: BinaryIO, max_bytes: int) -> UploadDigest:
+    """Copy in chunks, stopping as soon as more than ``max_bytes`` were read"""
+    digest = UploadDigest(max_bytes)
+    for chunk in iter(lambda: src.read(UPLOAD_CHUNK_SIZE), b''):
+        digest.update(chunk)
+        dst.write(chunk)
+    return digest
+
+
+def saved_path(upload_dir: str, filename: str) -> str:
+    return os.path.join(upload_dir, f"{uuid.uuid4()}_{sanitize_filename(os.path.basename(filename))}")
+
+
+def skipped(filename: str, reason: str) -> Dict[str, Any]:
+    return {'filename': filename, 'status': SKIPPED, 'error': reason}
+
+
+def extract_zip(
+    fileobj: BinaryIO,
+    upload_dir: str,
+    max_files: int,
+    max_bytes: int
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Stream the supported entries of a ZIP archive to ``upload_dir``
+
+    Entry names are reduced to sanitized base names, so archive paths can
+    never escape the upload directory.
+
+    Returns:
+        (saved files as {'filename', 'file_path', 'sha256'}, skipped manifest entries)
+    """
+    saved, skips = [], []
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or os.path.basename(name).startswith(('.', '__MACOSX')) or '__MACOSX/' in name:
+                continue
+            if not validate_file_extension(name, BULK_EXTENSIONS):
+                skips.append(skipped(name, 'Unsupported file type'))
+                continue
+            if len(saved) >= max_files:
+                skips.append(skipped(name, f"Batch limit of {max_files} files reached"))
+                continue
+            if info.file_size > max_bytes:
+                skips.append(skipped(name, UploadTooLargeError(max_bytes).detail))
+                continue
+
+            path = saved_path(upload_dir, name)
+            try:
+                with archive.open(info) as src, open(path, 'wb') as dst:
+                    digest = copy_limited(src, dst, max_bytes)
+            except (UploadTooLargeError, zipfile.BadZipFile, OSError) as e:
+                if os.path.exists(path):
+                    os.remove(path)
+                skips.append(skipped(name, getattr(e, 'detail', None) or str(e)))
+                continue
+            saved.append({'filename': name, 'file_path': path, 'sha256': digest.sha256})
+    return saved, skips
+
+
+async def save_batch(uploads, upload_dir: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Save a multipart batch; ZIP archives among the files are expanded
+
+    Returns:
+        (saved files as {'filename', 'file_path', 'sha256'}, skipped manifest entries)
+    """
+    max_files = settings.BULK_MAX_FILES
+    max_bytes = max_upload_bytes()
+    saved, skips = [], []
+
+    for upload in uploads:
+        name = upload.filename or 'upload'
+        if name.lower().endswith('.zip'):
+            try:
+                # UploadFile spools large bodies to disk; read the archive from there
+                entries, entry_skips = await asyncio.to_thread(
+                    extract_zip, upload.file, upload_dir, max_files - len(saved), max_bytes
+                )
+            except zipfile.BadZipFile:
+                skips.append(skipped(name, 'Not a valid ZIP archive'))
+                continue
+            saved += entries
+            skips += entry_skips
+        elif not validate_file_extension(name, BULK_EXTENSIONS):
+            skips.append(skipped(name, 'Unsupported file type'))
+        elif len(saved) >= max_files:
+            skips.append(skipped(name, f"Batch limit of {max_files} files reached"))
+        else:
+            path = saved_path(upload_dir, name)
+            try:
+                digest = await save_upload(upload, path, max_bytes)
+            except UploadTooLargeError as e:
+                skips.append(skipped(name, e.detail))
+                continue
+            saved.append({'filename': name, 'file_path': path, 'sha256': digest.sha256})
+
+    return saved, skips
+
+
+class BulkIngestor:
+    """Runs a batch of saved files through pipelined OCR, structuring and batched writes"""
+
+    def __init__(
+        self,
+        owner: Optional[str],
+        job_id: str,
+        profile: Optional[str] = None,
+        engine: Optional[str] = None,
+        ocr_workers: Optional[int] = None,
+        structure_workers: Optional[int] = None,
+        write_batch: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        flush_interval: float = 0.5,
+        db=None,
+        chroma=None
+    ):
+        """Create the ingestor
+
+        Args:
+            owner: Supplier/user the certificates belong to
+            job_id: Batch job ID, stored on every certificate
+            profile: OCR profile name (default: the owner's)
+            engine: OCR engine name (default: the owner's)
+            ocr_workers: Files in OCR at once
+            structure_workers: Concurrent Gemini calls
+            write_batch: Certificates per insert_many / Chroma add
+            queue_size: Files buffered between stages
+            flush_interval: Longest a partial batch waits for more certificates
+            db: Motor database (default: the application's connection)
+            chroma: ChromaDB client (default: the shared one)
+        """
+        self.owner = owner
+        self.job_id = job_id
+        self.profile = profile
+        self.engine = engine
+        self.ocr_workers = ocr_workers or settings.BULK_OCR_CONCURRENCY
+        self.structure_workers = structure_workers or settings.BULK_STRUCTURE_CONCURRENCY
+        self.write_batch = write_batch or settings.BULK_WRITE_BATCH
+        self.queue_size = queue_size or settings.BULK_QUEUE_SIZE
+        self.flush_interval = flush_interval
+        self._db = db
+        self._chroma = chroma
+
+    @property
+    def db(self):
+        if self._db is not None:
+            return self._db
+        from database.mongodb import get_database
+        return get_database()
+
+    @property
+    def chroma(self):
+        if self._chroma is not None:
+            return self._chroma
+        from database.chroma_db import chroma_client
+        return chroma_client
+
+    async def run(self, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Process ``files`` ({'filename', 'file_path'}) and return one manifest entry per file"""
+        start = time.time()
+        manifest = [{'filename': f['filename'], 'status': None} for f in files]
+
+        # A retried job keeps the certificates its previous attempt already wrote
+        done = {}
+        async for cert in self.db.certificates.find({'job_id': self.job_id}, {'file_path': 1}):
+            done[cert['file_path']] = str(cert['_id'])
+
+        ocr_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        structure_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        write_queue: asyncio.Queue = asyncio.Queue(self.write_batch * 2)
+
+        async def feed():
+            for index, item in enumerate(files):
+                if item['file_path'] in done:
+                    manifest[index].update(status=PROCESSED, certificate_id=done[item['file_path']])
+                    continue
+                await ocr_queue.put((index, {'file_path': item['file_path'], 'content_hash': item.get('sha256')}))
+
+        async def ocr_worker():
+            while (work := await ocr_queue.get()) is not None:
+                index, ctx = work
+                try:
+                    ctx.update(await run_ocr(
+                        ctx['file_path'], self.owner, self.profile, self.engine, ctx['content_hash']
+                    ))
+                except Exception as e:
+                    self._fail(manifest[index], 'ocr', e)
+                    continue
+                await structure_queue.put(work)
+
+        async def structure_worker():
+            while (work := await structure_queue.get()) is not None:
+                index, ctx = work
+                try:
+                    ctx['structured_data'] = await structure_text(ctx['ocr_text'], ctx.get('ocr_fields'))
+                except Exception as e:
+                    self._fail(manifest[index], 'structure', e)
+                    continue
+                await write_queue.put(work)
+
+        writer = asyncio.create_task(self._writer(write_queue, manifest))
+        ocr_tasks = [asyncio.create_task(ocr_worker()) for _ in range(self.ocr_workers)]
+        structure_tasks = [asyncio.create_task(structure_worker()) for _ in range(self.structure_workers)]
+
+        try:
+            # Drain stage by stage: each stage's workers stop on one sentinel each
+            await feed()
+            for _ in ocr_tasks:
+                await ocr_queue.put(None)
+            await asyncio.gather(*ocr_tasks)
+            for _ in structure_tasks:
+                await structure_queue.put(None)
+            await asyncio.gather(*structure_tasks)
+            await write_queue.put(None)
+            await writer
+        except BaseException:
+            for task in [writer, *ocr_tasks, *structure_tasks]:
+                task.cancel()
+            raise
+
+        summary = self.summary(manifest)
+        logger.info(
+            f"📦 Bulk job {self.job_id}: {summary['processed']}/{len(files)} processed, "
+            f"{summary['failed']} failed in {time.time() - start:.1f}s"
+        )
+        return manifest
+
+    async def _writer(self, queue: asyncio.Queue, manifest: List[Dict[str, Any]]):
+        """Collect structured certificates into batches and write each batch at once"""
+        batch = []
+        while True:
+            try:
+                if batch:
+                    work = await asyncio.wait_for(queue.get(), timeout=self.flush_interval)
+                else:
+                    work = await queue.get()
+            except asyncio.TimeoutError:
+                await self._flush(batch, manifest)
+                batch = []
+                continue
+
+            if work is None:
+                break
+            batch.append(work)
+            if len(batch) >= self.write_batch:
+                await self._flush(batch, manifest)
+                batch = []
+
+        if batch:
+            await self._flush(batch, manifest)
+
+    async def _flush(self, batch: List[Tuple[int, Dict[str, Any]]], manifest: List[Dict[str, Any]]):
+        """One insert_many for the batch, then one ChromaDB add for the certificates that were stored"""
+        from pymongo.errors import BulkWriteError
+
+        docs = [certificate_document(ctx, self.owner, self.job_id) for _, ctx in batch]
+        failed: Dict[int, str] = {}
+        try:
+            # insert_many assigns each document its _id before sending
+            await self.db.certificates.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            failed = {err['index']: err.get('errmsg', 'write failed') for err in e.details.get('writeErrors', [])}
+        except Exception as e:
+            failed = {i: str(e) for i in range(len(batch))}
+
+        entries = []
+        for i, ((index, ctx), doc) in enumerate(zip(batch, docs)):
+            if i in failed:
+                self._fail(manifest[index], 'store', failed[i])
+                continue
+            data = ctx['structured_data']
+            manifest[index].update(
+                status=PROCESSED,
+                certificate_id=str(doc['_id']),
+                certificate_type=data.get('certificate_type'),
+                certificate_number=data.get('certificate_number'),
+                ocr_confidence=ctx['ocr_confidence']
+            )
+            entries.append(index_entry(str(doc['_id']), ctx, self.owner))
+
+        if entries:
+            ids, texts, metadatas = (list(column) for column in zip(*entries))
+            await asyncio.to_thread(self.chroma.add_documents, ids, texts, metadatas)
+
+    @staticmethod
+    def _fail(entry: Dict[str, Any], stage: str, error):
+        entry.update(status=FAILED, stage=stage, error=str(error))
+        logger.warning(f"⚠️ Bulk file {entry['filename']} failed in {stage}: {error}")
+
+    @staticmethod
+    def summary(manifest: List[Dict[str, Any]]) -> Dict[str, int]:
+        counts = {PROCESSED: 0, FAILED: 0, SKIPPED: 0}
+        for entry in manifest:
+            if entry['status'] in counts:
+                counts[entry['status']] += 1
+        return {'files': len(manifest), **counts}
@@ -0,0 +1,270 @@
+"""
+Background pipelines for uploaded certificates
+
+Stages registered on the shared job queue:
+
+- ocr: text (and template fields) from the saved file
+- structure: certificate fields from the OCR text (rules first, Gemini for the rest)
+- store: insert the certificate into MongoDB
+- index: add the certificate text to ChromaDB for RAG
+- update: fill in a certificate record created at upload time
+- bulk: a whole batch of files through ``services.bulk_ingest``
+
+Pipelines:
+
+- ``upload`` (``POST /api/documents/upload``): ocr → structure → store → index
+- ``certificate`` (``POST /api/certificates/upload``): ocr → structure → update
+- ``bulk`` (``POST /api/documents/bulk``): bulk
+
+Job contexts hold only plain values (paths, names, IDs) so jobs can be
+stored in MongoDB by the durable queue and picked up by ``worker.py``.
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from services.job_queue import Job, get_job_queue
+from services.ocr_profiles import resolve_profile
+from services.rule_extractor import extract_fields, fast_path_stats
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def run_ocr(
+    file_path: str,
+    owner: Optional[str],
+    profile: Optional[str] = None,
+    engine: Optional[str] = None,
+    content_hash: Optional[str] = None
+) -> Dict[str, Any]:
+    """OCR one saved file; returns the ``ocr_*`` context fields
+
+    ``content_hash`` (computed while the upload was streamed) saves the OCR
+    cache from reading the file again to hash it.
+    """
+    from services.ocr_service import ocr_service
+
+    ocr_profile = resolve_profile(profile, owner, engine)
+    result = await ocr_service.extract_text(
+        file_path,
+        profile=ocr_profile,
+        templates=settings.OCR_TEMPLATES_ENABLED,
+        content_hash=content_hash
+    )
+    if result.get('error'):
+        raise RuntimeError(f"OCR failed: {result['error']}")
+
+    logger.info(
+        f"📝 OCR extracted text ({result['confidence']:.2%} confidence, "
+        f"{ocr_profile.name} profile, {ocr_profile.engine}) from {os.path.basename(file_path)}"
+    )
+    return {
+        'ocr_text': result['text'],
+        'ocr_confidence': result['confidence'],
+        'ocr_fields': result.get('fields') or {},
+        'ocr_profile': ocr_profile.name,
+        'ocr_engine': ocr_profile.engine
+    }
+
+
+async def structure_text(ocr_text: str, ocr_fields: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Certificate fields from OCR text
+
+    Validated template fields and confident rule-based fields come first;
+    Gemini is only asked for the required fields still missing, and not at
+    all when there are none. Gemini calls are batched with other jobs'
+    certificates (see services.structure_batching).
+    """
+    from services.document_ai_service import document_ai_service
+
+    # Fields read from a known layout's zones already passed pattern validation
+    known = dict(ocr_fields or {})
+    if not settings.RULE_EXTRACTOR_ENABLED:
+        structured_data = await document_ai_service.structure_certificate_data(ocr_text, batched=True)
+        structured_data.update(known)
+        return structured_data
+
+    rules = extract_fields(ocr_text)
+    known = {**rules.confident(settings.RULE_EXTRACTOR_MIN_CONFIDENCE), **known}
+    missing = [name for name in settings.RULE_EXTRACTOR_REQUIRED_FIELDS if known.get(name) is None]
+    fast_path_stats.record(list(known), missing)
+
+    if missing:
+        structured_data = await document_ai_service.structure_certificate_data(ocr_text, missing, batched=True)
+    else:
+        structured_data = {}
+        logger.info(f"⚡ Structured certificate without the LLM ({known.get('certificate_type')})")
+
+    structured_data.update(known)
+    return structured_data
+
+
+def certificate_document(ctx: Dict[str, Any], owner: Optional[str], job_id: str) -> Dict[str, Any]:
+    """MongoDB certificate document for a processed upload"""
+    data = ctx['structured_data']
+    return {
+        "supplier_id": owner,
+        "type": data.get("certificate_type", "Other"),
+        "number": data.get("certificate_number", ""),
+        "issued_by": data.get("issued_by", ""),
+        "issued_to": data.get("issued_to", ""),
+        "issued_date": data.get("issued_date"),
+        "expiry_date": data.get("expiry_date"),
+        "scope": data.get("scope", ""),
+        "file_path": ctx['file_path'],
+        "verification_status": "pending",
+        "ocr_confidence": ctx['ocr_confidence'],
+        "ocr_profile": ctx['ocr_profile'],
+        "ocr_engine": ctx['ocr_engine'],
+        "job_id": job_id,
+        "created_at": datetime.utcnow()
+    }
+
+
+def index_entry(certificate_id: str, ctx: Dict[str, Any], owner: Optional[str]) -> Tuple[str, str, Dict[str, Any]]:
+    """ChromaDB (id, text, metadata) for a stored certificate"""
+    data = ctx['structured_data']
+    return (
+        certificate_id,
+        f"Certificate {data.get('certificate_type')}: {ctx['ocr_text']}",
+        {
+            "supplier_id": owner,
+            "cert_type": data.get("certificate_type"),
+            "cert_number": data.get("certificate_number")
+        }
+    )
+
+
+async def ocr_stage(job: Job):
+    ctx = job.context
+    ctx.update(await run_ocr(
+        ctx['file_path'], job.owner, ctx.get('profile'), ctx.get('engine'), ctx.get('content_hash')
+    ))
+
+
+async def structure_stage(job: Job):
+    ctx = job.context
+    ctx['structured_data'] = await structure_text(ctx['ocr_text'], ctx.get('ocr_fields'))
+
+
+async def store_stage(job: Job):
+    from pymongo import ReturnDocument
+    from database.mongodb import get_database
+
+    ctx = job.context
+    # Keyed on the job so a retried stage does not insert a second copy
+    stored = await get_database().certificates.find_one_and_update(
+        {"job_id": job.id},
+        {"$setOnInsert": certificate_document(ctx, job.owner, job.id)},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    ctx['certificate_id'] = str(stored["_id"])
+
+    job.result = {
+        "certificate_id": ctx['certificate_id'],
+        "structured_data": ctx['structured_data'],
+        "ocr_confidence": ctx['ocr_confidence'],
+        "ocr_profile": ctx['ocr_profile']
+    }
+
+
+async def index_stage(job: Job):
+    from database.chroma_db import chroma_client
+
+    ctx = job.context
+    doc_id, text, metadata = index_entry(ctx['certificate_id'], ctx, job.owner)
+    await asyncio.to_thread(chroma_client.add_document, doc_id=doc_id, text=text, metadata=metadata)
+    logger.info(f"✅ Certificate processed: {ctx['certificate_id']} (job {job.id})")
+
+
+async def bulk_stage(job: Job):
+    """Run a whole batch of saved files through the pipelined bulk ingestor"""
+    from services.bulk_ingest import BulkIngestor
+
+    ctx = job.context
+    ingestor = BulkIngestor(job.owner, job.id, ctx.get('profile'), ctx.get('engine'))
+    manifest = await ingestor.run(ctx['files']) + ctx.get('skipped', [])
+    job.result = {"summary": ingestor.summary(manifest), "files": manifest}
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d') if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+async def update_stage(job: Job):
+    """Write the extracted fields onto the certificate record created at upload"""
+    from bson import ObjectId
+    from database.models import CertificateStatus, CertificateType
+    from database.repositories.certificate_repository import certificate_repository
+
+    ctx = job.context
+    data = ctx['structured_data']
+    types = {t.value for t in CertificateType}
+
+    update = {
+        "certificate_number": data.get("certificate_number") or "",
+        "certificate_type": data.get("certificate_type") if data.get("certificate_type") in types
+        else CertificateType.OTHER.value,
+        "issuer": data.get("issued_by") or "",
+        "scope": data.get("scope") or "",
+        "confidence": {"overall": ctx['ocr_confidence'], "fields": {}},
+        "ocr_data": {
+            "raw_text": ctx['ocr_text'],
+            "processed_text": ctx['ocr_text'],
+            "language": "en",
+            "confidence": ctx['ocr_confidence']
+        },
+        "updated_at": datetime.utcnow()
+    }
+    if data.get("issued_to"):
+        update["issued_to"] = data["issued_to"]
+    for field in ("issued_date", "expiry_date"):
+        parsed = _parse_date(data.get(field))
+        if parsed is not None:
+            update[field] = parsed
+
+    expiry = update.get("expiry_date")
+    if expiry is not None:
+        days_left = (expiry - datetime.utcnow()).days
+        update["status"] = (
+            CertificateStatus.EXPIRED if days_left < 0
+            else CertificateStatus.EXPIRING_SOON if days_left <= 30
+            else CertificateStatus.VALID
+        ).value
+
+    await certificate_repository.collection.update_one(
+        {"_id": ObjectId(ctx['certificate_id'])},
+        {"$set": update}
+    )
+    job.result = {"certificate_id": ctx['certificate_id'], "structured_data": data}
+
+
+async def remove_working_copy(job: Job):
+    """Delete the local copy OCR read from; the stored original is kept"""
+    path = job.context.get('file_path')
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def register(queue):
+    """Register the certificate stages and pipelines on a JobQueue or DurableQueue"""
+    queue.register_stage('ocr', ocr_stage)
+    queue.register_stage('structure', structure_stage)
+    queue.register_stage('store', store_stage)
+    queue.register_stage('index', index_stage)
+    queue.register_stage('update', update_stage)
+    queue.register_stage('bulk', bulk_stage)
+
+    queue.register_pipeline('upload', ['ocr', 'structure', 'store', 'index'])
+    queue.register_pipeline('certificate', ['ocr', 'structure', 'update'], on_finish=remove_working_copy)
+    queue.register_pipeline('bulk', ['bulk'])
+
+
+register(get_job_queue())
@@ -10,22 +10,58 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from bson import ObjectId
 
-from .ocr_service import OCRService
-from .llm_service import LLMService
+from . import ocr_service, llm_service  # noqa: F401 (register the shared 'ocr' and 'llm' services)
+from services.extraction_cache import extraction_cache, prompt_version
+from services.registry import service_registry
 from database.mongodb import get_database
 from utils.validators import validate_date_format
 
 logger = logging.getLogger(__name__)
 
+EXTRACTION_PROMPT = """
+        You are a compliance certificate data extractor. Given OCR text from a certificate,
+        extract the following fields in JSON format:
+        
+        {{
+          "certificate_type": "GOTS|ISO 9001|ISO 14001|OEKO-TEX|SA8000|BSCI|Fair Trade|Other",
+          "certificate_number": "string",
+          "issued_by": "organization name",
+          "issued_to": "company name",
+          "issued_date": "YYYY-MM-DD",
+          "expiry_date": "YYYY-MM-DD",
+          "scope": "description of certification scope",
+          "certificate_holder_address": "string (if available)"
+        }}
+        
+        Filename: {filename}
+        
+        OCR Text:
+        {text}
+        
+        Return only valid JSON. If a field cannot be determined, use null.
+        """
+
 class CertificateService:
     """Service for certificate processing and management"""
     
     def __init__(self):
-        self.ocr_service = OCRService()
-        self.llm_service = LLMService()
+        # Handles on the process-wide OCR and LLM instances, not private copies
+        self.ocr_service = service_registry.acquire('ocr')
+        self.llm_service = service_registry.acquire('llm')
         self.db = get_database()
         self.certificates_collection = self.db.certificates
     
+    def close(self):
+        """Release the shared OCR and LLM handles"""
+        self.ocr_service.release()
+        self.llm_service.release()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
     async def process_certificate(
         self,
         file_path: str,
@@ -90,31 +126,9 @@ class CertificateService:
     
     async def _extract_structured_data(self, text: str, filename: str) -> Dict[str, Any]:
         """Extract structured data from OCR text using LLM"""
-        prompt = f"""
-        You are a compliance certificate data extractor. Given OCR text from a certificate,
-        extract the following fields in JSON format:
-        
-        {{
-          "certificate_type": "GOTS|ISO 9001|ISO 14001|OEKO-TEX|SA8000|BSCI|Fair Trade|Other",
-          "certificate_number": "string",
-          "issued_by": "organization name",
-          "issued_to": "company name",
-          "issued_date": "YYYY-MM-DD",
-          "expiry_date": "YYYY-MM-DD",
-          "scope": "description of certification scope",
-          "certificate_holder_address": "string (if available)"
-        }}
-        
-        Filename: {filename}
-        
-        OCR Text:
-        {text}
-        
-        Return only valid JSON. If a field cannot be determined, use null.
-        """
-        
-        try:
-            response = await self.llm_service.generate(prompt)
+        async def extract() -> Dict[str, Any]:
+            prompt = EXTRACTION_PROMPT.format(filename=filename, text=text)
+            response = await self.llm_service.chat_completion(prompt, use_rag=False)
             # Clean response to extract JSON
             json_start = response.find('{')
             json_end = response.rfind('}') + 1
@@ -122,6 +136,13 @@ class CertificateService:
             
             import json
             return json.loads(json_str)
+        
+        try:
+            # The filename is part of the prompt, so it is part of the cache key too
+            version = prompt_version(EXTRACTION_PROMPT, str(self.llm_service.primary_model))
+            return await extraction_cache.get_or_extract(
+                'certificate_service', version, text, extract, context=filename
+            )
             
         except Exception as e:
             logger.error(f"Error extracting structured data: {str(e)}")
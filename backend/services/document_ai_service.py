@@ -1,71 +1,193 @@
 """
 Gemini 2.5 Flash for document understanding and structuring
+
+Calls use the SDK's async client, so structuring and translation never block
+the event loop. The client keeps one multiplexed keep-alive channel; a
+semaphore bounds how many calls are in flight (GEMINI_MAX_CONCURRENCY) and
+each call has a GEMINI_TIMEOUT deadline. Structuring results are cached on
+the normalized OCR text (see services.extraction_cache). Pipeline and bulk
+jobs can have several certificates structured in one request (see
+services.structure_batching).
 """
-import google.generativeai as genai
 from utils.config import settings
+from services.extraction_cache import extraction_cache, prompt_version
+from services.registry import service_registry
+from services.structure_batching import StructureBatcher
 import json
+import asyncio
 import logging
-from typing import Dict
+from typing import Dict, List, Optional, Sequence
 
 logger = logging.getLogger(__name__)
 
-# Configure Gemini
-genai.configure(api_key=settings.GOOGLE_AI_API_KEY)
+MODEL_NAME = 'gemini-2.0-flash-exp'
+
+# Field -> value description given to Gemini
+STRUCTURE_FIELDS = {
+    "certificate_type": '"GOTS" or "ISO14001" or "OEKO-TEX" or "SA8000" or "BSCI" or "Other"',
+    "certificate_number": '"string"',
+    "issued_by": '"string"',
+    "issued_to": '"string"',
+    "issued_date": '"YYYY-MM-DD"',
+    "expiry_date": '"YYYY-MM-DD"',
+    "scope": '"string"',
+}
+
+STRUCTURE_PROMPT = """Extract certificate details from this text and return ONLY valid JSON with these exact fields:
+{{
+{fields}
+}}
+
+Text: {ocr_text}
+
+Return ONLY the JSON object, no other text."""
+
+
+def structure_prompt(ocr_text: str, fields: Optional[Sequence[str]] = None) -> str:
+    """Structuring prompt asking for ``fields`` (default: all of STRUCTURE_FIELDS)"""
+    names = [name for name in STRUCTURE_FIELDS if fields is None or name in fields]
+    listing = ',\n'.join(f'    "{name}": {STRUCTURE_FIELDS[name]}' for name in names)
+    return STRUCTURE_PROMPT.format(fields=listing, ocr_text=ocr_text)
+
+
+BATCH_STRUCTURE_PROMPT = """Extract certificate details from each of the {count} certificate texts below.
+Return ONLY a valid JSON array with one object per certificate. Each object has an "index" field
+(the number in the certificate's "### Certificate" header) and these exact fields:
+{{
+    "index": 0,
+{fields}
+}}
+
+{documents}
+
+Return ONLY the JSON array, no other text."""
+
+
+def batch_structure_prompt(texts: Sequence[str], fields: Optional[Sequence[str]] = None) -> str:
+    """One prompt structuring several OCR texts, answered as an array keyed by ``index``"""
+    names = [name for name in STRUCTURE_FIELDS if fields is None or name in fields]
+    listing = ',\n'.join(f'    "{name}": {STRUCTURE_FIELDS[name]}' for name in names)
+    documents = '\n\n'.join(f"### Certificate {index}\n{text}" for index, text in enumerate(texts))
+    return BATCH_STRUCTURE_PROMPT.format(count=len(texts), fields=listing, documents=documents)
+
+
+def strip_code_fence(text: str) -> str:
+    """Remove a markdown code block around a JSON response"""
+    if text.startswith('```'):
+        text = text.split('```')[1]
+        if text.startswith('json'):
+            text = text[4:]
+    return text
+
+
+def parse_batch_response(response_text: str, count: int) -> List[Optional[Dict]]:
+    """Split a batch answer into one result per text (None where it is missing or malformed)"""
+    results: List[Optional[Dict]] = [None] * count
+    try:
+        items = json.loads(strip_code_fence(response_text))
+    except json.JSONDecodeError:
+        return results
+    if isinstance(items, dict):
+        items = items.get('results', items.get('certificates', []))
+    if not isinstance(items, list):
+        return results
+
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.pop('index'))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= index < count and results[index] is None:
+            results[index] = item
+    return results
 
 
 class DocumentAIService:
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        import google.generativeai as genai
+        
+        genai.configure(api_key=settings.GOOGLE_AI_API_KEY)
+        self.model = genai.GenerativeModel(MODEL_NAME)
+        # Cached structuring results are only reused for the same prompt and model
+        self.structure_version = prompt_version(
+            STRUCTURE_PROMPT, BATCH_STRUCTURE_PROMPT, json.dumps(STRUCTURE_FIELDS), MODEL_NAME
+        )
+        self._slots = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+        self.batcher = StructureBatcher(
+            self._structure_batch,
+            self._structure,
+            window_ms=settings.STRUCTURE_BATCH_WINDOW_MS,
+            max_items=settings.STRUCTURE_BATCH_MAX_ITEMS,
+            token_budget=settings.STRUCTURE_BATCH_TOKEN_BUDGET
+        )
         logger.info("✅ Gemini 2.5 Flash initialized")
     
-    def structure_certificate_data(self, ocr_text: str) -> Dict:
+    async def _generate(self, prompt: str) -> str:
+        """Run one prompt through Gemini and return the response text"""
+        async with self._slots:
+            response = await self.model.generate_content_async(
+                prompt,
+                request_options={"timeout": settings.GEMINI_TIMEOUT}
+            )
+        return response.text.strip()
+    
+    async def structure_certificate_data(
+        self,
+        ocr_text: str,
+        fields: Optional[Sequence[str]] = None,
+        batched: bool = False
+    ) -> Dict:
         """
         Convert OCR text to structured certificate JSON
         
         Args:
             ocr_text: Raw text extracted from certificate
+            fields: Only ask for these fields (default: all)
+            batched: May share a Gemini request with concurrent calls (background and bulk jobs;
+                adds up to STRUCTURE_BATCH_WINDOW_MS of latency)
             
         Returns:
             Structured certificate data
         """
-        prompt = f"""Extract certificate details from this text and return ONLY valid JSON with these exact fields:
-{{
-    "certificate_type": "GOTS" or "ISO14001" or "OEKO-TEX" or "SA8000" or "BSCI" or "Other",
-    "certificate_number": "string",
-    "issued_by": "string",
-    "issued_to": "string",
-    "issued_date": "YYYY-MM-DD",
-    "expiry_date": "YYYY-MM-DD",
-    "scope": "string"
-}}
-
-Text: {ocr_text}
-
-Return ONLY the JSON object, no other text."""
+        structure = self.batcher.structure if batched else self._structure
+        return await extraction_cache.get_or_extract(
+            'structure', self.structure_version, ocr_text,
+            lambda: structure(ocr_text, fields),
+            context=','.join(sorted(fields)) if fields is not None else ''
+        )
+    
+    async def _structure(self, ocr_text: str, fields: Optional[Sequence[str]] = None) -> Dict:
+        """Uncached Gemini structuring call"""
+        prompt = structure_prompt(ocr_text, fields)
 
         try:
-            response = self.model.generate_content(prompt)
-            result_text = response.text.strip()
-            
-            # Remove markdown code blocks if present
-            if result_text.startswith('```'):
-                result_text = result_text.split('```')[1]
-                if result_text.startswith('json'):
-                    result_text = result_text[4:]
-            
-            structured_data = json.loads(result_text)
+            response_text = await self._generate(prompt)
+            structured_data = json.loads(strip_code_fence(response_text))
             logger.info(f"✅ Structured certificate: {structured_data.get('certificate_type')}")
             return structured_data
             
         except json.JSONDecodeError as e:
             logger.error(f"❌ Failed to parse Gemini response as JSON: {e}")
-            logger.error(f"Response was: {response.text}")
+            logger.error(f"Response was: {response_text}")
             raise ValueError("Failed to structure certificate data")
         except Exception as e:
             logger.error(f"❌ Document AI failed: {e}")
             raise
     
-    def translate_text(self, text: str, target_language: str) -> str:
+    async def _structure_batch(self, texts: List[str], fields: Optional[Sequence[str]] = None) -> List[Optional[Dict]]:
+        """One Gemini call structuring several OCR texts; None for texts the answer left out"""
+        response_text = await self._generate(batch_structure_prompt(texts, fields))
+        results = parse_batch_response(response_text, len(texts))
+        logger.info(f"✅ Structured {sum(r is not None for r in results)}/{len(texts)} certificates in one request")
+        return results
+    
+    def get_stats(self) -> Dict:
+        """Structuring batch counters"""
+        return {'structure_batching': self.batcher.get_stats()}
+    
+    async def translate_text(self, text: str, target_language: str) -> str:
         """
         Translate text to target language
         
@@ -79,13 +201,12 @@ Return ONLY the JSON object, no other text."""
         prompt = f"Translate this text to {target}. Return ONLY the translation:\n\n{text}"
         
         try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            return await self._generate(prompt)
         except Exception as e:
             logger.error(f"❌ Translation failed: {e}")
             return text  # Return original if translation fails
     
-    def generate_compliance_response(self, query: str) -> str:
+    async def generate_compliance_response(self, query: str) -> str:
         """
         Generate compliance-related response using Gemini
         
@@ -104,8 +225,7 @@ Question: {query}
 Answer:"""
         
         try:
-            response = self.model.generate_content(prompt)
-            answer = response.text.strip()
+            answer = await self._generate(prompt)
             logger.info(f"✅ Generated compliance response ({len(answer)} chars)")
             return answer
         except Exception as e:
@@ -114,4 +234,4 @@ Answer:"""
 
 
 # Global instance
-document_ai_service = DocumentAIService()
+document_ai_service = service_registry.register('document_ai', DocumentAIService)
@@ -0,0 +1,539 @@
+"""
+Durable MongoDB-backed job queue
+
+The in-process ``JobQueue`` loses every job when a pod restarts mid-OCR and
+only uses the CPU of the node that took the upload. This queue keeps jobs in
+a MongoDB collection instead, one document per job, so any number of worker
+processes on any node (``python worker.py``) can share the work:
+
+- A worker claims a job for one stage with an atomic ``find_one_and_update``
+  that sets a lease (owner + expiry). While the stage runs the lease is
+  extended; if the worker dies the lease expires (visibility timeout) and
+  the next worker to claim counts it as a failed attempt: the job is
+  queued again with backoff, or dead-lettered once it has used up its
+  attempts, so a stage that kills its worker cannot crash workers forever.
+- Completing a stage only applies if the worker still holds the lease, then
+  advances the job to its next stage.
+- A failed stage is retried with exponential backoff; after
+  ``max_attempts`` the job is copied to the dead-letter collection and
+  marked failed.
+
+Stage handlers and pipelines are the same ones registered on the in-process
+queue (see ``services.certificate_pipeline``). Uploaded files must be on
+storage every worker node can read.
+"""
+import os
+import time
+import uuid
+import random
+import socket
+import asyncio
+import logging
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from services.job_queue import (
+    FAILED, QUEUED, RUNNING, SKIPPED, SUCCEEDED,
+    Handler, Job, QueueFullError, StageState
+)
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Job document status while a worker holds its lease
+LEASED = 'leased'
+
+
+def backoff_delay(attempt: int, base: float, cap: float, jitter: float = 0.1) -> float:
+    """Seconds to wait before retry number ``attempt`` (1-based): base * 2^(attempt-1), capped, with jitter"""
+    delay = min(cap, base * (2 ** max(0, attempt - 1)))
+    return delay * (1 + random.uniform(-jitter, jitter))
+
+
+def claim_filter(stages: Sequence[str], now: datetime) -> Dict[str, Any]:
+    """Jobs waiting in one of ``stages`` that are due"""
+    return {'stage': {'$in': list(stages)}, 'status': QUEUED, 'available_at': {'$lte': now}}
+
+
+def expired_filter(stages: Sequence[str], now: datetime) -> Dict[str, Any]:
+    """Jobs in one of ``stages`` whose worker stopped renewing its lease"""
+    return {'stage': {'$in': list(stages)}, 'status': LEASED, 'lease_expires_at': {'$lt': now}}
+
+
+def job_from_document(doc: Dict[str, Any]) -> Job:
+    """Rebuild a ``Job`` (as passed to stage handlers) from its document"""
+    status = doc['status']
+    if status == LEASED or (status == QUEUED and doc['stages'][0].get('started_at') is not None):
+        status = RUNNING
+    return Job(
+        id=doc['_id'],
+        pipeline=doc['pipeline'],
+        stages=[StageState(**state) for state in doc['stages']],
+        context=doc.get('context') or {},
+        owner=doc.get('owner'),
+        status=status,
+        result=doc.get('result') or {},
+        error=doc.get('error'),
+        created_at=doc['created_at'],
+        finished_at=doc.get('finished_at')
+    )
+
+
+class DurableQueue:
+    """Job queue stored in MongoDB, processed by lease-holding workers"""
+
+    def __init__(
+        self,
+        collection: str = 'jobs',
+        dead_letter_collection: str = 'jobs_dead',
+        concurrency: Optional[Dict[str, int]] = None,
+        default_concurrency: int = 2,
+        max_pending: int = 500,
+        retention_seconds: int = 3600,
+        visibility_timeout: float = 300,
+        max_attempts: int = 3,
+        backoff_base: float = 5,
+        backoff_max: float = 300,
+        poll_interval: float = 1.0,
+        db=None
+    ):
+        """Create the queue
+
+        Args:
+            collection: Job collection name
+            dead_letter_collection: Where jobs go after their last failed attempt
+            concurrency: Worker tasks per stage name in each worker process
+            default_concurrency: Workers for stages not listed in ``concurrency``
+            max_pending: Unfinished jobs accepted before ``submit`` refuses new ones
+            retention_seconds: How long finished jobs stay queryable (TTL index)
+            visibility_timeout: Lease length; an unextended lease makes the job claimable again
+            max_attempts: Attempts per stage before dead-lettering
+            backoff_base: Delay before the first retry, doubled per attempt
+            backoff_max: Longest retry delay
+            poll_interval: Idle wait between claim attempts
+            db: Motor database (default: the application's connection)
+        """
+        self.collection_name = collection
+        self.dead_letter_name = dead_letter_collection
+        self.concurrency = dict(concurrency or {})
+        self.default_concurrency = default_concurrency
+        self.max_pending = max_pending
+        self.retention = retention_seconds
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self._db = db
+
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._handlers: Dict[str, Handler] = {}
+        self._pipelines: Dict[str, List[str]] = {}
+        self._on_finish: Dict[str, Optional[Handler]] = {}
+        self._workers: List[asyncio.Task] = []
+        self._stopping: Optional[asyncio.Event] = None
+        self._stats = {
+            'claimed': 0, 'succeeded': 0, 'retried': 0, 'dead_lettered': 0, 'lost_leases': 0, 'expired_leases': 0
+        }
+
+    @property
+    def db(self):
+        if self._db is not None:
+            return self._db
+        from database.mongodb import get_database
+        return get_database()
+
+    @property
+    def jobs(self):
+        return self.db[self.collection_name]
+
+    @property
+    def dead_letter(self):
+        return self.db[self.dead_letter_name]
+
+    @property
+    def stages(self) -> List[str]:
+        """Registered stage names"""
+        return list(self._handlers)
+
+    # Registration (same interface as JobQueue)
+
+    def register_stage(self, name: str, handler: Handler, concurrency: Optional[int] = None):
+        """Register the async handler that runs stage ``name``"""
+        self._handlers[name] = handler
+        if concurrency is not None:
+            self.concurrency[name] = concurrency
+
+    def register_pipeline(self, name: str, stages: Sequence[str], on_finish: Optional[Handler] = None):
+        """Register a pipeline as an ordered list of stage names"""
+        missing = [stage for stage in stages if stage not in self._handlers]
+        if missing:
+            raise ValueError(f"Unknown stages for pipeline '{name}': {', '.join(missing)}")
+        self._pipelines[name] = list(stages)
+        self._on_finish[name] = on_finish
+
+    # API side
+
+    def start(self):
+        """Create the indexes in the background; stages run in ``worker.py`` processes"""
+        asyncio.get_running_loop().create_task(self.ensure_indexes())
+
+    async def stop(self):
+        await self.stop_workers()
+
+    async def ensure_indexes(self):
+        try:
+            await self.jobs.create_index([('stage', 1), ('status', 1), ('available_at', 1)])
+            await self.jobs.create_index([('status', 1), ('lease_expires_at', 1)])
+            await self.jobs.create_index('expires_at', expireAfterSeconds=0)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not create job queue indexes: {e}")
+
+    async def submit(
+        self,
+        pipeline: str,
+        context: Dict[str, Any],
+        owner: Optional[str] = None,
+        job_id: Optional[str] = None
+    ) -> Job:
+        """Store a job, due immediately for the pipeline's first stage
+
+        Raises:
+            ValueError: Unknown pipeline
+            QueueFullError: ``max_pending`` jobs are already unfinished
+        """
+        if pipeline not in self._pipelines:
+            raise ValueError(f"Unknown pipeline: {pipeline}")
+
+        pending = await self.jobs.count_documents({'status': {'$in': [QUEUED, LEASED]}})
+        if pending >= self.max_pending:
+            raise QueueFullError(f"{pending} jobs already in progress, try again later")
+
+        stages = self._pipelines[pipeline]
+        now = time.time()
+        job = Job(
+            id=job_id or uuid.uuid4().hex,
+            pipeline=pipeline,
+            stages=[StageState(name) for name in stages],
+            context=context,
+            owner=owner,
+            created_at=now
+        )
+        job.stages[0].status = QUEUED
+        job.stages[0].queued_at = now
+
+        await self.jobs.insert_one({
+            '_id': job.id,
+            'pipeline': pipeline,
+            'owner': owner,
+            'context': context,
+            'stages': [asdict(state) for state in job.stages],
+            'stage': stages[0],
+            'status': QUEUED,
+            'attempts': 0,
+            'available_at': datetime.utcnow(),
+            'lease_owner': None,
+            'lease_expires_at': None,
+            'result': {},
+            'error': None,
+            'created_at': now,
+            'finished_at': None
+        })
+        return job
+
+    async def find(self, job_id: str) -> Optional[Job]:
+        doc = await self.jobs.find_one({'_id': job_id})
+        return job_from_document(doc) if doc else None
+
+    # Worker side
+
+    async def claim(self, stages: Sequence[str]) -> Optional[Dict[str, Any]]:
+        """Atomically lease the oldest due job waiting in one of ``stages``
+
+        Expired leases are settled first (see :meth:`_recover_expired`).
+        """
+        from pymongo import ReturnDocument
+
+        await self._recover_expired(stages)
+        now = datetime.utcnow()
+        doc = await self.jobs.find_one_and_update(
+            claim_filter(stages, now),
+            {
+                '$set': {
+                    'status': LEASED,
+                    'lease_owner': self.worker_id,
+                    'lease_expires_at': now + timedelta(seconds=self.visibility_timeout)
+                },
+                '$inc': {'attempts': 1}
+            },
+            sort=[('available_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is not None:
+            self._stats['claimed'] += 1
+        return doc
+
+    async def _recover_expired(self, stages: Sequence[str]):
+        """Count each expired lease in ``stages`` as a failed attempt
+
+        The worker holding it died or hung mid-stage. Taking the lease over
+        atomically makes exactly one worker settle it: the job is queued again
+        after a backoff, or dead-lettered once it has used up its attempts.
+        """
+        from pymongo import ReturnDocument
+
+        while True:
+            now = datetime.utcnow()
+            doc = await self.jobs.find_one_and_update(
+                expired_filter(stages, now),
+                {'$set': {
+                    'lease_owner': self.worker_id,
+                    'lease_expires_at': now + timedelta(seconds=self.visibility_timeout)
+                }},
+                sort=[('lease_expires_at', 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if doc is None:
+                return
+
+            self._stats['expired_leases'] += 1
+            job = job_from_document(doc)
+            index = self._pipelines[job.pipeline].index(doc['stage'])
+            state = job.stages[index]
+            state.finished_at = time.time()
+            state.attempts = doc['attempts']
+            state.error = 'Worker lost its lease (crashed or timed out)'
+            await self._fail(doc, job, index, state.error)
+
+    def _lease_filter(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Match the job only while this worker still holds the lease on this stage"""
+        return {'_id': doc['_id'], 'stage': doc['stage'], 'status': LEASED, 'lease_owner': self.worker_id}
+
+    async def _extend_lease(self, doc: Dict[str, Any]):
+        """Keep the lease alive while the stage runs"""
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            result = await self.jobs.update_one(
+                self._lease_filter(doc),
+                {'$set': {'lease_expires_at': datetime.utcnow() + timedelta(seconds=self.visibility_timeout)}}
+            )
+            if result.matched_count == 0:
+                return
+
+    async def process(self, doc: Dict[str, Any]):
+        """Run the claimed stage and record the outcome"""
+        job = job_from_document(doc)
+        index = self._pipelines[job.pipeline].index(doc['stage'])
+        state = job.stages[index]
+        state.status = RUNNING
+        state.started_at = time.time()
+        state.attempts = doc['attempts']
+        await self.jobs.update_one(self._lease_filter(doc), {'$set': {f'stages.{index}': asdict(state)}})
+
+        heartbeat = asyncio.create_task(self._extend_lease(doc))
+        try:
+            await self._handlers[state.name](job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            state.finished_at = time.time()
+            state.error = str(e)
+            await self._fail(doc, job, index, str(e))
+            return
+        finally:
+            heartbeat.cancel()
+
+        state.finished_at = time.time()
+        state.status = SUCCEEDED
+        state.error = None
+        await self._advance(doc, job, index)
+
+    async def _advance(self, doc: Dict[str, Any], job: Job, index: int):
+        """Move the job to its next stage, or finish it"""
+        stages = self._pipelines[job.pipeline]
+        update = {
+            f'stages.{index}': asdict(job.stages[index]),
+            'context': job.context,
+            'result': job.result,
+            'attempts': 0,
+            'lease_owner': None,
+            'lease_expires_at': None
+        }
+        finished = index + 1 == len(stages)
+        if finished:
+            update.update(self._finished_fields(SUCCEEDED))
+        else:
+            following = job.stages[index + 1]
+            following.status = QUEUED
+            following.queued_at = time.time()
+            update.update({
+                f'stages.{index + 1}': asdict(following),
+                'stage': stages[index + 1],
+                'status': QUEUED,
+                'available_at': datetime.utcnow()
+            })
+
+        result = await self.jobs.update_one(self._lease_filter(doc), {'$set': update})
+        if result.matched_count == 0:
+            # Lease expired and another worker took over; its outcome wins
+            self._stats['lost_leases'] += 1
+            logger.warning(f"⚠️ Lost lease on job {job.id} during '{doc['stage']}'")
+            return
+
+        if finished:
+            self._stats['succeeded'] += 1
+            await self._run_on_finish(job)
+
+    async def _fail(self, doc: Dict[str, Any], job: Job, index: int, error: str):
+        """Schedule a retry with backoff, or dead-letter the job after its last attempt"""
+        state = job.stages[index]
+        attempts = doc['attempts']
+
+        if attempts < self.max_attempts:
+            delay = backoff_delay(attempts, self.backoff_base, self.backoff_max)
+            state.status = QUEUED
+            state.queued_at = time.time() + delay
+            result = await self.jobs.update_one(self._lease_filter(doc), {'$set': {
+                f'stages.{index}': asdict(state),
+                'status': QUEUED,
+                'available_at': datetime.utcnow() + timedelta(seconds=delay),
+                'lease_owner': None,
+                'lease_expires_at': None,
+                'error': error
+            }})
+            if result.matched_count:
+                self._stats['retried'] += 1
+                logger.warning(
+                    f"⚠️ Job {job.id} failed in '{state.name}' (attempt {attempts}/{self.max_attempts}), "
+                    f"retrying in {delay:.0f}s: {error}"
+                )
+            return
+
+        state.status = FAILED
+        for later in job.stages[index + 1:]:
+            later.status = SKIPPED
+        update = {
+            'stages': [asdict(s) for s in job.stages],
+            'context': job.context,
+            'lease_owner': None,
+            'lease_expires_at': None,
+            **self._finished_fields(FAILED, error)
+        }
+        result = await self.jobs.update_one(self._lease_filter(doc), {'$set': update})
+        if result.matched_count == 0:
+            self._stats['lost_leases'] += 1
+            return
+
+        await self.dead_letter.replace_one(
+            {'_id': doc['_id']},
+            {**doc, **update, 'dead_lettered_at': datetime.utcnow()},
+            upsert=True
+        )
+        self._stats['dead_lettered'] += 1
+        logger.error(f"❌ Job {job.id} dead-lettered after {attempts} attempts in '{state.name}': {error}")
+        await self._run_on_finish(job)
+
+    def _finished_fields(self, status: str, error: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            'status': status,
+            'error': error,
+            'finished_at': time.time(),
+            'expires_at': datetime.utcnow() + timedelta(seconds=self.retention)
+        }
+
+    async def _run_on_finish(self, job: Job):
+        on_finish = self._on_finish.get(job.pipeline)
+        if on_finish is None:
+            return
+        try:
+            await on_finish(job)
+        except Exception as e:
+            logger.warning(f"⚠️ Cleanup for job {job.id} failed: {e}")
+
+    async def _worker(self, stage: str):
+        """Claim and run jobs for one stage until stopped"""
+        while not self._stopping.is_set():
+            try:
+                doc = await self.claim([stage])
+            except Exception as e:
+                logger.error(f"❌ Claiming '{stage}' jobs failed: {e}")
+                doc = None
+
+            if doc is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self.process(doc)
+            except asyncio.CancelledError:
+                await self._release(doc)
+                raise
+            except Exception as e:  # Bookkeeping bug; never let it kill the worker
+                logger.error(f"❌ Job worker '{stage}' error on {doc['_id']}: {e}")
+
+    async def _release(self, doc: Dict[str, Any]):
+        """Hand an interrupted job straight back to the queue"""
+        try:
+            await self.jobs.update_one(self._lease_filter(doc), {'$set': {
+                'status': QUEUED,
+                'available_at': datetime.utcnow(),
+                'lease_owner': None,
+                'lease_expires_at': None
+            }, '$inc': {'attempts': -1}})
+        except Exception:
+            pass  # The lease expires on its own
+
+    def start_workers(self, stages: Optional[Sequence[str]] = None):
+        """Start worker tasks for ``stages`` (default: all) on the running loop"""
+        loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        for stage in stages or list(self._handlers):
+            count = max(1, self.concurrency.get(stage, self.default_concurrency))
+            self._workers += [
+                loop.create_task(self._worker(stage), name=f"durable-{stage}-{i}")
+                for i in range(count)
+            ]
+        logger.info(f"🧵 Durable queue worker {self.worker_id} started ({len(self._workers)} tasks)")
+
+    async def stop_workers(self, grace: float = 30):
+        """Stop claiming, give running stages ``grace`` seconds, then release their leases"""
+        if not self._workers:
+            return
+        self._stopping.set()
+        _, running = await asyncio.wait(self._workers, timeout=grace)
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Counters for this process and queue depth per stage"""
+        depth = {}
+        async for row in self.jobs.aggregate([
+            {'$match': {'status': {'$in': [QUEUED, LEASED]}}},
+            {'$group': {'_id': {'stage': '$stage', 'status': '$status'}, 'count': {'$sum': 1}}}
+        ]):
+            depth.setdefault(row['_id']['stage'], {})[row['_id']['status']] = row['count']
+        return {
+            **self._stats,
+            'worker_id': self.worker_id,
+            'workers': len(self._workers),
+            'stages': depth,
+            'dead_letter': await self.dead_letter.estimated_document_count()
+        }
+
+
+durable_queue = DurableQueue(
+    concurrency=settings.JOB_STAGE_CONCURRENCY,
+    max_pending=settings.JOB_MAX_PENDING,
+    retention_seconds=settings.JOB_RETENTION_SECONDS,
+    visibility_timeout=settings.JOB_VISIBILITY_TIMEOUT,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    backoff_base=settings.JOB_RETRY_BACKOFF_SECONDS,
+    backoff_max=settings.JOB_RETRY_BACKOFF_MAX_SECONDS,
+    poll_interval=settings.JOB_POLL_INTERVAL
+)
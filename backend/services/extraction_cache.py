@@ -0,0 +1,262 @@
+"""
+Structured-extraction result cache
+
+The same certificate text comes back again and again: re-uploads of one scan
+by different users, reprocessing after an edit, the same supplier document
+in several brands' batches. Extraction results are cached under the SHA-256
+of the whitespace-normalized OCR text plus a prompt version, so a hit skips
+the LLM round trip entirely.
+
+Lookups go through an in-process LRU first and then through a MongoDB
+collection shared by every API and worker process. Entries expire after a
+TTL (a TTL index removes them from MongoDB). The prompt version is derived
+from the prompt template and model name, so editing a prompt makes its old
+entries unreachable; ``invalidate`` removes them eagerly.
+
+Concurrent misses for the same key share one LLM call. The call runs in its
+own task, so a caller that goes away (e.g. a disconnected client) does not
+cancel it for the others waiting on the same text.
+"""
+import re
+import copy
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Collapse runs of whitespace so layout-only OCR differences share a key"""
+    return _WHITESPACE.sub(' ', text or '').strip()
+
+
+def prompt_version(*parts: str) -> str:
+    """Short hash of a prompt template and model name; changes whenever either does"""
+    return hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+class ExtractionCache:
+    """Two-tier (memory LRU + MongoDB) cache for LLM extraction results"""
+
+    def __init__(
+        self,
+        collection: str = 'extraction_cache',
+        memory_entries: int = 1024,
+        ttl_seconds: int = 30 * 24 * 3600,
+        enabled: bool = True,
+        db=None
+    ):
+        """Create the cache
+
+        Args:
+            collection: MongoDB collection for the shared tier
+            memory_entries: Results kept in this process
+            ttl_seconds: Lifetime of an entry in both tiers
+            enabled: When False every lookup misses and nothing is stored
+            db: Motor database (default: the application's connection)
+        """
+        self.collection_name = collection
+        self.memory_entries = memory_entries
+        self.ttl = ttl_seconds
+        self.enabled = enabled
+        self._db = db
+
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._indexed = False
+        self._stats = {
+            'memory_hits': 0,
+            'db_hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'shared_calls': 0,
+            'db_errors': 0,
+            'invalidated': 0
+        }
+
+    @property
+    def db(self):
+        if self._db is not None:
+            return self._db
+        from database.mongodb import get_database
+        return get_database()
+
+    @property
+    def entries(self):
+        db = self.db
+        return db[self.collection_name] if db is not None else None
+
+    @staticmethod
+    def make_key(namespace: str, version: str, text: str, context: str = '') -> str:
+        """Cache key for one extraction prompt (``context``: other prompt inputs, e.g. language)"""
+        key_source = f"{namespace}|{version}|{context}|{normalize_text(text)}"
+        return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+    async def _ensure_indexes(self):
+        if self._indexed:
+            return
+        self._indexed = True
+        await self.entries.create_index('expires_at', expireAfterSeconds=0)
+        await self.entries.create_index([('namespace', 1), ('version', 1)])
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a result, promoting MongoDB hits into memory"""
+        if not self.enabled:
+            return None
+
+        cached = self._memory.get(key)
+        if cached is not None:
+            expires, result = cached
+            if expires > time.time():
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return copy.deepcopy(result)
+            del self._memory[key]
+
+        entries = self.entries
+        if entries is not None:
+            try:
+                doc = await entries.find_one({'_id': key, 'expires_at': {'$gt': datetime.utcnow()}})
+            except Exception as e:
+                self._stats['db_errors'] += 1
+                logger.warning(f"⚠️ Extraction cache lookup failed: {e}")
+                doc = None
+            if doc is not None:
+                self._stats['db_hits'] += 1
+                remaining = (doc['expires_at'] - datetime.utcnow()).total_seconds()
+                self._remember(key, doc['result'], time.time() + remaining)
+                return copy.deepcopy(doc['result'])
+
+        self._stats['misses'] += 1
+        return None
+
+    async def put(self, key: str, result: Dict[str, Any], namespace: str, version: str):
+        """Store a result in both tiers (MongoDB errors are logged, not raised)"""
+        if not self.enabled:
+            return
+        self._remember(key, copy.deepcopy(result), time.time() + self.ttl)
+        self._stats['writes'] += 1
+
+        entries = self.entries
+        if entries is None:
+            return
+        now = datetime.utcnow()
+        try:
+            await self._ensure_indexes()
+            await entries.replace_one(
+                {'_id': key},
+                {
+                    '_id': key,
+                    'namespace': namespace,
+                    'version': version,
+                    'result': result,
+                    'created_at': now,
+                    'expires_at': now + timedelta(seconds=self.ttl)
+                },
+                upsert=True
+            )
+        except Exception as e:
+            self._stats['db_errors'] += 1
+            logger.warning(f"⚠️ Extraction cache write failed: {e}")
+
+    async def get_or_extract(
+        self,
+        namespace: str,
+        version: str,
+        text: str,
+        extract: Callable[[], Awaitable[Dict[str, Any]]],
+        context: str = ''
+    ) -> Dict[str, Any]:
+        """Cached result for ``text``, calling ``extract`` on a miss
+
+        Exceptions from ``extract`` propagate and nothing is cached, so a
+        failed or unparseable LLM response is retried next time.
+        """
+        if not self.enabled:
+            return await extract()
+
+        key = self.make_key(namespace, version, text, context)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            # Another request is already resolving the same text: wait for its answer
+            self._stats['shared_calls'] += 1
+        else:
+            task = asyncio.ensure_future(self._resolve(key, namespace, version, extract))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._resolved(key, done))
+
+        # Cancelling one caller must not cancel the extraction the others share
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _resolve(
+        self,
+        key: str,
+        namespace: str,
+        version: str,
+        extract: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Look ``key`` up and run ``extract`` on a miss, storing its result"""
+        result = await self.get(key)
+        if result is not None:
+            logger.info(f"⚡ Extraction cache hit ({namespace}, {key[:12]})")
+            return result
+        result = await extract()
+        await self.put(key, result, namespace, version)
+        return result
+
+    def _resolved(self, key: str, task: asyncio.Task):
+        """Forget a finished in-flight extraction"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Waiters re-raise it; mark it retrieved even if they all went away
+
+    async def invalidate(self, namespace: str, keep_version: Optional[str] = None) -> int:
+        """Drop a namespace's entries (all, or all but ``keep_version``) from both tiers"""
+        self._memory.clear()
+        entries = self.entries
+        if entries is None:
+            return 0
+        query: Dict[str, Any] = {'namespace': namespace}
+        if keep_version is not None:
+            query['version'] = {'$ne': keep_version}
+        result = await entries.delete_many(query)
+        self._stats['invalidated'] += result.deleted_count
+        logger.info(f"🗑️ Invalidated {result.deleted_count} cached {namespace} extractions")
+        return result.deleted_count
+
+    def _remember(self, key: str, result: Dict[str, Any], expires: float):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self._memory[key] = (expires, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and the memory tier size"""
+        lookups = self._stats['memory_hits'] + self._stats['db_hits'] + self._stats['misses']
+        hits = lookups - self._stats['misses']
+        return {
+            **self._stats,
+            'enabled': self.enabled,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'memory_entries': len(self._memory)
+        }
+
+
+# Global instance
+extraction_cache = ExtractionCache(
+    memory_entries=settings.EXTRACTION_CACHE_MEMORY_ENTRIES,
+    ttl_seconds=settings.EXTRACTION_CACHE_TTL_SECONDS,
+    enabled=settings.EXTRACTION_CACHE_ENABLED
+)
@@ -0,0 +1,382 @@
+"""
+Staged background job queue
+
+Document processing (OCR, LLM structuring, database insert, vector indexing)
+takes tens of seconds, far too long to hold an HTTP request open. A request
+now submits a job and returns its ID; the job then moves through a pipeline
+of named stages. Each stage has its own queue and a fixed number of worker
+tasks, so a slow stage (OCR) cannot starve a fast one (the Mongo insert) and
+the number of concurrent Gemini calls or OCR runs stays bounded no matter how
+many uploads arrive. Per-stage state and timings are kept on the job for the
+status endpoint.
+"""
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class QueueFullError(RuntimeError):
+    """Raised when too many jobs are already in flight"""
+
+
+@dataclass
+class StageState:
+    """Progress of one job through one stage"""
+    name: str
+    status: str = PENDING
+    queued_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+    def info(self) -> Dict[str, Any]:
+        wait = run = None
+        if self.queued_at is not None and self.started_at is not None:
+            wait = self.started_at - self.queued_at
+        if self.started_at is not None and self.finished_at is not None:
+            run = self.finished_at - self.started_at
+        return {
+            'name': self.name,
+            'status': self.status,
+            'wait_time': wait,
+            'run_time': run,
+            'attempts': self.attempts,
+            'error': self.error
+        }
+
+
+@dataclass
+class Job:
+    """A unit of work moving through a pipeline
+
+    Stage handlers read their inputs from ``context`` and write outputs back
+    to it; whatever a handler puts in ``result`` is returned by the status
+    endpoint once the job has succeeded.
+    """
+    id: str
+    pipeline: str
+    stages: List[StageState]
+    context: Dict[str, Any] = field(default_factory=dict)
+    owner: Optional[str] = None
+    status: str = QUEUED
+    result: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def stage(self, name: str) -> StageState:
+        for state in self.stages:
+            if state.name == name:
+                return state
+        raise KeyError(name)
+
+    def info(self) -> Dict[str, Any]:
+        """Public view of the job for the status endpoint"""
+        return {
+            'job_id': self.id,
+            'pipeline': self.pipeline,
+            'status': self.status,
+            'stages': [state.info() for state in self.stages],
+            'result': self.result if self.status == SUCCEEDED else None,
+            'error': self.error,
+            'created_at': self.created_at,
+            'total_time': (self.finished_at or time.time()) - self.created_at
+        }
+
+
+Handler = Callable[[Job], Awaitable[None]]
+
+
+class _Stage:
+    """A stage's handler, queue and workers"""
+
+    def __init__(self, name: str, handler: Handler, concurrency: int):
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+        self.run_time = 0.0
+
+
+class JobQueue:
+    """Runs jobs through pipelines of stages with bounded concurrency per stage"""
+
+    def __init__(
+        self,
+        concurrency: Optional[Dict[str, int]] = None,
+        default_concurrency: int = 2,
+        max_pending: int = 500,
+        retention_seconds: int = 3600
+    ):
+        """Create the queue
+
+        Args:
+            concurrency: Worker tasks per stage name
+            default_concurrency: Workers for stages not listed in ``concurrency``
+            max_pending: Unfinished jobs accepted before ``submit`` refuses new ones
+            retention_seconds: How long finished jobs stay queryable
+        """
+        self.concurrency = dict(concurrency or {})
+        self.default_concurrency = default_concurrency
+        self.max_pending = max_pending
+        self.retention = retention_seconds
+
+        self._stages: Dict[str, _Stage] = {}
+        self._pipelines: Dict[str, List[str]] = {}
+        self._on_finish: Dict[str, Optional[Handler]] = {}
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._pending = 0
+        self._stats = {'submitted': 0, 'succeeded': 0, 'failed': 0, 'rejected': 0}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def register_stage(self, name: str, handler: Handler, concurrency: Optional[int] = None):
+        """Register the async handler that runs stage ``name``"""
+        if concurrency is None:
+            concurrency = self.concurrency.get(name, self.default_concurrency)
+        stage = self._stages[name] = _Stage(name, handler, concurrency)
+        if self._loop is not None:
+            self._start_stage(stage)
+
+    def register_pipeline(self, name: str, stages: Sequence[str], on_finish: Optional[Handler] = None):
+        """Register a pipeline as an ordered list of stage names
+
+        ``on_finish`` runs once per job after it succeeds or fails (e.g. to
+        remove temporary files).
+        """
+        missing = [stage for stage in stages if stage not in self._stages]
+        if missing:
+            raise ValueError(f"Unknown stages for pipeline '{name}': {', '.join(missing)}")
+        self._pipelines[name] = list(stages)
+        self._on_finish[name] = on_finish
+
+    def start(self):
+        """Start the stage workers on the running event loop (idempotent)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        for stage in self._stages.values():
+            self._start_stage(stage)
+        logger.info(
+            "🧵 Job queue started: "
+            + ", ".join(f"{s.name}×{s.concurrency}" for s in self._stages.values())
+        )
+
+    def _start_stage(self, stage: _Stage):
+        stage.queue = asyncio.Queue()
+        stage.workers = [
+            self._loop.create_task(self._worker(stage), name=f"job-{stage.name}-{i}")
+            for i in range(stage.concurrency)
+        ]
+
+    async def stop(self):
+        """Cancel the stage workers; unfinished jobs are marked failed and cleaned up"""
+        workers = [task for stage in self._stages.values() for task in stage.workers]
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for stage in self._stages.values():
+            stage.workers = []
+        self._loop = None
+
+        for job in list(self._jobs.values()):
+            if not job.done:
+                self._finish(job, FAILED, 'Server shut down before the job finished')
+                await self._run_on_finish(job)
+
+    async def submit(
+        self,
+        pipeline: str,
+        context: Dict[str, Any],
+        owner: Optional[str] = None,
+        job_id: Optional[str] = None
+    ) -> Job:
+        """Create a job and queue it for the pipeline's first stage
+
+        Raises:
+            ValueError: Unknown pipeline
+            QueueFullError: ``max_pending`` jobs are already unfinished
+        """
+        if pipeline not in self._pipelines:
+            raise ValueError(f"Unknown pipeline: {pipeline}")
+        self.start()
+        self._prune()
+
+        if self._pending >= self.max_pending:
+            self._stats['rejected'] += 1
+            raise QueueFullError(f"{self._pending} jobs already in progress, try again later")
+
+        job = Job(
+            id=job_id or uuid.uuid4().hex,
+            pipeline=pipeline,
+            stages=[StageState(name) for name in self._pipelines[pipeline]],
+            context=context,
+            owner=owner
+        )
+        self._jobs[job.id] = job
+        self._pending += 1
+        self._stats['submitted'] += 1
+
+        self._enqueue(job, job.stages[0])
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def find(self, job_id: str) -> Optional[Job]:
+        """Async lookup, matching ``DurableQueue.find``"""
+        return self.get(job_id)
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None, poll: float = 0.05) -> Job:
+        """Wait until a job has finished (for scripts and tests)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self._jobs[job_id]
+            if job.done:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                raise asyncio.TimeoutError(f"Job {job_id} still {job.status}")
+            await asyncio.sleep(poll)
+
+    def _enqueue(self, job: Job, state: StageState):
+        state.status = QUEUED
+        state.queued_at = time.time()
+        self._stages[state.name].queue.put_nowait(job)
+
+    async def _worker(self, stage: _Stage):
+        while True:
+            job = await stage.queue.get()
+            try:
+                await self._run_stage(stage, job)
+            except Exception as e:  # Bookkeeping bug; never let it kill the worker
+                logger.error(f"❌ Job worker '{stage.name}' error: {e}")
+            finally:
+                stage.queue.task_done()
+
+    async def _run_stage(self, stage: _Stage, job: Job):
+        state = job.stage(stage.name)
+        state.status = RUNNING
+        state.started_at = time.time()
+        state.attempts += 1
+        job.status = RUNNING
+        stage.busy += 1
+
+        try:
+            await stage.handler(job)
+        except asyncio.CancelledError:
+            state.status = FAILED
+            state.error = 'cancelled'
+            raise
+        except Exception as e:
+            state.finished_at = time.time()
+            state.status = FAILED
+            state.error = str(e)
+            stage.failed += 1
+            logger.error(f"❌ Job {job.id} failed in stage '{stage.name}': {e}")
+            for later in job.stages:
+                if later.status == PENDING:
+                    later.status = SKIPPED
+            self._finish(job, FAILED, str(e))
+            await self._run_on_finish(job)
+            return
+        finally:
+            stage.busy -= 1
+            stage.run_time += time.time() - state.started_at
+
+        state.finished_at = time.time()
+        state.status = SUCCEEDED
+        stage.processed += 1
+
+        index = job.stages.index(state)
+        if index + 1 < len(job.stages):
+            self._enqueue(job, job.stages[index + 1])
+        else:
+            self._finish(job, SUCCEEDED)
+            await self._run_on_finish(job)
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        self._pending -= 1
+        self._stats[status] += 1
+
+    async def _run_on_finish(self, job: Job):
+        on_finish = self._on_finish.get(job.pipeline)
+        if on_finish is None:
+            return
+        try:
+            await on_finish(job)
+        except Exception as e:
+            logger.warning(f"⚠️ Cleanup for job {job.id} failed: {e}")
+
+    def _prune(self):
+        """Forget finished jobs older than the retention period"""
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if j.done and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Job counters and per-stage queue depth, busy workers and mean run time"""
+        return {
+            **self._stats,
+            'pending': self._pending,
+            'max_pending': self.max_pending,
+            'stages': {
+                stage.name: {
+                    'concurrency': stage.concurrency,
+                    'queued': stage.queue.qsize() if stage.queue is not None else 0,
+                    'busy': stage.busy,
+                    'processed': stage.processed,
+                    'failed': stage.failed,
+                    'avg_run_time': stage.run_time / (stage.processed + stage.failed)
+                    if stage.processed + stage.failed else 0.0
+                }
+                for stage in self._stages.values()
+            }
+        }
+
+
+# In-process queue; pipelines register their stages on import (services.certificate_pipeline)
+job_queue = JobQueue(
+    concurrency=settings.JOB_STAGE_CONCURRENCY,
+    max_pending=settings.JOB_MAX_PENDING,
+    retention_seconds=settings.JOB_RETENTION_SECONDS
+)
+
+
+def get_job_queue():
+    """Queue backend selected by ``JOB_QUEUE_BACKEND``: in-process or durable MongoDB"""
+    backend = settings.JOB_QUEUE_BACKEND.lower()
+
+    if backend == 'memory':
+        return job_queue
+    elif backend == 'mongo':
+        from services.durable_queue import durable_queue
+        return durable_queue
+    else:
+        raise ValueError(f"Unsupported job queue backend: {backend}")
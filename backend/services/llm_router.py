@@ -0,0 +1,285 @@
+"""
+Latency-aware LLM provider routing with circuit breakers
+
+Each model (Groq primary/reasoning, OpenRouter fallback) keeps a rolling
+window of call latencies and outcomes. A provider that keeps failing has its
+circuit opened and is skipped until a cool-down has passed, after which a
+single probe call decides whether it closes again. Calls go to the first
+healthy provider in preference order and the whole attempt chain shares one
+deadline: each attempt may use an equal share of the time left, so a slow or
+rate-limited provider costs at most its share instead of a full timeout
+before the fallback is tried.
+
+With hedging enabled, a second request goes to the next provider once the
+first has taken longer than its own p95 latency; whichever answers first
+wins and the other is cancelled.
+"""
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class NoProviderAvailable(Exception):
+    """Every provider failed, was skipped by its circuit breaker, or the deadline passed"""
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ProviderState:
+    """Rolling latency/error window and circuit breaker for one model"""
+
+    def __init__(
+        self,
+        name: str,
+        window: int,
+        failure_threshold: int,
+        error_rate_threshold: float,
+        cooldown: float,
+        min_calls: int = 5
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.cooldown = cooldown
+        self.min_calls = min_calls
+        self.calls: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        self.last_error: Optional[str] = None
+        self.totals = {'calls': 0, 'failures': 0, 'skipped': 0, 'hedged': 0, 'circuit_opened': 0}
+
+    @property
+    def error_rate(self) -> float:
+        if not self.calls:
+            return 0.0
+        return sum(1 for _, ok in self.calls if not ok) / len(self.calls)
+
+    def latency(self, pct: float) -> Optional[float]:
+        """Latency percentile of successful calls in the window"""
+        latencies = [latency for latency, ok in self.calls if ok]
+        return percentile(latencies, pct) if latencies else None
+
+    def available(self, now: float) -> bool:
+        """Whether a call may go to this provider (moves an open circuit to half-open after the cool-down)"""
+        if self.state == OPEN and now - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == HALF_OPEN:
+            return not self.probe_in_flight
+        return self.state == CLOSED
+
+    def healthy(self) -> bool:
+        """Closed circuit and error rate under the threshold"""
+        return self.state == CLOSED and (
+            len(self.calls) < self.min_calls or self.error_rate < self.error_rate_threshold
+        )
+
+    def begin(self):
+        self.totals['calls'] += 1
+        if self.state == HALF_OPEN:
+            self.probe_in_flight = True
+
+    def record_success(self, latency: float):
+        self.calls.append((latency, True))
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            logger.info(f"✅ LLM provider {self.name} recovered, closing circuit")
+        self.state = CLOSED
+        self.probe_in_flight = False
+
+    def record_failure(self, latency: float, error: BaseException, now: float):
+        self.calls.append((latency, False))
+        self.totals['failures'] += 1
+        self.consecutive_failures += 1
+        self.last_error = str(error) or type(error).__name__
+
+        tripped = self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold or (
+            len(self.calls) >= self.min_calls and self.error_rate >= self.error_rate_threshold
+        )
+        if tripped:
+            if self.state != OPEN:
+                self.totals['circuit_opened'] += 1
+                logger.warning(f"⚠️ LLM provider {self.name} circuit opened: {self.last_error}")
+            self.state = OPEN
+            self.opened_at = now
+        self.probe_in_flight = False
+
+    def release(self):
+        """An attempt was cancelled (lost a hedge race) without an outcome"""
+        self.probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95 = self.latency(50), self.latency(95)
+        return {
+            'state': self.state,
+            'healthy': self.healthy(),
+            'window_calls': len(self.calls),
+            'error_rate': round(self.error_rate, 3),
+            'p50_latency': round(p50, 3) if p50 is not None else None,
+            'p95_latency': round(p95, 3) if p95 is not None else None,
+            'consecutive_failures': self.consecutive_failures,
+            'last_error': self.last_error,
+            **self.totals
+        }
+
+
+class LLMRouter:
+    """Routes a call to the healthiest provider within a deadline"""
+
+    def __init__(
+        self,
+        deadline: Optional[float] = None,
+        window: Optional[int] = None,
+        failure_threshold: Optional[int] = None,
+        error_rate_threshold: Optional[float] = None,
+        cooldown: Optional[float] = None,
+        hedge: Optional[bool] = None,
+        hedge_min_delay: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Create the router (defaults come from the LLM_ROUTER_* settings)
+
+        Args:
+            deadline: Seconds for the whole attempt chain, fallbacks included
+            window: Calls per provider kept for latency and error rates
+            failure_threshold: Consecutive failures that open a circuit
+            error_rate_threshold: Error rate over the window that opens a circuit
+            cooldown: Seconds an open circuit waits before a probe call
+            hedge: Send a second request to the next provider after the first's p95
+            hedge_min_delay: Shortest wait before a hedged request
+            clock: Monotonic time source
+        """
+        self.deadline = deadline if deadline is not None else settings.LLM_ROUTER_DEADLINE
+        self.window = window or settings.LLM_ROUTER_WINDOW
+        self.failure_threshold = failure_threshold or settings.LLM_BREAKER_FAILURES
+        self.error_rate_threshold = error_rate_threshold or settings.LLM_BREAKER_ERROR_RATE
+        self.cooldown = cooldown if cooldown is not None else settings.LLM_BREAKER_COOLDOWN
+        self.hedge = hedge if hedge is not None else settings.LLM_HEDGE_ENABLED
+        self.hedge_min_delay = hedge_min_delay if hedge_min_delay is not None else settings.LLM_HEDGE_MIN_DELAY
+        self.clock = clock
+        self.providers: Dict[str, ProviderState] = {}
+
+    def provider(self, name: str) -> ProviderState:
+        if name not in self.providers:
+            self.providers[name] = ProviderState(
+                name, self.window, self.failure_threshold, self.error_rate_threshold, self.cooldown
+            )
+        return self.providers[name]
+
+    def order(self, names: Sequence[str]) -> List[str]:
+        """Callable providers: healthy ones in preference order, then degraded/probing ones"""
+        now = self.clock()
+        states = [self.provider(name) for name in names]
+        available = [state for state in states if state.available(now)]
+        for state in states:
+            if state not in available:
+                state.totals['skipped'] += 1
+        return [state.name for state in sorted(available, key=lambda s: not s.healthy())]
+
+    async def call(
+        self,
+        calls: Sequence[Tuple[str, Callable[[], Awaitable[Any]]]],
+        deadline: Optional[float] = None
+    ) -> Any:
+        """Run the first successful call among ``calls`` ((provider name, coroutine factory), preferred first)
+
+        Raises:
+            NoProviderAvailable: All providers failed, were skipped, or the deadline passed
+        """
+        factories = dict(calls)
+        candidates = self.order([name for name, _ in calls])
+        if not candidates:
+            raise NoProviderAvailable("All LLM providers are unavailable (circuits open)")
+
+        expires = self.clock() + (deadline if deadline is not None else self.deadline)
+        # task -> (provider, started, attempt expiry)
+        running: Dict[asyncio.Task, Tuple[str, float, float]] = {}
+        errors: List[str] = []
+
+        def launch(name: str):
+            # Each attempt gets an equal share of what is left, so the fallbacks still have time
+            now = self.clock()
+            share = (expires - now) / (1 + len(candidates))
+            self.provider(name).begin()
+            task = asyncio.ensure_future(factories[name]())
+            running[task] = (name, now, now + share)
+
+        def fail(task: asyncio.Task, error: BaseException):
+            name, started, _ = running.pop(task)
+            state = self.provider(name)
+            state.record_failure(self.clock() - started, error, self.clock())
+            errors.append(f"{name}: {state.last_error}")
+            logger.warning(f"⚠️ LLM provider {name} failed: {state.last_error}")
+
+        try:
+            launch(candidates.pop(0))
+            while running:
+                now = self.clock()
+                hedge_in = self._hedge_delay(running, candidates)
+                wait = min(attempt_expires for _, _, attempt_expires in running.values()) - now
+                if hedge_in is not None:
+                    wait = min(wait, hedge_in)
+
+                done, _ = await asyncio.wait(list(running), timeout=max(0.0, wait), return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    if task.exception() is None:
+                        name, started, _ = running.pop(task)
+                        self.provider(name).record_success(self.clock() - started)
+                        return task.result()
+                    fail(task, task.exception())
+
+                now = self.clock()
+                for task, (name, _, attempt_expires) in list(running.items()):
+                    if now >= attempt_expires:
+                        task.cancel()
+                        fail(task, TimeoutError(f"no answer within {attempt_expires - running[task][1]:.1f}s"))
+
+                if not candidates:
+                    continue
+                if not running:
+                    launch(candidates.pop(0))
+                elif hedge_in is not None and not done and self._hedge_delay(running, candidates) == 0:
+                    name = candidates.pop(0)
+                    self.provider(name).totals['hedged'] += 1
+                    logger.info(f"🔀 Hedging slow LLM call to {name}")
+                    launch(name)
+
+            raise NoProviderAvailable('; '.join(errors) or 'No LLM provider answered')
+        finally:
+            for task, (name, _, _) in running.items():
+                task.cancel()
+                self.provider(name).release()
+
+    def _hedge_delay(self, running: Dict[asyncio.Task, Tuple[str, float, float]], candidates: List[str]) -> Optional[float]:
+        """Seconds until a hedged request should start, if hedging applies"""
+        if not self.hedge or len(running) != 1 or not candidates:
+            return None
+        name, started, _ = next(iter(running.values()))
+        p95 = self.provider(name).latency(95)
+        if p95 is None:
+            return None
+        return max(0.0, max(p95, self.hedge_min_delay) - (self.clock() - started))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'deadline': self.deadline,
+            'hedge': self.hedge,
+            'providers': {name: state.snapshot() for name, state in self.providers.items()}
+        }
@@ -3,22 +3,60 @@ LLM service for chatbot using multiple models:
 - Qwen 2 72B (Groq) - Primary chatbot
 - DeepSeek-R1 (Groq) - Complex reasoning
 - Gemma 3 9B (OpenRouter) - Fallback
+
+All calls go through async clients, so a request waiting on a model never
+blocks the event loop. Each provider gets its own keep-alive connection pool
+(bounded by LLM_MAX_CONNECTIONS) and every call has a timeout. Which model
+answers is decided by LLMRouter (circuit breakers, rolling latency, deadline).
 """
-from groq import Groq
+from groq import AsyncGroq
 from utils.config import settings
+import asyncio
 import logging
+import httpx
 from typing import List, Dict, AsyncGenerator
 from database.chroma_db import chroma_client
-import requests
+from services.llm_router import LLMRouter, NoProviderAvailable
+from services.registry import service_registry
 
 logger = logging.getLogger(__name__)
 
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+
+def pooled_client(**kwargs) -> httpx.AsyncClient:
+    """Keep-alive HTTP client with the configured pool size and timeouts"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT),
+        **kwargs
+    )
+
+
+async def search_context(query: str, n_results: int) -> str:
+    """RAG context from ChromaDB (embedding the query is CPU work, so it runs on a thread)"""
+    search_results = await asyncio.to_thread(chroma_client.search, query, n_results=n_results)
+    if search_results['documents']:
+        return "\n\n".join(search_results['documents'][0])
+    return ""
+
 
 class LLMService:
     def __init__(self):
+        self.router = LLMRouter()
+        
         # Initialize Groq client with available models
         try:
-            self.groq_client = Groq(api_key=settings.GROQ_API_KEY)
+            self.groq_client = AsyncGroq(
+                api_key=settings.GROQ_API_KEY,
+                http_client=pooled_client(),
+                timeout=settings.LLM_TIMEOUT,
+                max_retries=settings.LLM_MAX_RETRIES
+            )
             # Updated to use available models
             self.primary_model = "llama-3.3-70b-versatile"  # Fast and versatile
             self.reasoning_model = "qwen/qwen3-32b"  # For complex reasoning
@@ -33,11 +71,15 @@ class LLMService:
         try:
             self.openrouter_key = settings.OPENROUTER_API_KEY
             self.fallback_model = "google/gemma-2-9b-it:free"
+            self.openrouter_client = pooled_client(
+                headers={"Authorization": f"Bearer {self.openrouter_key}"}
+            )
             logger.info("✅ OpenRouter initialized (Gemma 3 9B fallback)")
         except Exception as e:
             logger.warning(f"⚠️ OpenRouter initialization failed: {e}")
             self.openrouter_key = None
             self.fallback_model = None
+            self.openrouter_client = None
     
     async def chat_completion(
         self,
@@ -55,22 +97,22 @@ class LLMService:
             use_rag: Whether to retrieve context from ChromaDB
             use_reasoning: Whether to use DeepSeek for complex reasoning
         """
-        # Try primary models first (Groq)
+        # Preference order; the router skips models whose circuit is open
+        calls = []
         if self.groq_client:
-            try:
-                if use_reasoning and self.reasoning_model:
-                    return await self._deepseek_reasoning(query, chat_history, use_rag)
-                else:
-                    return await self._qwen_chat(query, chat_history, use_rag)
-            except Exception as e:
-                logger.warning(f"⚠️ Groq failed: {e}, trying fallback")
+            if use_reasoning and self.reasoning_model:
+                calls.append((self.reasoning_model, lambda: self._deepseek_reasoning(query, chat_history, use_rag)))
+            calls.append((self.primary_model, lambda: self._qwen_chat(query, chat_history, use_rag)))
         
         # Fallback to Gemma via OpenRouter
         if self.openrouter_key:
+            calls.append((self.fallback_model, lambda: self._gemma_fallback(query, chat_history)))
+        
+        if calls:
             try:
-                return await self._gemma_fallback(query, chat_history)
-            except Exception as e:
-                logger.warning(f"⚠️ OpenRouter fallback failed: {e}")
+                return await self.router.call(calls)
+            except NoProviderAvailable as e:
+                logger.warning(f"⚠️ No LLM provider answered: {e}")
         
         return "I apologize, but I'm currently unable to process your request. Please try again later."
     
@@ -83,11 +125,7 @@ class LLMService:
         """Generate response using Qwen 2 72B"""
         try:
             # Retrieve relevant context if RAG enabled
-            context = ""
-            if use_rag:
-                search_results = chroma_client.search(query, n_results=3)
-                if search_results['documents']:
-                    context = "\n\n".join(search_results['documents'][0])
+            context = await search_context(query, n_results=3) if use_rag else ""
             
             # Build system prompt
             system_prompt = """You are a helpful textile compliance expert assistant for SCAP (Supply Chain AI Compliance Platform).
@@ -107,7 +145,7 @@ Focus on practical, actionable advice."""
             messages.append({"role": "user", "content": query})
             
             # Generate response
-            response = self.groq_client.chat.completions.create(
+            response = await self.groq_client.chat.completions.create(
                 model=self.primary_model,
                 messages=messages,
                 temperature=0.7,
@@ -131,11 +169,7 @@ Focus on practical, actionable advice."""
         """Generate response using DeepSeek-R1 for complex reasoning"""
         try:
             # Retrieve more context for reasoning tasks
-            context = ""
-            if use_rag:
-                search_results = chroma_client.search(query, n_results=5)
-                if search_results['documents']:
-                    context = "\n\n".join(search_results['documents'][0])
+            context = await search_context(query, n_results=5) if use_rag else ""
             
             # Build system prompt for reasoning
             system_prompt = """You are an expert compliance analyst for SCAP (Supply Chain AI Compliance Platform).
@@ -155,7 +189,7 @@ Consider multiple perspectives and potential implications."""
             messages.append({"role": "user", "content": query})
             
             # Generate response with DeepSeek
-            response = self.groq_client.chat.completions.create(
+            response = await self.groq_client.chat.completions.create(
                 model=self.reasoning_model,
                 messages=messages,
                 temperature=0.3,  # Lower temperature for more focused reasoning
@@ -168,8 +202,7 @@ Consider multiple perspectives and potential implications."""
             
         except Exception as e:
             logger.error(f"❌ DeepSeek reasoning failed: {e}")
-            # Fallback to regular Qwen
-            return await self._qwen_chat(query, chat_history, use_rag)
+            raise
     
     async def _gemma_fallback(
         self,
@@ -192,19 +225,14 @@ Provide concise, helpful responses."""
             messages.append({"role": "user", "content": query})
             
             # Call OpenRouter API
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.openrouter_key}",
-                    "Content-Type": "application/json"
-                },
+            response = await self.openrouter_client.post(
+                OPENROUTER_URL,
                 json={
                     "model": self.fallback_model,
                     "messages": messages,
                     "max_tokens": 800,
                     "temperature": 0.7
-                },
-                timeout=30
+                }
             )
             
             if response.status_code == 200:
@@ -235,7 +263,7 @@ Answer questions clearly and concisely."""
                 messages.extend(chat_history)
             messages.append({"role": "user", "content": query})
             
-            stream = self.groq_client.chat.completions.create(
+            stream = await self.groq_client.chat.completions.create(
                 model=self.primary_model,
                 messages=messages,
                 temperature=0.7,
@@ -243,14 +271,33 @@ Answer questions clearly and concisely."""
                 stream=True
             )
             
-            for chunk in stream:
-                if chunk.choices[0].delta.content:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
                     yield chunk.choices[0].delta.content
                     
         except Exception as e:
             logger.error(f"❌ LLM streaming failed: {e}")
             raise
 
+    
+    def get_stats(self) -> Dict:
+        """Per-model circuit state, latency and error rates"""
+        return {
+            'models': {
+                'primary': self.primary_model,
+                'reasoning': self.reasoning_model,
+                'fallback': self.fallback_model
+            },
+            'router': self.router.get_stats()
+        }
+    
+    async def aclose(self):
+        """Close the pooled provider connections"""
+        if self.groq_client:
+            await self.groq_client.close()
+        if self.openrouter_client:
+            await self.openrouter_client.aclose()
+
 
 # Global instance
-llm_service = LLMService()
+llm_service = service_registry.register('llm', LLMService)
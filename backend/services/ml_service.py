@@ -3,15 +3,14 @@ ML Service for Risk Analysis using XGBoost
 
 This service handles training and inference of the risk prediction model.
 """
-import xgboost as xgb
-import shap
 import numpy as np
-import pandas as pd
 import pickle
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 import logging
 
+from services.registry import service_registry
+
 logger = logging.getLogger(__name__)
 
 class RiskMLService:
@@ -42,6 +41,9 @@ class RiskMLService:
 
     def _create_dummy_model(self):
         """Create a dummy model for initial setup"""
+        import pandas as pd
+        import xgboost as xgb
+        
         X_dummy = pd.DataFrame(np.zeros((10, len(self.feature_names))), columns=self.feature_names)
         y_dummy = np.random.uniform(0, 100, 10)
         
@@ -55,7 +57,7 @@ class RiskMLService:
         self.model.fit(X_dummy, y_dummy)
         self.save_model()
 
-    def train_model(self, training_data: pd.DataFrame, target_column: str = 'risk_score'):
+    def train_model(self, training_data: 'pd.DataFrame', target_column: str = 'risk_score'):
         """
         Train XGBoost model on historical supplier data
         
@@ -63,6 +65,9 @@ class RiskMLService:
             training_data: DataFrame containing features and target
             target_column: Name of the target column
         """
+        import shap
+        import xgboost as xgb
+        
         X = training_data[self.feature_names]
         y = training_data[target_column]
         
@@ -91,6 +96,8 @@ class RiskMLService:
     def load_model(self) -> bool:
         """Load pre-trained model from disk"""
         try:
+            import shap
+            
             with open(self.model_path, 'rb') as f:
                 self.model = pickle.load(f)
             self.explainer = shap.TreeExplainer(self.model)
@@ -115,6 +122,8 @@ class RiskMLService:
             if not self.load_model():
                 raise RuntimeError("No model available for prediction")
         
+        import pandas as pd
+        
         # Create feature vector with all required features
         X = pd.DataFrame([{
             feature: features.get(feature, 0) 
@@ -150,4 +159,4 @@ class RiskMLService:
         return risk_score, top_drivers
 
 # Global instance
-ml_service = RiskMLService()
+ml_service = service_registry.register('risk_model', RiskMLService)
@@ -0,0 +1,141 @@
+"""
+Micro-batching scheduler for OCR
+
+When many suppliers upload at once, each request would otherwise run its own
+``readtext`` call and the recognizer would only ever see the boxes of one
+image. The scheduler holds requests for a short window (or until a batch is
+full) and groups them by language and OCR options. A group is split across
+the idle pool workers, so concurrent uploads still run on separate cores;
+each worker detects text per image in its share and recognizes the crops of
+those images together. Batching only stacks images on one worker when every
+worker is already busy. Each caller gets its own results back through a
+future.
+"""
+import json
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from services.ocr_pool import OCRProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+class OCRBatchScheduler:
+    """Collects concurrent OCR requests into batches for the process pool"""
+
+    def __init__(self, engine: OCRProcessPool, window_ms: int = 20, max_batch: int = 8):
+        """Create the scheduler
+
+        Args:
+            engine: Process pool that runs the batches
+            window_ms: How long the first request of a batch waits for others
+            max_batch: Images per batch; a full batch is dispatched immediately
+        """
+        self.engine = engine
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, str], List[Tuple[Any, Future]]] = {}
+        self._timers: Dict[Tuple[str, str], threading.Timer] = {}
+        self._dispatcher = ThreadPoolExecutor(
+            max_workers=engine.max_pending,
+            thread_name_prefix='ocr-batch'
+        )
+        self._stats = {'requests': 0, 'batches': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_batch > 1
+
+    def submit(self, image, language: str = 'en', **options) -> Future:
+        """Queue an image for OCR and return a future for its readtext results"""
+        future = Future()
+        key = (language, json.dumps(options, sort_keys=True, default=str))
+
+        with self._lock:
+            self._stats['requests'] += 1
+            bucket = self._buckets.setdefault(key, [])
+            bucket.append((image, future))
+
+            if len(bucket) >= self.max_batch:
+                self._flush_locked(key)
+            elif len(bucket) == 1:
+                timer = threading.Timer(self.window, self._flush, args=(key,))
+                timer.daemon = True
+                self._timers[key] = timer
+                timer.start()
+
+        return future
+
+    def _flush(self, key: Tuple[str, str]):
+        with self._lock:
+            self._flush_locked(key)
+
+    def _flush_locked(self, key: Tuple[str, str]):
+        """Split the pending bucket for ``key`` across idle workers and hand each part to a dispatcher thread"""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        items = self._buckets.pop(key, None)
+        if not items:
+            return
+        parts = max(1, min(len(items), self.engine.idle_workers))
+        size = -(-len(items) // parts)
+        for start in range(0, len(items), size):
+            self._stats['batches'] += 1
+            self._dispatcher.submit(self._dispatch, key, items[start:start + size])
+
+    def _dispatch(self, key: Tuple[str, str], items: List[Tuple[Any, Future]]):
+        """Run one batch in the process pool and resolve each caller's future"""
+        language, options_json = key
+        options = json.loads(options_json)
+        images = [image for image, _ in items]
+
+        try:
+            if len(images) == 1:
+                results = [self.engine.readtext(images[0], language, **options)]
+            else:
+                results = self.engine.readtext_batch(images, language, **options)
+        except Exception as e:
+            logger.error(f"OCR batch of {len(images)} failed: {e}")
+            for _, future in items:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(items, results):
+            future.set_result(result)
+
+    def readtext(self, image, language: str = 'en', **options) -> List:
+        """Blocking OCR through the batch scheduler"""
+        if not self.enabled:
+            return self.engine.readtext(image, language, **options)
+        return self.submit(image, language, **options).result()
+
+    async def readtext_async(self, image, language: str = 'en', **options) -> List:
+        """Async OCR through the batch scheduler"""
+        if not self.enabled:
+            return await self.engine.readtext_async(image, language, **options)
+        return await asyncio.wrap_future(self.submit(image, language, **options))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request/batch counters"""
+        with self._lock:
+            batches = self._stats['batches']
+            return {
+                **self._stats,
+                'avg_batch_size': self._stats['requests'] / batches if batches else 0.0,
+                'window_ms': self.window * 1000,
+                'max_batch': self.max_batch
+            }
+
+    def shutdown(self):
+        """Flush pending requests and stop the dispatcher threads"""
+        with self._lock:
+            for key in list(self._buckets):
+                self._flush_locked(key)
+        self._dispatcher.shutdown(wait=False)
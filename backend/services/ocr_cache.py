@@ -0,0 +1,199 @@
+"""
+Content-addressed OCR result cache
+
+Suppliers re-upload the same certificate scan many times, so OCR results are
+cached under the SHA-256 of the raw file bytes combined with the language and
+preprocessing parameters. Lookups go through an in-memory LRU first and then
+through a size-bounded on-disk store.
+"""
+import os
+import copy
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_content(data: Union[str, Path, bytes, BinaryIO]) -> str:
+    """Compute the SHA-256 hex digest of a file path, bytes or file-like object
+
+    File-like objects are rewound to their original position afterwards.
+    """
+    digest = hashlib.sha256()
+
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        digest.update(data)
+    elif isinstance(data, (str, Path)):
+        with open(data, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    elif hasattr(data, 'read'):
+        position = data.tell() if hasattr(data, 'tell') else None
+        for chunk in iter(lambda: data.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        if position is not None:
+            data.seek(position)
+    else:
+        raise ValueError("Unsupported data type for hashing")
+
+    return digest.hexdigest()
+
+
+class OCRResultCache:
+    """Two-tier (memory LRU + disk) cache for OCR result dictionaries"""
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+        memory_entries: int = 256,
+        disk_max_bytes: int = 512 * 1024 * 1024
+    ):
+        """Initialize the cache
+
+        Args:
+            cache_dir: Directory for the on-disk tier
+            memory_entries: Maximum number of results kept in memory
+            disk_max_bytes: Maximum total size of the on-disk tier
+        """
+        self.cache_dir = Path(cache_dir)
+        self.memory_entries = memory_entries
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0
+        }
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load_disk_index()
+
+    @staticmethod
+    def make_key(content_hash: str, language: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Build a cache key from the content hash, language and OCR parameters"""
+        params_json = json.dumps(params or {}, sort_keys=True, default=str)
+        key_source = f"{content_hash}|{language}|{params_json}"
+        return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _load_disk_index(self):
+        """Index existing on-disk entries, oldest access first"""
+        entries = []
+        for path in self.cache_dir.glob('*/*.json'):
+            try:
+                stat = path.stat()
+                entries.append((stat.st_mtime, path.stem, stat.st_size))
+            except OSError:
+                continue
+
+        for _, key, size in sorted(entries):
+            self._disk_index[key] = size
+            self._disk_bytes += size
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a result, promoting disk hits into memory"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return copy.deepcopy(self._memory[key])
+
+            if key in self._disk_index:
+                path = self._entry_path(key)
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        result = json.load(f)
+                    os.utime(path)  # Track recency for disk eviction
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Dropping unreadable OCR cache entry {key}: {e}")
+                    self._remove_disk_entry(key)
+                else:
+                    self._disk_index.move_to_end(key)
+                    self._stats['disk_hits'] += 1
+                    self._remember(key, result)
+                    return copy.deepcopy(result)
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a result in both tiers"""
+        with self._lock:
+            self._remember(key, copy.deepcopy(result))
+
+            path = self._entry_path(key)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                payload = json.dumps(result, default=float).encode('utf-8')
+                tmp_path = path.with_suffix('.tmp')
+                with open(tmp_path, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_path, path)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"Failed to write OCR cache entry {key}: {e}")
+                return
+
+            if key in self._disk_index:
+                self._disk_bytes -= self._disk_index.pop(key)
+            self._disk_index[key] = len(payload)
+            self._disk_bytes += len(payload)
+            self._stats['writes'] += 1
+            self._evict_disk()
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self._stats['memory_evictions'] += 1
+
+    def _evict_disk(self):
+        """Remove the least recently used disk entries until under budget"""
+        while self._disk_bytes > self.disk_max_bytes and self._disk_index:
+            key = next(iter(self._disk_index))
+            self._remove_disk_entry(key)
+            self._stats['disk_evictions'] += 1
+
+    def _remove_disk_entry(self, key: str):
+        self._disk_bytes -= self._disk_index.pop(key, 0)
+        try:
+            self._entry_path(key).unlink()
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove every cached result"""
+        with self._lock:
+            self._memory.clear()
+            for key in list(self._disk_index):
+                self._remove_disk_entry(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self._stats['memory_hits'] + self._stats['disk_hits'] + self._stats['misses']
+            hits = lookups - self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'disk_entries': len(self._disk_index),
+                'disk_bytes': self._disk_bytes
+            }
@@ -0,0 +1,246 @@
+"""
+Document-bounds crop and deskew for photographed certificates
+
+Phone photos of certificates include table, hands and walls around the page,
+and EasyOCR's detection cost grows with pixel count. This stage finds the
+page, crops and deskews it, and downsamples it so text lines are about a
+target height, before the regular preprocessing runs.
+
+OpenCV (already installed as an EasyOCR dependency) is used to find the page
+quadrilateral and warp it flat. Without OpenCV a NumPy fallback finds the
+bright page region, estimates its skew from image moments, rotates it
+straight and crops to its bounding box. Everything runs on the CPU, on a
+downsampled copy for detection.
+"""
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from services.ocr_preprocessing import ImageInput, histogram, load_grayscale, otsu_threshold
+
+try:
+    import cv2
+    OPENCV_AVAILABLE = True
+except ImportError:
+    cv2 = None
+    OPENCV_AVAILABLE = False
+
+# Longest side of the copy used to look for the page
+DETECT_MAX_DIM = 800
+
+
+@dataclass
+class CropResult:
+    """Cropped page plus what the stage did to it"""
+    image: np.ndarray
+    applied: bool = False
+    method: Optional[str] = None  # 'opencv', 'numpy' or None
+    area_removed_pct: float = 0.0
+    skew_angle: float = 0.0
+    scale: float = 1.0
+    text_height: Optional[float] = None
+    crop_time: float = 0.0
+    quad: Optional[List[Tuple[float, float]]] = field(default=None, repr=False)
+
+    def info(self) -> Dict[str, Any]:
+        """JSON-friendly summary for OCR results"""
+        return {
+            'applied': self.applied,
+            'method': self.method,
+            'area_removed_pct': round(self.area_removed_pct, 2),
+            'skew_angle': round(self.skew_angle, 2),
+            'scale': round(self.scale, 3),
+            'text_height': round(self.text_height, 1) if self.text_height else None,
+            'crop_time': self.crop_time,
+            'output_shape': list(self.image.shape)
+        }
+
+
+def _downsample(gray: np.ndarray, max_dim: int) -> Tuple[np.ndarray, float]:
+    """Shrink for detection; returns the small image and its scale factor"""
+    ratio = min(1.0, max_dim / max(gray.shape))
+    if ratio == 1.0:
+        return gray, 1.0
+    size = (max(1, int(gray.shape[1] * ratio)), max(1, int(gray.shape[0] * ratio)))
+    return np.asarray(Image.fromarray(gray).resize(size, Image.BILINEAR)), ratio
+
+
+def order_quad(points: np.ndarray) -> np.ndarray:
+    """Order four corners as top-left, top-right, bottom-right, bottom-left"""
+    points = np.asarray(points, dtype=np.float32).reshape(4, 2)
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.array([
+        points[np.argmin(sums)],
+        points[np.argmin(diffs)],
+        points[np.argmax(sums)],
+        points[np.argmax(diffs)]
+    ], dtype=np.float32)
+
+
+def find_page_quad(gray: np.ndarray, min_area_ratio: float = 0.2) -> Optional[np.ndarray]:
+    """Find the page outline with OpenCV edges and contours
+
+    Returns:
+        Ordered 4x2 corner array in ``gray`` coordinates, or None
+    """
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    median = float(np.median(blurred))
+    edges = cv2.Canny(blurred, int(max(0, 0.66 * median)), int(min(255, 1.33 * median)))
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8), iterations=2)
+
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = min_area_ratio * gray.shape[0] * gray.shape[1]
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        if cv2.contourArea(contour) < min_area:
+            break
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) == 4:
+            return order_quad(approx)
+        # Rounded or partly occluded corners: fall back to the enclosing rectangle
+        rect = cv2.minAreaRect(contour)
+        if rect[1][0] * rect[1][1] >= min_area:
+            return order_quad(cv2.boxPoints(rect))
+    return None
+
+
+def warp_quad(gray: np.ndarray, quad: np.ndarray) -> np.ndarray:
+    """Perspective-warp the quadrilateral to an upright rectangle"""
+    tl, tr, br, bl = quad
+    width = int(round(max(np.linalg.norm(tr - tl), np.linalg.norm(br - bl))))
+    height = int(round(max(np.linalg.norm(bl - tl), np.linalg.norm(br - tr))))
+    target = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(quad, target)
+    return cv2.warpPerspective(gray, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def _page_mask(small: np.ndarray) -> np.ndarray:
+    """Bright-paper mask of a small grayscale image"""
+    return small > otsu_threshold(histogram(small))
+
+
+def _mask_skew(mask: np.ndarray) -> float:
+    """Skew of the mask's principal axis from the nearest image axis, in degrees"""
+    ys, xs = np.nonzero(mask)
+    if len(xs) < 10:
+        return 0.0
+    xs = xs - xs.mean()
+    ys = ys - ys.mean()
+    angle = 0.5 * math.degrees(math.atan2(2 * (xs * ys).mean(), (xs * xs).mean() - (ys * ys).mean()))
+    # Fold into (-45, 45]: a portrait page has its long axis near 90 degrees
+    return (angle + 45) % 90 - 45
+
+
+def _mask_bounds(mask: np.ndarray, min_fill: float = 0.3) -> Optional[Tuple[int, int, int, int]]:
+    """Bounding box (x0, y0, x1, y1) of rows/columns mostly covered by the mask"""
+    rows = np.nonzero(mask.mean(axis=1) > min_fill)[0]
+    cols = np.nonzero(mask.mean(axis=0) > min_fill)[0]
+    if len(rows) == 0 or len(cols) == 0:
+        return None
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def estimate_text_height(gray: np.ndarray) -> Optional[float]:
+    """Median height of text lines from the horizontal ink projection
+
+    Rows containing dark (text) pixels form runs, one per line of text; the
+    median run length approximates the text height in pixels.
+    """
+    ink = gray <= otsu_threshold(histogram(gray))
+    row_ink = ink.mean(axis=1)
+    active = row_ink > max(0.01, 0.1 * float(np.median(row_ink[row_ink > 0])) if (row_ink > 0).any() else 0.01)
+
+    # Lengths of consecutive active runs
+    padded = np.concatenate(([False], active, [False])).astype(np.int8)
+    edges = np.diff(padded)
+    starts = np.nonzero(edges == 1)[0]
+    ends = np.nonzero(edges == -1)[0]
+    runs = (ends - starts)
+    runs = runs[runs >= 3]  # Ignore rules, specks and underlines
+    if len(runs) < 3:
+        return None
+    return float(np.median(runs))
+
+
+def crop_document(
+    image_data: ImageInput,
+    target_text_height: Optional[int] = None,
+    min_area_ratio: float = 0.2,
+    min_removed_pct: float = 5.0,
+    min_skew: float = 1.0
+) -> CropResult:
+    """Crop, deskew and downsample a photographed page
+
+    Args:
+        image_data: Image file path, bytes, file-like object, numpy array or PIL image
+        target_text_height: Downsample so text lines are about this tall (never upscales)
+        min_area_ratio: Smallest page size, as a share of the photo, to accept
+        min_removed_pct: Crops removing less background than this are skipped
+        min_skew: Rotations smaller than this (degrees) are skipped
+
+    Returns:
+        CropResult with the grayscale page (the whole image if no page was found)
+    """
+    start_time = time.time()
+    gray = np.asarray(load_grayscale(image_data))
+    height, width = gray.shape
+    result = CropResult(image=gray)
+
+    small, ratio = _downsample(gray, DETECT_MAX_DIM)
+    page = None
+
+    if OPENCV_AVAILABLE:
+        quad = find_page_quad(small, min_area_ratio)
+        if quad is not None:
+            quad = quad / ratio
+            tl, tr, _, bl = quad
+            skew = math.degrees(math.atan2(tr[1] - tl[1], tr[0] - tl[0]))
+            page_area = 0.5 * abs(np.dot(quad[:, 0], np.roll(quad[:, 1], 1)) - np.dot(quad[:, 1], np.roll(quad[:, 0], 1)))
+            removed = 100.0 * (1 - page_area / (width * height))
+            if removed >= min_removed_pct or abs(skew) >= min_skew:
+                page = warp_quad(gray, quad)
+                result.method = 'opencv'
+                result.skew_angle = skew
+                result.quad = [tuple(map(float, point)) for point in quad]
+    else:
+        mask = _page_mask(small)
+        fill = mask.mean()
+        if min_area_ratio <= fill < 0.98:
+            skew = _mask_skew(mask)
+            rotated = gray
+            if abs(skew) >= min_skew:
+                # Dark fill so the rotated-in corners are not mistaken for paper
+                rotated = np.asarray(Image.fromarray(gray).rotate(skew, resample=Image.BILINEAR, expand=True, fillcolor=0))
+                small, ratio = _downsample(rotated, DETECT_MAX_DIM)
+                mask = _page_mask(small)
+            bounds = _mask_bounds(mask)
+            if bounds is not None:
+                x0, y0, x1, y1 = (int(round(v / ratio)) for v in bounds)
+                cropped = rotated[y0:y1, x0:x1]
+                removed = 100.0 * (1 - cropped.size / gray.size)
+                if removed >= min_removed_pct or abs(skew) >= min_skew:
+                    page = cropped
+                    result.method = 'numpy'
+                    result.skew_angle = skew
+
+    if page is not None and page.size:
+        result.image = np.ascontiguousarray(page)
+        result.applied = True
+
+    if target_text_height:
+        text_height = estimate_text_height(result.image)
+        result.text_height = text_height
+        if text_height and text_height > target_text_height * 1.2:
+            scale = target_text_height / text_height
+            new_size = (max(1, int(result.image.shape[1] * scale)), max(1, int(result.image.shape[0] * scale)))
+            result.image = np.asarray(Image.fromarray(result.image).resize(new_size, Image.LANCZOS))
+            result.scale = scale
+            result.applied = True
+
+    result.area_removed_pct = max(0.0, 100.0 * (1 - result.image.size / gray.size))
+    result.crop_time = time.time() - start_time
+    return result
@@ -0,0 +1,345 @@
+"""
+Pluggable OCR engines
+
+Every engine exposes EasyOCR's ``readtext`` contract, so the process pool,
+batching scheduler and ``OCRService`` stay engine agnostic:
+
+- ``easyocr``: EasyOCR readers (PyTorch CRAFT detector + CRNN recognizer)
+- ``onnx``: the same EasyOCR pipeline with the detector and recognizers
+  swapped for ONNX Runtime sessions exported by
+  ``scripts/export_easyocr_onnx.py`` (optionally int8-quantized), which is
+  much cheaper on CPU-only nodes
+- ``tesseract``: Tesseract through pytesseract, no neural detector at all
+
+Engines are built inside the OCR worker processes by ``create_engine``; the
+engine for a request comes from its OCR profile (see ``ocr_profiles``).
+"""
+import os
+import time
+import logging
+from abc import ABC, abstractmethod
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+from services.ocr_readers import ReaderPool, _create_easyocr_reader
+
+logger = logging.getLogger(__name__)
+
+ENGINE_NAMES = ('easyocr', 'onnx', 'tesseract')
+
+
+class OCREngine(ABC):
+    """Abstract base class for OCR engines"""
+
+    name: str = ''
+
+    @abstractmethod
+    def readtext(self, image, language: str = 'en', **options) -> List:
+        """Detect and recognize text, returning EasyOCR-shaped results
+
+        ``detail=1`` gives (bbox, text, confidence) tuples, ``paragraph=True``
+        merges lines into (bbox, text) pairs and ``detail=0`` gives text only.
+        Options an engine does not understand are ignored.
+        """
+        pass
+
+    def readtext_batch(self, images: List, language: str = 'en', **options) -> List[List]:
+        """OCR several images; engines that can share batches override this"""
+        return [self.readtext(image, language, **options) for image in images]
+
+    def preload(self, languages: Sequence[str]):
+        """Load models for ``languages`` ahead of the first request"""
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'engine': self.name}
+
+
+# readtext options understood by the batched detect/recognize path
+_DETECT_OPTIONS = ('min_size', 'text_threshold', 'low_text', 'link_threshold', 'canvas_size', 'mag_ratio')
+_RECOGNIZE_DEFAULTS = {
+    'decoder': 'greedy',
+    'beamWidth': 5,
+    'batch_size': 1,
+    'workers': 0,
+    'contrast_ths': 0.1,
+    'adjust_contrast': 0.5,
+    'filter_ths': 0.003,
+    'y_ths': 0.5,
+    'x_ths': 1.0,
+    'detail': 1,
+    'paragraph': False
+}
+
+# Crops recognized per forward pass when batching across images
+RECOGNITION_BATCH_SIZE = 32
+
+
+def _recognize_batch(reader, images: List, options: Dict[str, Any]) -> List[List]:
+    """Detect per image, then recognize the text crops of all images in one pass
+
+    Mirrors ``Reader.readtext`` but feeds every crop to a single ``get_text``
+    call, so the recognizer runs full batches instead of one box at a time.
+    """
+    from easyocr.easyocr import imgH
+    from easyocr.recognition import get_text
+    from easyocr.utils import get_image_list, get_paragraph, reformat_input
+
+    opts = {**_RECOGNIZE_DEFAULTS, **options}
+    detect_kwargs = {k: opts[k] for k in _DETECT_OPTIONS if k in opts}
+    ignore_char = ''.join(set(reader.character) - set(reader.lang_char))
+
+    crops, counts, max_width = [], [], 0
+    for image in images:
+        img, img_cv_grey = reformat_input(image)
+        horizontal_list, free_list = reader.detect(img, reformat=False, **detect_kwargs)
+        image_list, width = get_image_list(horizontal_list[0], free_list[0], img_cv_grey, model_height=imgH)
+        crops.extend(image_list)
+        counts.append(len(image_list))
+        max_width = max(max_width, width)
+
+    recognized = []
+    if crops:
+        recognized = get_text(
+            reader.character, imgH, int(max_width), reader.recognizer, reader.converter, crops,
+            ignore_char, opts['decoder'], opts['beamWidth'], max(opts['batch_size'], RECOGNITION_BATCH_SIZE),
+            opts['contrast_ths'], opts['adjust_contrast'], opts['filter_ths'], opts['workers'], reader.device
+        )
+
+    # Split the flat recognition output back per image
+    batch_results, offset = [], 0
+    for count in counts:
+        result = recognized[offset:offset + count]
+        offset += count
+        if opts['paragraph']:
+            result = get_paragraph(result, x_ths=opts['x_ths'], y_ths=opts['y_ths'])
+        if opts['detail'] == 0:
+            result = [item[1] for item in result]
+        batch_results.append(result)
+    return batch_results
+
+
+class EasyOCREngine(OCREngine):
+    """EasyOCR readers from a memory-budgeted ``ReaderPool``"""
+
+    name = 'easyocr'
+
+    def __init__(self, readers: ReaderPool):
+        self.readers = readers
+
+    def readtext(self, image, language: str = 'en', **options) -> List:
+        return self.readers.get(language).readtext(image, **options)
+
+    def readtext_batch(self, images: List, language: str = 'en', **options) -> List[List]:
+        reader = self.readers.get(language)
+        unsupported = set(options) - set(_DETECT_OPTIONS) - set(_RECOGNIZE_DEFAULTS)
+        if len(images) > 1 and not unsupported:
+            try:
+                return _recognize_batch(reader, images, options)
+            except (ImportError, AttributeError, TypeError) as e:
+                # EasyOCR internals differ from the version this was written against
+                logger.warning(f"Batched recognition unavailable, using readtext per image: {e}")
+        return [reader.readtext(image, **options) for image in images]
+
+    def preload(self, languages: Sequence[str]):
+        for language in languages:
+            self.readers.get(language)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'engine': self.name, 'readers': self.readers.get_stats()}
+
+
+class OnnxModule:
+    """Stand-in for an EasyOCR torch module backed by an ONNX Runtime session
+
+    EasyOCR only calls its detector and recognizer (plus ``eval``/``to``),
+    so wrapping a session with the same call signature is enough to run the
+    stock pre- and post-processing around exported models.
+    """
+
+    def __init__(self, path: str, threads: Optional[int] = None):
+        import onnxruntime as ort
+
+        session_options = ort.SessionOptions()
+        if threads:
+            session_options.intra_op_num_threads = threads
+        self.path = path
+        self.session = ort.InferenceSession(path, session_options, providers=['CPUExecutionProvider'])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.nbytes = os.path.getsize(path)
+
+    def __call__(self, *args):
+        import torch
+
+        # Unused inputs (the CRNN's text argument) are pruned from the graph
+        feeds = {name: arg.detach().cpu().numpy() for name, arg in zip(self.input_names, args)}
+        outputs = [torch.from_numpy(output) for output in self.session.run(None, feeds)]
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
+
+    def eval(self):
+        return self
+
+    def to(self, device):
+        return self
+
+
+def onnx_model_path(model_dir: str, model: str, quantized: bool = False) -> str:
+    """Path of an exported model: ``craft`` or ``recognizer_<language>``"""
+    return str(Path(model_dir) / f"{model}{'.int8' if quantized else ''}.onnx")
+
+
+class ONNXEngine(EasyOCREngine):
+    """EasyOCR pipeline running exported ONNX detector and recognizer models"""
+
+    name = 'onnx'
+
+    def __init__(
+        self,
+        model_dir: str,
+        quantized: bool = False,
+        threads: Optional[int] = None,
+        memory_budget_mb: int = 2048,
+        pinned_languages: Sequence[str] = ('en',),
+        hot_languages: int = 0
+    ):
+        """Create the engine
+
+        Args:
+            model_dir: Directory written by ``scripts/export_easyocr_onnx.py``
+            quantized: Use the int8-quantized models
+            threads: ONNX Runtime intra-op threads per session
+            memory_budget_mb: Per-process budget for loaded models
+            pinned_languages: Languages never evicted
+            hot_languages: Most requested languages also never evicted
+        """
+        self.model_dir = model_dir
+        self.quantized = quantized
+        self.threads = threads
+        super().__init__(ReaderPool(
+            use_gpu=False,
+            memory_budget_mb=memory_budget_mb,
+            pinned_languages=pinned_languages,
+            reader_factory=self._create_reader,
+            hot_languages=hot_languages
+        ))
+
+    def _create_reader(self, language: str, use_gpu: bool, with_detector: bool):
+        """Build an EasyOCR reader and swap its torch models for ONNX sessions"""
+        recognizer_path = onnx_model_path(self.model_dir, f"recognizer_{language}", self.quantized)
+        if not os.path.exists(recognizer_path):
+            raise FileNotFoundError(f"No exported ONNX recognizer for '{language}' at {recognizer_path}")
+
+        reader = _create_easyocr_reader(language, False, with_detector)
+        if with_detector:
+            reader.detector = OnnxModule(onnx_model_path(self.model_dir, 'craft', self.quantized), self.threads)
+        reader.recognizer = OnnxModule(recognizer_path, self.threads)
+        return reader
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**super().get_stats(), 'model_dir': self.model_dir, 'quantized': self.quantized}
+
+
+# EasyOCR language codes -> Tesseract traineddata names
+TESSERACT_LANGUAGES = {
+    'en': 'eng', 'hi': 'hin', 'ta': 'tam', 'te': 'tel', 'kn': 'kan', 'mr': 'mar', 'bn': 'ben',
+    'de': 'deu', 'fr': 'fra', 'es': 'spa', 'pt': 'por', 'ru': 'rus',
+    'zh': 'chi_sim', 'ja': 'jpn', 'ko': 'kor'
+}
+
+
+class TesseractEngine(OCREngine):
+    """Tesseract LSTM engine through pytesseract"""
+
+    name = 'tesseract'
+
+    def __init__(self, config: str = '--oem 1 --psm 3'):
+        import pytesseract
+
+        self.pytesseract = pytesseract
+        self.config = config
+        self._stats = {'calls': 0, 'ocr_time': 0.0}
+
+    @staticmethod
+    def _to_image(image) -> Image.Image:
+        if isinstance(image, Image.Image):
+            return image
+        if isinstance(image, np.ndarray):
+            return Image.fromarray(image)
+        if isinstance(image, bytes):
+            return Image.open(BytesIO(image))
+        return Image.open(image)
+
+    def readtext(self, image, language: str = 'en', detail: int = 1, paragraph: bool = False, **options) -> List:
+        start_time = time.time()
+        data = self.pytesseract.image_to_data(
+            self._to_image(image),
+            lang=TESSERACT_LANGUAGES.get(language, 'eng'),
+            config=self.config,
+            output_type=self.pytesseract.Output.DICT
+        )
+
+        # Group words into lines (or paragraphs), like EasyOCR's text boxes
+        groups: Dict[tuple, Dict[str, Any]] = {}
+        for i, word in enumerate(data['text']):
+            if not word.strip():
+                continue
+            key = (data['block_num'][i], data['par_num'][i]) if paragraph else \
+                (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
+            group = groups.setdefault(key, {'words': [], 'confs': [], 'box': [x, y, x + w, y + h]})
+            group['words'].append(word)
+            if float(data['conf'][i]) >= 0:
+                group['confs'].append(float(data['conf'][i]) / 100)
+            box = group['box']
+            box[0], box[1] = min(box[0], x), min(box[1], y)
+            box[2], box[3] = max(box[2], x + w), max(box[3], y + h)
+
+        results = []
+        for group in groups.values():
+            x0, y0, x1, y1 = group['box']
+            bbox = [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+            text = ' '.join(group['words'])
+            if paragraph:
+                results.append([bbox, text])
+            else:
+                confidence = sum(group['confs']) / len(group['confs']) if group['confs'] else 0.0
+                results.append((bbox, text, confidence))
+
+        self._stats['calls'] += 1
+        self._stats['ocr_time'] += time.time() - start_time
+        if detail == 0:
+            return [result[1] for result in results]
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'engine': self.name, 'config': self.config, **self._stats}
+
+
+def create_engine(
+    name: str,
+    use_gpu: bool = False,
+    readers: Optional[ReaderPool] = None,
+    **options
+) -> OCREngine:
+    """Factory function to build an OCR engine
+
+    Args:
+        name: One of ``ENGINE_NAMES``
+        use_gpu: GPU acceleration for EasyOCR
+        readers: Existing EasyOCR reader pool to reuse
+        **options: Engine-specific keyword arguments (e.g. ``model_dir`` for onnx,
+            ``config`` for tesseract)
+    """
+    name = name.lower()
+    if name == 'easyocr':
+        return EasyOCREngine(readers or ReaderPool(use_gpu=use_gpu))
+    elif name == 'onnx':
+        return ONNXEngine(**options)
+    elif name == 'tesseract':
+        return TesseractEngine(**options)
+    else:
+        raise ValueError(f"Unsupported OCR engine: {name}")
@@ -0,0 +1,337 @@
+"""
+Process-pool OCR engine
+
+Runs EasyOCR recognition in worker processes so that concurrent certificate
+uploads are spread across CPU cores instead of contending for the GIL and for
+torch threads inside a single API process. Each worker loads its readers once
+and keeps them for its lifetime; callers queue through a bounded number of
+in-flight slots, and a crashed worker pool is rebuilt transparently.
+
+Readers inside a worker are held in memory-budgeted ``ReaderPool``s (one for
+EasyOCR, one per engine that loads its own models, e.g. ONNX); each result
+carries the stats of every pool in the worker so the parent can report
+per-worker and per-engine load and eviction counts. Jobs name the OCR engine to run (see
+``ocr_engines``); workers build each engine the first time it is asked for.
+"""
+import os
+import time
+import asyncio
+import logging
+import functools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from services.ocr_engines import OCREngine, create_engine
+from services.ocr_readers import ReaderPool
+
+logger = logging.getLogger(__name__)
+
+# Per-process state, populated inside each pool worker
+_worker_readers: Optional[ReaderPool] = None
+_worker_engines: Dict[str, OCREngine] = {}
+_worker_engine_options: Dict[str, Dict[str, Any]] = {}
+
+
+def _init_worker(
+    use_gpu: bool,
+    preload_languages: Sequence[str],
+    torch_threads: int,
+    reader_memory_mb: int = 2048,
+    pinned_languages: Sequence[str] = ('en',),
+    engine_options: Optional[Dict[str, Dict[str, Any]]] = None,
+    preload_engine: str = 'easyocr',
+    hot_languages: int = 0
+):
+    """Pool initializer: pin torch threads and load the preloaded readers once"""
+    global _worker_readers, _worker_engine_options
+    _worker_readers = ReaderPool(
+        use_gpu=use_gpu,
+        memory_budget_mb=reader_memory_mb,
+        pinned_languages=pinned_languages,
+        hot_languages=hot_languages
+    )
+    _worker_engine_options = engine_options or {}
+
+    try:
+        import torch
+        # Workers run side by side, so each one gets its share of the cores
+        torch.set_num_threads(torch_threads)
+    except Exception as e:
+        logger.debug(f"Could not set torch threads in OCR worker: {e}")
+
+    try:
+        _get_worker_engine(preload_engine).preload(preload_languages)
+    except Exception as e:
+        logger.error(f"Could not preload the {preload_engine} OCR engine: {e}")
+
+
+def _get_worker_engine(name: str = 'easyocr') -> OCREngine:
+    """Get or build an OCR engine inside the current worker process"""
+    global _worker_readers
+    engine = _worker_engines.get(name)
+    if engine is None:
+        if _worker_readers is None:
+            _worker_readers = ReaderPool()
+        engine = create_engine(
+            name,
+            use_gpu=_worker_readers.use_gpu,
+            readers=_worker_readers,
+            **_worker_engine_options.get(name, {})
+        )
+        _worker_engines[name] = engine
+    return engine
+
+
+def _worker_reader_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every reader pool in this worker, keyed by engine name"""
+    stats = {}
+    if _worker_readers is not None:
+        stats['easyocr'] = _worker_readers.get_stats()
+    for name, engine in _worker_engines.items():
+        readers = getattr(engine, 'readers', None)
+        if readers is not None and readers is not _worker_readers:
+            stats[name] = readers.get_stats()
+    return stats
+
+
+def _worker_result(results, start_time: float, **extra) -> Dict[str, Any]:
+    """Package worker output with timing and the worker's reader stats"""
+    return {
+        'results': results,
+        'pid': os.getpid(),
+        'ocr_time': time.time() - start_time,
+        'reader_stats': _worker_reader_stats(),
+        **extra
+    }
+
+
+def _worker_readtext(image, language: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run ``readtext`` with the requested engine inside a worker process"""
+    options = dict(options)
+    engine = _get_worker_engine(options.pop('engine', 'easyocr'))
+    start_time = time.time()
+    results = engine.readtext(image, language, **options)
+    return _worker_result(results, start_time, engine=engine.name)
+
+
+def _worker_readtext_batch(images: List, language: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run OCR for several images with shared recognition batches"""
+    options = dict(options)
+    engine = _get_worker_engine(options.pop('engine', 'easyocr'))
+    start_time = time.time()
+    results = engine.readtext_batch(images, language, **options)
+    return _worker_result(results, start_time, engine=engine.name)
+
+
+class OCRProcessPool:
+    """Bounded process pool that owns the EasyOCR readers"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        use_gpu: bool = False,
+        preload_languages: Sequence[str] = ('en',),
+        max_retries: int = 1,
+        reader_memory_mb: int = 2048,
+        pinned_languages: Sequence[str] = ('en',),
+        engine_options: Optional[Dict[str, Dict[str, Any]]] = None,
+        preload_engine: str = 'easyocr',
+        hot_languages: int = 0
+    ):
+        """Create the pool (worker processes start on first use)
+
+        Args:
+            max_workers: Number of worker processes (default: one per CPU core)
+            max_pending: Maximum jobs in flight before callers wait (default: 2x workers)
+            use_gpu: Whether workers should use GPU acceleration
+            preload_languages: Languages every worker loads at startup
+            max_retries: How many times a job is retried after a worker crash
+            reader_memory_mb: Per-worker memory budget for language readers
+            pinned_languages: Languages a worker never evicts
+            engine_options: Per-engine keyword arguments for ``create_engine``
+            preload_engine: Engine whose models workers load at startup
+            hot_languages: How many of a worker's most requested languages it never evicts
+        """
+        cpu_count = os.cpu_count() or 1
+
+        # A single worker owns the GPU; several would each load the models into VRAM
+        if use_gpu:
+            max_workers = 1
+
+        self.max_workers = max_workers or cpu_count
+        self.max_pending = max_pending or self.max_workers * 2
+        self.use_gpu = use_gpu
+        self.preload_languages = tuple(preload_languages)
+        self.max_retries = max_retries
+        self.reader_memory_mb = reader_memory_mb
+        self.pinned_languages = tuple(pinned_languages)
+        self.engine_options = engine_options or {}
+        self.preload_engine = preload_engine
+        self.hot_languages = hot_languages
+        self.torch_threads = max(1, cpu_count // self.max_workers)
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'restarts': 0
+        }
+        self._active = 0
+        # Latest reader stats reported by each worker, keyed by pid, then engine
+        self._worker_stats: Dict[int, Dict[str, Dict[str, Any]]] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Get the live executor, creating it if needed"""
+        with self._lock:
+            if self._executor is None:
+                logger.info(f"Starting OCR process pool ({self.max_workers} workers)")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    # spawn keeps torch/OpenMP state out of the children
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(
+                        self.use_gpu,
+                        self.preload_languages,
+                        self.torch_threads,
+                        self.reader_memory_mb,
+                        self.pinned_languages,
+                        self.engine_options,
+                        self.preload_engine,
+                        self.hot_languages
+                    )
+                )
+            return self._executor
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """Replace a broken executor (only once if several callers notice)"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            logger.warning("OCR worker crashed, restarting process pool")
+            try:
+                broken.shutdown(wait=False, cancel_futures=True)
+            except Exception as e:
+                logger.debug(f"Error shutting down broken OCR pool: {e}")
+            self._executor = None
+            self._worker_stats.clear()
+            self._stats['restarts'] += 1
+
+    def start(self):
+        """Spawn the workers now instead of on the first job
+
+        Blocks until every worker has run its initializer (and so loaded the
+        preloaded readers).
+        """
+        executor = self._get_executor()
+        futures = [executor.submit(os.getpid) for _ in range(self.max_workers)]
+        pids = {future.result() for future in futures}
+        logger.info(f"✅ OCR process pool warm ({len(pids)} workers)")
+
+    @property
+    def idle_workers(self) -> int:
+        """Workers not currently running a job"""
+        return max(0, self.max_workers - self._active)
+
+    def run(self, fn: Callable, *args) -> Any:
+        """Run a module-level function in a worker, blocking until it finishes
+
+        Waits for a free slot first, so at most ``max_pending`` jobs are queued
+        in the pool. A job whose worker dies is retried on a fresh pool.
+        """
+        with self._slots:
+            self._count('submitted')
+            for attempt in range(self.max_retries + 1):
+                executor = self._get_executor()
+                with self._lock:
+                    self._active += 1
+                try:
+                    result = executor.submit(fn, *args).result()
+                    with self._lock:
+                        self._stats['completed'] += 1
+                        if isinstance(result, dict) and result.get('reader_stats'):
+                            self._worker_stats[result['pid']] = result['reader_stats']
+                    return result
+                except BrokenProcessPool:
+                    self._restart(executor)
+                    if attempt >= self.max_retries:
+                        self._count('failed')
+                        raise RuntimeError("OCR worker process crashed")
+                except Exception:
+                    self._count('failed')
+                    raise
+                finally:
+                    with self._lock:
+                        self._active -= 1
+
+    def _count(self, name: str):
+        """Increment a job counter (``run`` is called from many threads)"""
+        with self._lock:
+            self._stats[name] += 1
+
+    async def run_async(self, fn: Callable, *args) -> Any:
+        """Async variant of :meth:`run` that does not block the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(
+            None,
+            functools.partial(self.run, fn, *args)
+        )
+
+    def readtext(self, image, language: str = 'en', **options) -> List:
+        """Run ``readtext`` for ``language`` in a worker process (``engine`` option picks the engine)"""
+        return self.run(_worker_readtext, image, language, options)['results']
+
+    async def readtext_async(self, image, language: str = 'en', **options) -> List:
+        """Async variant of :meth:`readtext`"""
+        result = await self.run_async(_worker_readtext, image, language, options)
+        return result['results']
+
+    def readtext_batch(self, images: List, language: str = 'en', **options) -> List[List]:
+        """Run OCR for several images in one worker, batching recognition"""
+        return self.run(_worker_readtext_batch, images, language, options)['results']
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool sizing, job counters and reader memory per worker and engine"""
+        with self._lock:
+            workers = dict(self._worker_stats)
+            counters = dict(self._stats)
+        pools = [stats for engines in workers.values() for stats in engines.values()]
+        engines: Dict[str, Dict[str, Any]] = {}
+        for worker_engines in workers.values():
+            for name, stats in worker_engines.items():
+                totals = engines.setdefault(name, {'loads': 0, 'evictions': 0, 'memory_bytes': 0, 'hot_languages': {}})
+                totals['loads'] += stats['loads']
+                totals['evictions'] += stats['evictions']
+                totals['memory_bytes'] += stats['memory_bytes']
+                for language in stats.get('hot_languages', []):
+                    totals['hot_languages'][language] = totals['hot_languages'].get(language, 0) + 1
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'running': self._executor is not None,
+            'active': self._active,
+            **counters,
+            'readers': {
+                'budget_mb_per_worker': self.reader_memory_mb,
+                'pinned_languages': list(self.pinned_languages),
+                'hot_languages_per_worker': self.hot_languages,
+                'loads': sum(p['loads'] for p in pools),
+                'evictions': sum(p['evictions'] for p in pools),
+                'memory_bytes': sum(p['memory_bytes'] for p in pools),
+                'engines': engines,
+                'workers': workers
+            }
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop all worker processes"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
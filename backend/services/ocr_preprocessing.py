@@ -0,0 +1,211 @@
+"""
+Vectorized image preprocessing for OCR
+
+NumPy implementation of the certificate preprocessing pipeline. Every
+per-pixel step is expressed as a 256-entry lookup table or a sliced array
+operation, and consecutive point operations are folded into a single table,
+so a page is copied as few times as possible after decoding.
+
+The default ``'legacy'`` mode reproduces the original PIL pipeline
+(equalize -> threshold at 128 -> SHARPEN -> threshold at 150) bit for bit.
+Sharpening a binary image with PIL's SHARPEN kernel and re-thresholding at
+150 never changes a pixel (a white centre stays >= 255, a black centre
+stays <= 0), so that mode collapses to one equalize+threshold table.
+"""
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+ImageInput = Union[str, Path, bytes, BinaryIO, np.ndarray, Image.Image]
+
+THRESHOLD_MODES = ('legacy', 'otsu', 'adaptive', None)
+
+
+def load_grayscale(image_data: ImageInput) -> Image.Image:
+    """Decode any supported image input into an 8-bit grayscale PIL image"""
+    if isinstance(image_data, (str, Path)):
+        img = Image.open(image_data)
+    elif isinstance(image_data, bytes):
+        img = Image.open(BytesIO(image_data))
+    elif hasattr(image_data, 'read'):  # File-like object
+        img = Image.open(image_data)
+    elif isinstance(image_data, np.ndarray):
+        img = Image.fromarray(image_data)
+    elif isinstance(image_data, Image.Image):
+        img = image_data
+    else:
+        raise ValueError("Unsupported image data type")
+
+    return img if img.mode == 'L' else img.convert('L')
+
+
+def _is_gray_array(image_data) -> bool:
+    return isinstance(image_data, np.ndarray) and image_data.ndim == 2 and image_data.dtype == np.uint8
+
+
+def resize_to_max(img: Image.Image, max_dim: Optional[int]) -> Image.Image:
+    """Downscale so the longest side is at most ``max_dim`` (aspect ratio kept)"""
+    if max_dim and max(img.size) > max_dim:
+        ratio = max_dim / max(img.size)
+        new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
+        img = img.resize(new_size, Image.LANCZOS)
+    return img
+
+
+def histogram(gray: np.ndarray) -> np.ndarray:
+    """256-bin histogram of an 8-bit image"""
+    return np.bincount(gray.ravel(), minlength=256)
+
+
+def equalize_lut(hist: np.ndarray) -> np.ndarray:
+    """Histogram equalization lookup table, identical to ``PIL.ImageOps.equalize``"""
+    used = hist[hist > 0]
+    if len(used) <= 1:
+        return np.arange(256, dtype=np.uint8)
+
+    step = (int(used.sum()) - int(used[-1])) // 255
+    if not step:
+        return np.arange(256, dtype=np.uint8)
+
+    # PIL walks the histogram with n starting at step // 2 and emits n // step
+    cumulative = np.concatenate(([0], np.cumsum(hist[:-1], dtype=np.int64)))
+    lut = (step // 2 + cumulative) // step
+    return np.minimum(lut, 255).astype(np.uint8)
+
+
+def otsu_threshold(hist: np.ndarray) -> int:
+    """Otsu's threshold for a 256-bin histogram (pixels > threshold are foreground)"""
+    hist = hist.astype(np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 127
+
+    levels = np.arange(256, dtype=np.float64)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    mass_bg = np.cumsum(hist * levels)
+    mean_bg = np.divide(mass_bg, weight_bg, out=np.zeros(256), where=weight_bg > 0)
+    mean_fg = np.divide(mass_bg[-1] - mass_bg, weight_fg, out=np.zeros(256), where=weight_fg > 0)
+
+    between_class = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between_class))
+
+
+def apply_lut(gray: np.ndarray, lut: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Map every pixel through ``lut``, writing into ``out`` when given"""
+    return np.take(lut, gray, out=out)
+
+
+def adaptive_threshold(
+    gray: np.ndarray,
+    block_size: int = 31,
+    offset: int = 10,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Local-mean thresholding using an integral image
+
+    A pixel becomes white when it is brighter than the mean of its
+    ``block_size`` x ``block_size`` neighbourhood minus ``offset``, which
+    copes with shadows and uneven lighting in phone photos.
+    """
+    height, width = gray.shape
+    radius = block_size // 2
+
+    integral = np.zeros((height + 1, width + 1), dtype=np.int64)
+    np.cumsum(gray, axis=0, out=integral[1:, 1:])
+    np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+
+    y0 = np.clip(np.arange(height) - radius, 0, height)
+    y1 = np.clip(np.arange(height) + radius + 1, 0, height)
+    x0 = np.clip(np.arange(width) - radius, 0, width)
+    x1 = np.clip(np.arange(width) + radius + 1, 0, width)
+
+    window_sum = (
+        integral[np.ix_(y1, x1)] - integral[np.ix_(y0, x1)]
+        - integral[np.ix_(y1, x0)] + integral[np.ix_(y0, x0)]
+    )
+    window_area = np.outer(y1 - y0, x1 - x0)
+
+    # gray > sum / area - offset, kept in integers
+    mask = gray.astype(np.int64) * window_area > window_sum - offset * window_area
+    if out is None:
+        out = np.empty_like(gray)
+    np.multiply(mask, 255, out=out, casting='unsafe')
+    return out
+
+
+def sharpen(gray: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Convolve with PIL's SHARPEN kernel (centre 32, neighbours -2, scale 16)
+
+    Border pixels are copied unchanged, as PIL does.
+    """
+    acc = gray.astype(np.int16) * 32
+    acc_inner = acc[1:-1, 1:-1]
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if dy == 1 and dx == 1:
+                continue
+            acc_inner -= 2 * gray[dy:dy + acc_inner.shape[0], dx:dx + acc_inner.shape[1]].astype(np.int16)
+
+    if out is None:
+        out = np.empty_like(gray)
+    out[...] = gray
+    np.clip((acc_inner + 8) // 16, 0, 255, out=acc_inner)
+    out[1:-1, 1:-1] = acc_inner
+    return out
+
+
+def preprocess_image(
+    image_data: ImageInput,
+    max_dim: Optional[int] = 2000,
+    threshold: Optional[str] = 'legacy',
+    sharpen_image: bool = False,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Prepare an image for OCR
+
+    Args:
+        image_data: Image file path, bytes, file-like object, numpy array or PIL image.
+            A 2-D uint8 array that needs no resizing is read in place.
+        max_dim: Maximum width/height after resizing (None to keep the size)
+        threshold: 'legacy' (equalize, then binarize at 128 like the original
+            pipeline), 'otsu' (equalize, then Otsu's global threshold),
+            'adaptive' (integral-image local mean) or None for grayscale
+        sharpen_image: Apply the SHARPEN convolution (only meaningful for
+            grayscale output; binarized images are unaffected by it)
+        out: Optional preallocated uint8 buffer of the output shape to reuse
+
+    Returns:
+        Preprocessed 8-bit image as numpy array
+    """
+    if threshold not in THRESHOLD_MODES:
+        raise ValueError(f"Unknown threshold mode: {threshold}")
+
+    if _is_gray_array(image_data) and not (max_dim and max(image_data.shape) > max_dim):
+        # Already 8-bit grayscale at size (e.g. a PDF pixmap view): use it without copying
+        gray = image_data
+    else:
+        gray = np.asarray(resize_to_max(load_grayscale(image_data), max_dim))
+
+    if out is not None and out.shape != gray.shape:
+        out = None
+
+    if threshold == 'adaptive':
+        return adaptive_threshold(gray, out=out)
+
+    hist = histogram(gray)
+    lut = equalize_lut(hist)
+
+    if threshold == 'legacy':
+        lut = np.where(lut > 128, 255, 0).astype(np.uint8)
+    elif threshold == 'otsu':
+        cutoff = otsu_threshold(np.bincount(lut, weights=hist, minlength=256))
+        lut = np.where(lut > cutoff, 255, 0).astype(np.uint8)
+
+    result = apply_lut(gray, lut, out=out)
+    if sharpen_image and threshold is None:
+        result = sharpen(result, out=result)
+    return result
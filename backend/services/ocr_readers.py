@@ -0,0 +1,190 @@
+"""
+Memory-budgeted pool of EasyOCR language readers
+
+Each ``easyocr.Reader`` holds hundreds of MB of model weights, so a worker
+that has seen Tamil, Hindi, Telugu and Chinese uploads would otherwise keep
+every model forever. The pool keeps readers under a configurable memory
+budget, evicting the least recently used unpinned language first, and shares
+a single CRAFT text detector between all readers since the detector is
+language independent. Besides the configured pinned languages, the most
+requested languages in the worker's traffic stay resident too, so a Tamil-
+heavy deployment keeps Tamil loaded without pinning it by hand.
+"""
+import gc
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def _module_bytes(module) -> int:
+    """Size of a torch module's parameters and buffers in bytes"""
+    if module is None:
+        return 0
+    if hasattr(module, 'nbytes'):  # ONNX Runtime stand-ins report their model size
+        return module.nbytes
+    try:
+        tensors = list(module.parameters()) + list(module.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        return 0
+
+
+def _create_easyocr_reader(language: str, use_gpu: bool, with_detector: bool):
+    """Default reader factory"""
+    import easyocr
+
+    return easyocr.Reader(
+        [language],
+        gpu=use_gpu,
+        verbose=False,
+        download_enabled=True,
+        detector=with_detector
+    )
+
+
+class ReaderPool:
+    """LRU cache of language readers bounded by estimated model memory"""
+
+    def __init__(
+        self,
+        use_gpu: bool = False,
+        memory_budget_mb: int = 2048,
+        pinned_languages: Sequence[str] = ('en',),
+        reader_factory: Optional[Callable[[str, bool, bool], Any]] = None,
+        hot_languages: int = 0
+    ):
+        """Create the pool
+
+        Args:
+            use_gpu: Whether readers should use GPU acceleration
+            memory_budget_mb: Budget for recognizer weights plus the shared detector
+            pinned_languages: Languages that are never evicted
+            reader_factory: Callable(language, use_gpu, with_detector) building a reader
+            hot_languages: How many of the most requested languages are also never evicted
+        """
+        self.use_gpu = use_gpu
+        self.budget_bytes = memory_budget_mb * 1024 * 1024
+        self.pinned = set(pinned_languages)
+        self.hot_languages = hot_languages
+        self._factory = reader_factory or _create_easyocr_reader
+
+        self._readers: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._detector = None
+        self._detector_bytes = 0
+        self._lock = threading.RLock()
+        self._stats = {'loads': 0, 'evictions': 0, 'load_failures': 0}
+        self._requests: Dict[str, int] = {}
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._detector_bytes + sum(self._sizes.values())
+
+    def hot(self) -> List[str]:
+        """The ``hot_languages`` most requested languages, most requested first"""
+        if self.hot_languages <= 0:
+            return []
+        ranked = sorted(self._requests, key=self._requests.get, reverse=True)
+        return ranked[:self.hot_languages]
+
+    def get(self, language: str = 'en'):
+        """Get the reader for ``language``, loading it (and evicting others) if needed
+
+        A language whose reader fails to load is served by the English reader;
+        the request then counts towards English only, so failed languages do
+        not climb the ``hot()`` ranking.
+        """
+        with self._lock:
+            try:
+                reader = self._resident(language)
+            except Exception as e:
+                self._stats['load_failures'] += 1
+                if language == 'en':
+                    raise
+                logger.error(f"Failed to initialize {language} reader: {e}")
+                logger.warning(f"Falling back to English reader for {language}")
+                language = 'en'
+                reader = self._resident(language)
+
+            self._requests[language] = self._requests.get(language, 0) + 1
+            return reader
+
+    def _resident(self, language: str):
+        """The loaded reader for ``language``, loading it (and evicting others) if needed"""
+        reader = self._readers.get(language)
+        if reader is not None:
+            self._readers.move_to_end(language)
+            return reader
+
+        reader = self._load(language)
+        self._readers[language] = reader
+        self._evict(keep=language)
+        return reader
+
+    def _load(self, language: str):
+        """Build a reader, reusing the shared detector when one exists"""
+        logger.info(f"[pid {os.getpid()}] Loading '{language}' OCR reader...")
+        reader = self._factory(language, self.use_gpu, self._detector is None)
+
+        if self._detector is None:
+            self._detector = getattr(reader, 'detector', None)
+            self._detector_bytes = _module_bytes(self._detector)
+        else:
+            reader.detector = self._detector
+
+        self._sizes[language] = _module_bytes(getattr(reader, 'recognizer', None))
+        self._stats['loads'] += 1
+        logger.info(
+            f"[pid {os.getpid()}] Loaded '{language}' reader "
+            f"({self._sizes[language] / 1e6:.0f} MB, pool {self.memory_bytes / 1e6:.0f} MB)"
+        )
+        return reader
+
+    def _evict(self, keep: str):
+        """Drop least recently used unpinned readers until under budget"""
+        evicted = False
+        protected = self.pinned.union(self.hot(), [keep])
+        for language in list(self._readers):
+            if self.memory_bytes <= self.budget_bytes:
+                break
+            if language in protected:
+                continue
+            del self._readers[language]
+            self._sizes.pop(language, None)
+            self._stats['evictions'] += 1
+            evicted = True
+            logger.info(f"[pid {os.getpid()}] Evicted '{language}' OCR reader")
+
+        if self.memory_bytes > self.budget_bytes:
+            logger.warning(
+                f"OCR readers use {self.memory_bytes / 1e6:.0f} MB, over the "
+                f"{self.budget_bytes / 1e6:.0f} MB budget (remaining readers are pinned, hot or in use)"
+            )
+
+        if evicted:
+            gc.collect()
+            if self.use_gpu:
+                try:
+                    import torch
+                    torch.cuda.empty_cache()
+                except Exception:
+                    pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get load/evict counters and per-language memory"""
+        with self._lock:
+            return {
+                **self._stats,
+                'loaded_languages': list(self._readers),
+                'pinned_languages': sorted(self.pinned),
+                'hot_languages': self.hot(),
+                'memory_bytes': self.memory_bytes,
+                'budget_bytes': self.budget_bytes,
+                'detector_bytes': self._detector_bytes,
+                'reader_bytes': dict(self._sizes),
+                'requests': dict(self._requests)
+            }
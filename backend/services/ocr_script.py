@@ -0,0 +1,166 @@
+"""
+Cheap script detection for picking the OCR reader
+
+Running every language reader over a page to see which one fits is far too
+slow. Instead a small, text-dense strip of the page is read with the English
+reader (always loaded); if that Latin pass is confident the page is Latin
+script. Otherwise each candidate script's reader probes the same strip and
+the Unicode blocks of what it reads decide: a reader that recognizes its own
+script with good confidence wins. Only the chosen reader then runs on the
+full page.
+"""
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from services.ocr_preprocessing import histogram, otsu_threshold
+
+# Unicode code point ranges per script
+SCRIPT_RANGES: Dict[str, List[Tuple[int, int]]] = {
+    'latin': [(0x0041, 0x005A), (0x0061, 0x007A), (0x00C0, 0x024F)],
+    'devanagari': [(0x0900, 0x097F)],
+    'bengali': [(0x0980, 0x09FF)],
+    'tamil': [(0x0B80, 0x0BFF)],
+    'telugu': [(0x0C00, 0x0C7F)],
+    'kannada': [(0x0C80, 0x0CFF)],
+    'cyrillic': [(0x0400, 0x04FF)],
+    'han': [(0x4E00, 0x9FFF), (0x3400, 0x4DBF)],
+    'kana': [(0x3040, 0x30FF)],
+    'hangul': [(0xAC00, 0xD7AF), (0x1100, 0x11FF)],
+}
+
+# Script of each supported reader language
+LANGUAGE_SCRIPTS: Dict[str, str] = {
+    'en': 'latin', 'de': 'latin', 'fr': 'latin', 'es': 'latin', 'pt': 'latin',
+    'hi': 'devanagari', 'mr': 'devanagari',
+    'bn': 'bengali',
+    'ta': 'tamil',
+    'te': 'telugu',
+    'kn': 'kannada',
+    'ru': 'cyrillic',
+    'zh': 'han',
+    'ja': 'kana',
+    'ko': 'hangul',
+}
+
+# Japanese pages mix kana with kanji; both count for the Japanese reader
+_SCRIPT_ALIASES = {'kana': {'kana', 'han'}}
+
+# Longest side of the strip read by the detection passes
+SAMPLE_MAX_WIDTH = 1280
+
+
+def char_script(char: str) -> Optional[str]:
+    """Script of a single character, or None for digits, punctuation and spaces"""
+    code = ord(char)
+    for script, ranges in SCRIPT_RANGES.items():
+        if any(start <= code <= end for start, end in ranges):
+            return script
+    return None
+
+
+def script_histogram(text: str) -> Dict[str, int]:
+    """Count letters per script"""
+    counts: Dict[str, int] = {}
+    for char in text:
+        if not unicodedata.category(char).startswith(('L', 'M')):
+            continue
+        script = char_script(char)
+        if script is not None:
+            counts[script] = counts.get(script, 0) + 1
+    return counts
+
+
+def dominant_script(text: str) -> Optional[Tuple[str, float]]:
+    """Most frequent script in the text and its share of letters"""
+    counts = script_histogram(text)
+    if not counts:
+        return None
+    script = max(counts, key=counts.get)
+    return script, counts[script] / sum(counts.values())
+
+
+def probe_score(results: Sequence, language: str) -> float:
+    """Score a probe pass: mean confidence times the share of letters in the reader's own script
+
+    Args:
+        results: ``readtext(detail=1)`` output, (bbox, text, confidence) tuples
+        language: Language of the reader that produced the results
+    """
+    if not results:
+        return 0.0
+    script = LANGUAGE_SCRIPTS.get(language, 'latin')
+    own = _SCRIPT_ALIASES.get(script, {script})
+
+    counts = script_histogram(''.join(text for _, text, _ in results))
+    letters = sum(counts.values())
+    if not letters:
+        return 0.0
+    own_share = sum(count for name, count in counts.items() if name in own) / letters
+    confidence = sum(float(conf) for _, _, conf in results) / len(results)
+    return confidence * own_share
+
+
+def choose_language(script: str, requested: Optional[Sequence[str]] = None) -> str:
+    """First requested language written in ``script``, else that script's default reader"""
+    for language in requested or []:
+        if LANGUAGE_SCRIPTS.get(language) == script:
+            return language
+    for language, language_script in LANGUAGE_SCRIPTS.items():
+        if language_script == script:
+            return language
+    return 'en'
+
+
+def candidate_languages(requested: Optional[Sequence[str]], fallback: Sequence[str]) -> List[str]:
+    """One non-Latin probe language per script, from the request or the configured fallback"""
+    pool = [language for language in (requested or []) if LANGUAGE_SCRIPTS.get(language, 'latin') != 'latin']
+    if not pool:
+        pool = [language for language in fallback if LANGUAGE_SCRIPTS.get(language, 'latin') != 'latin']
+
+    seen, languages = set(), []
+    for language in pool:
+        script = LANGUAGE_SCRIPTS[language]
+        if script not in seen:
+            seen.add(script)
+            languages.append(language)
+    return languages
+
+
+def text_sample(image: np.ndarray, lines: int = 3) -> np.ndarray:
+    """Cut the most ink-dense band of rows (a few text lines) for the detection passes
+
+    The band height is estimated from the page's text line runs; the strip
+    is trimmed to its inked columns and downsampled to at most
+    ``SAMPLE_MAX_WIDTH`` wide.
+    """
+    gray = np.asarray(image)
+    if gray.ndim == 3:
+        gray = np.asarray(Image.fromarray(gray).convert('L'))
+
+    ink = gray <= otsu_threshold(histogram(gray))
+    row_ink = ink.mean(axis=1)
+
+    # Median text line height from runs of inked rows
+    active = np.concatenate(([0], (row_ink > 0.01).astype(np.int8), [0]))
+    edges = np.diff(active)
+    runs = np.nonzero(edges == -1)[0] - np.nonzero(edges == 1)[0]
+    line_height = int(np.median(runs)) if len(runs) else 32
+    band = int(min(gray.shape[0], max(32, line_height * 2 * lines)))
+
+    # Band with the most ink
+    cumulative = np.concatenate(([0.0], np.cumsum(row_ink)))
+    top = int(np.argmax(cumulative[band:] - cumulative[:-band])) if band < gray.shape[0] else 0
+    strip = gray[top:top + band]
+
+    cols = np.nonzero(ink[top:top + band].any(axis=0))[0]
+    if len(cols):
+        strip = strip[:, max(0, cols[0] - 8):cols[-1] + 9]
+
+    if strip.shape[1] > SAMPLE_MAX_WIDTH:
+        ratio = SAMPLE_MAX_WIDTH / strip.shape[1]
+        size = (SAMPLE_MAX_WIDTH, max(1, int(strip.shape[0] * ratio)))
+        strip = np.asarray(Image.fromarray(strip).resize(size, Image.BILINEAR))
+    return np.ascontiguousarray(strip)
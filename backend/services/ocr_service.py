@@ -6,21 +6,41 @@ multiple languages, confidence scoring, and advanced preprocessing.
 """
 import os
 import time
+import asyncio
 import logging
+import threading
 import numpy as np
-import fitz  # PyMuPDF
-from io import BytesIO
-from typing import Any, Dict, List, Tuple, Optional, Union, BinaryIO
+from typing import Any, AsyncGenerator, Dict, List, Tuple, Optional, Union, BinaryIO
 from pathlib import Path
-from PIL import Image, ImageEnhance, ImageFilter, ImageOps
-import easyocr
+from PIL import Image
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from services.ocr_pool import OCRProcessPool
+from services.ocr_batching import OCRBatchScheduler
+from services.ocr_cache import OCRResultCache, hash_content
+from services.ocr_crop import crop_document
+from services.ocr_preprocessing import preprocess_image
+from services.ocr_profiles import OCRProfile, resolve_profile
+from services.ocr_script import LANGUAGE_SCRIPTS, candidate_languages, choose_language, probe_score, text_sample
+from services.ocr_templates import HEADER_ZONE, box_area, box_contains, crop_zone, identify_layout, parse_fields
+from services.pdf_rasterizer import PDFRasterizer, extract_text_layer, page_count, render_page_gray
+from services.registry import service_registry
+from utils.config import settings
+
 logger = logging.getLogger(__name__)
 
 class OCRService:
     """Service for extracting text from certificate images and PDFs using OCR"""
     
+    # Minimum size and share of readable characters for a PDF text layer to replace OCR
+    PDF_TEXT_MIN_CHARS = 40
+    PDF_TEXT_MIN_QUALITY = 0.8
+    
+    # Script detection: a Latin probe scoring this high skips the other scripts;
+    # below the second threshold no probe read anything and English is kept
+    LATIN_MIN_SCORE = 0.5
+    SCRIPT_MIN_SCORE = 0.2
+    
     def __init__(self, use_gpu: bool = False):
         """Initialize OCR service with language support
         
@@ -47,140 +67,394 @@ class OCRService:
             'ko': 'Korean'
         }
         
-        # Initialize OCR readers for different language groups
-        self.readers = {}
-        self._initialize_readers()
+        # OCR engines and their readers live in worker processes, one set per CPU core
+        self.engine = OCRProcessPool(
+            max_workers=settings.OCR_WORKERS or None,
+            max_pending=settings.OCR_MAX_PENDING or None,
+            use_gpu=use_gpu,
+            reader_memory_mb=settings.OCR_READER_MEMORY_MB,
+            pinned_languages=settings.OCR_PINNED_LANGUAGES,
+            hot_languages=settings.OCR_HOT_LANGUAGES,
+            engine_options={
+                'onnx': {
+                    'model_dir': settings.OCR_ONNX_MODEL_DIR,
+                    'quantized': settings.OCR_ONNX_QUANTIZED,
+                    'memory_budget_mb': settings.OCR_READER_MEMORY_MB,
+                    'pinned_languages': settings.OCR_PINNED_LANGUAGES,
+                    'hot_languages': settings.OCR_HOT_LANGUAGES
+                },
+                'tesseract': {'config': settings.OCR_TESSERACT_CONFIG}
+            },
+            preload_engine=settings.OCR_DEFAULT_ENGINE
+        )
         
-        # Thread pool for parallel processing
+        # Requests arriving within a short window share recognition batches
+        self.batcher = OCRBatchScheduler(
+            self.engine,
+            window_ms=settings.OCR_BATCH_WINDOW_MS,
+            max_batch=settings.OCR_BATCH_MAX_SIZE
+        )
+        
+        # Thread pool for image preprocessing and PDF rendering
         self.thread_pool = ThreadPoolExecutor(max_workers=4)
-    
-    def _initialize_readers(self):
-        """Initialize OCR readers for different language groups"""
-        try:
-            # Initialize with English by default
-            logger.info("Initializing English OCR reader...")
-            self.readers['en'] = easyocr.Reader(
-                ['en'],
-                gpu=self.use_gpu,
-                verbose=True,
-                download_enabled=True
+        
+        # Scanned PDF pages are rasterized in their own worker processes
+        self.rasterizer = PDFRasterizer(
+            max_workers=settings.PDF_RASTER_WORKERS,
+            pages_per_task=settings.PDF_RASTER_PAGES_PER_TASK
+        )
+        
+        # Document crop counters: how much background photos lose and what it saves in OCR time
+        self._crop_lock = threading.Lock()
+        self._crop_stats = {
+            'images': 0,
+            'cropped': 0,
+            'area_removed_pct': 0.0,
+            'crop_time': 0.0,
+            'ocr_time_cropped': 0.0,
+            'ocr_time_uncropped': 0.0
+        }
+        
+        # Field-zone template counters: layouts identified, validated and rejected
+        self._template_stats = {'attempts': 0, 'identified': 0, 'validated': 0, 'rejected': 0}
+        
+        # Languages picked by script detection
+        self._detected_languages: Dict[str, int] = {}
+        
+        # Content-addressed result cache for repeated uploads of the same scan
+        self.cache = None
+        if settings.OCR_CACHE_ENABLED:
+            self.cache = OCRResultCache(
+                cache_dir=settings.OCR_CACHE_DIR,
+                memory_entries=settings.OCR_CACHE_MEMORY_ENTRIES,
+                disk_max_bytes=settings.OCR_CACHE_DISK_MB * 1024 * 1024
             )
-            logger.info("✅ Successfully initialized English OCR reader")
-            
-            # Set default reader to English
-            self.readers['default'] = self.readers['en']
-            
-            # Other languages will be initialized on demand
-            logger.info("Other languages will be initialized on first use")
-            
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize EasyOCR: {e}")
-            logger.error("Please check your internet connection and try again.")
-            logger.error("If the issue persists, you may need to manually download the models.")
-            raise
     
-    def _get_reader(self, language: str = 'en'):
-        """Get or initialize a reader for the specified language"""
-        if language not in self.supported_languages:
-            logger.warning(f"Language '{language}' not supported, falling back to English")
-            language = 'en'
+    async def _cache_lookup(
+        self,
+        file_data: Any,
+        language: str,
+        params: Dict[str, Any],
+        content_hash: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Hash the raw input and look it up in the result cache
         
-        if language not in self.readers:
-            try:
-                logger.info(f"Initializing {self.supported_languages[language]} OCR reader...")
-                self.readers[language] = easyocr.Reader(
-                    [language],
-                    gpu=self.use_gpu,
-                    verbose=True,
-                    download_enabled=True
+        ``content_hash`` is the SHA-256 already computed while the upload was
+        streamed to disk; the file is then not read again just to hash it.
+        
+        Returns:
+            Tuple of (cache_key, cached_result); the key is None for inputs
+            that are not raw file content (e.g. decoded arrays)
+        """
+        if self.cache is None or not isinstance(file_data, (str, Path, bytes)) and not hasattr(file_data, 'read'):
+            return None, None
+        
+        start_time = time.time()
+        try:
+            if content_hash is None:
+                content_hash = await asyncio.get_event_loop().run_in_executor(
+                    self.thread_pool,
+                    hash_content,
+                    file_data
                 )
-                logger.info(f"✅ Successfully initialized {self.supported_languages[language]} OCR reader")
-            except Exception as e:
-                logger.error(f"Failed to initialize {language} reader: {e}")
-                logger.warning(f"Falling back to English reader for {language}")
-                return self.readers['en']
+        except OSError as e:
+            logger.debug(f"Skipping OCR cache, could not hash input: {e}")
+            return None, None
         
-        return self.readers[language]
+        key = OCRResultCache.make_key(content_hash, language, params)
+        result = self.cache.get(key)
+        if result is not None:
+            result['processing_time'] = time.time() - start_time
+            result['cache_hit'] = True
+            logger.info(f"⚡ OCR cache hit ({content_hash[:12]})")
+        return key, result
+    
+    def _cache_store(self, key: Optional[str], result: Dict[str, Any]):
+        """Store a successful OCR result under ``key``"""
+        if key is not None and self.cache is not None and not result.get('error'):
+            self.cache.put(key, result)
     
-    def _preprocess_image(self, image_data: Union[str, Path, bytes, BinaryIO, np.ndarray]) -> np.ndarray:
+    def _resolve_language(self, language: str = 'en') -> str:
+        """Map a requested language to a supported reader language"""
+        if language not in self.supported_languages:
+            logger.warning(f"Language '{language}' not supported, falling back to English")
+            return 'en'
+        return language
+    
+    def _preprocess_image(
+        self,
+        image_data: Union[str, Path, bytes, BinaryIO, np.ndarray],
+        profile: Optional[OCRProfile] = None,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
         """Preprocess image to improve OCR accuracy
         
         Args:
             image_data: Image file path, bytes, file-like object, or numpy array
+            profile: OCR profile supplying the resize cap and threshold mode
+            out: Optional buffer to write the result into (reused across PDF pages)
             
         Returns:
             Preprocessed image as numpy array
         """
         try:
-            # Handle different input types
-            if isinstance(image_data, (str, Path)):
-                img = Image.open(image_data).convert('L')  # Convert to grayscale
-            elif isinstance(image_data, bytes):
-                img = Image.open(BytesIO(image_data)).convert('L')
-            elif hasattr(image_data, 'read'):  # File-like object
-                img = Image.open(image_data).convert('L')
-            elif isinstance(image_data, np.ndarray):
-                img = Image.fromarray(image_data).convert('L')
-            else:
-                raise ValueError("Unsupported image data type")
-            
-            # Resize if needed (maintain aspect ratio, max dimension 2000px)
-            max_dim = 2000
-            if max(img.size) > max_dim:
-                ratio = max_dim / max(img.size)
-                new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
-                img = img.resize(new_size, Image.LANCZOS)
-            
-            # Enhance contrast using histogram equalization
-            img = ImageOps.equalize(img)
-            
-            # Apply adaptive thresholding
-            img = img.point(lambda p: p > 128 and 255)
-            
-            # Apply slight sharpening
-            img = img.filter(ImageFilter.SHARPEN)
-            
-            # Convert to numpy array
-            img_array = np.array(img)
-            
-            # Apply adaptive thresholding
-            img_array = (img_array > 150) * 255
-            
-            return img_array.astype(np.uint8)
+            # Resize to the profile's cap, equalize and binarize in a single LUT pass
+            profile = profile or resolve_profile()
+            return preprocess_image(image_data, out=out, **profile.preprocess_options())
             
         except Exception as e:
             logger.error(f"Error preprocessing image: {e}")
             raise
     
-    def _process_pdf_page(self, page, dpi: int = 200) -> Image.Image:
-        """Convert a PDF page to a high-quality image"""
+    def _crop_document(
+        self,
+        image_data: Union[str, Path, bytes, BinaryIO, np.ndarray],
+        profile: OCRProfile
+    ) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """Crop and deskew a photo to the page, downsampled to the profile's text height
+        
+        Returns:
+            Tuple of (image to preprocess, crop summary or None if the stage
+            is disabled or failed)
+        """
+        if not profile.crop_document:
+            return image_data, None
+        
         try:
-            # Render page to a pixmap
-            matrix = fitz.Matrix(dpi / 72, dpi / 72)  # Scale factor for DPI
-            pix = page.get_pixmap(matrix=matrix, alpha=False)
-            
-            # Convert to PIL Image
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            return img
+            cropped = crop_document(image_data, **profile.crop_options())
+        except Exception as e:
+            logger.warning(f"Document crop failed, using the full image: {e}")
+            return image_data, None
+        
+        with self._crop_lock:
+            self._crop_stats['images'] += 1
+            self._crop_stats['crop_time'] += cropped.crop_time
+            if cropped.applied:
+                self._crop_stats['cropped'] += 1
+                self._crop_stats['area_removed_pct'] += cropped.area_removed_pct
+        return cropped.image, cropped.info()
+    
+    def _prepare_image(
+        self,
+        image_data: Union[str, Path, bytes, BinaryIO, np.ndarray],
+        profile: OCRProfile,
+        out: Optional[np.ndarray] = None,
+        crop: bool = False
+    ) -> Tuple[np.ndarray, Optional[Dict[str, Any]]]:
+        """Optionally crop a photo to the page, then preprocess it
+        
+        Returns:
+            Tuple of (preprocessed image, crop summary or None)
+        """
+        crop_info = None
+        if crop:
+            image_data, crop_info = self._crop_document(image_data, profile)
+            out = None  # The cropped page has a different shape
+        return self._preprocess_image(image_data, profile, out), crop_info
+    
+    def _record_ocr_time(self, crop_info: Optional[Dict[str, Any]], ocr_time: float):
+        """Track OCR time of cropped vs. full photos to show the crop's effect"""
+        if crop_info is None:
+            return
+        key = 'ocr_time_cropped' if crop_info['applied'] else 'ocr_time_uncropped'
+        with self._crop_lock:
+            self._crop_stats[key] += ocr_time
+    
+    async def _detect_language(
+        self,
+        image: np.ndarray,
+        requested: Optional[List[str]] = None,
+        engine: str = 'easyocr'
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Pick the reader language from a small text strip (see `ocr_script`)
+        
+        The English reader probes the strip first; only if it reads little
+        Latin text are the candidate scripts' readers probed, and the one
+        that best recognizes its own script wins.
+        
+        Args:
+            image: Page image (preprocessed)
+            requested: Languages to choose between (default: Latin plus
+                ``OCR_SCRIPT_CANDIDATES``)
+            engine: OCR engine running the probes
             
+        Returns:
+            Tuple of (language code, detection summary)
+        """
+        start_time = time.time()
+        sample = await asyncio.get_event_loop().run_in_executor(self.thread_pool, text_sample, image)
+        options = {'detail': 1, 'paragraph': False, 'engine': engine}
+        
+        scores = {}
+        latin_language = None
+        if not requested or any(LANGUAGE_SCRIPTS.get(lang) == 'latin' for lang in requested):
+            latin_language = choose_language('latin', requested)
+            results = await self.batcher.readtext_async(sample, 'en', **options)
+            scores[latin_language] = probe_score(results, 'en')
+        
+        if latin_language is None or scores[latin_language] < self.LATIN_MIN_SCORE:
+            candidates = candidate_languages(requested, settings.OCR_SCRIPT_CANDIDATES)
+            probes = await asyncio.gather(*(
+                self.batcher.readtext_async(sample, lang, **options) for lang in candidates
+            ))
+            scores.update({lang: probe_score(results, lang) for lang, results in zip(candidates, probes)})
+        
+        language = max(scores, key=scores.get) if scores else 'en'
+        if scores.get(language, 0.0) < self.SCRIPT_MIN_SCORE:
+            language = latin_language or language
+        
+        self._detected_languages[language] = self._detected_languages.get(language, 0) + 1
+        return language, {
+            'script': LANGUAGE_SCRIPTS.get(language, 'latin'),
+            'scores': {lang: round(score, 3) for lang, score in scores.items()},
+            'detection_time': time.time() - start_time
+        }
+    
+    async def _extract_with_template(
+        self,
+        image: np.ndarray,
+        language: str,
+        profile: OCRProfile,
+        detail: int = 0
+    ) -> Optional[Dict[str, Any]]:
+        """Recognize only the field zones of a known certificate layout
+        
+        The page header is recognized first to identify the layout (zones
+        inside the header reuse that pass); the remaining zones are then
+        recognized together and the fields validated against the
+        certificate type's number pattern.
+        
+        Returns:
+            OCR result with ``fields`` and ``template``, or None if the layout
+            is unknown or its fields do not validate (run full-page OCR)
+        """
+        start_time = time.time()
+        options = {'detail': 1, 'paragraph': False, **profile.readtext_options()}
+        self._template_stats['attempts'] += 1
+        
+        def offset(results, origin):
+            left, top = origin
+            return [([[x + left, y + top] for x, y in bbox], text, conf) for bbox, text, conf in results]
+        
+        header, origin = crop_zone(image, HEADER_ZONE)
+        header_results = offset(
+            await self.batcher.readtext_async(np.ascontiguousarray(header), language, **options),
+            origin
+        )
+        template = identify_layout(' '.join(text for _, text, _ in header_results))
+        if template is None:
+            return None
+        self._template_stats['identified'] += 1
+        
+        # Zones inside the header are read from the header pass; the rest are recognized in one batch
+        height, width = image.shape[:2]
+        box_results = {}
+        pending = []
+        for box in template.boxes():
+            if box_contains(HEADER_ZONE, box):
+                x0, y0, x1, y1 = box[0] * width, box[1] * height, box[2] * width, box[3] * height
+                box_results[box] = [
+                    result for result in header_results
+                    if x0 <= np.mean([p[0] for p in result[0]]) <= x1 and y0 <= np.mean([p[1] for p in result[0]]) <= y1
+                ]
+            else:
+                pending.append((box, *crop_zone(image, box)))
+        
+        recognized = await asyncio.gather(*(
+            self.batcher.readtext_async(np.ascontiguousarray(zone), language, **options)
+            for _, zone, _ in pending
+        ))
+        for (box, _, origin), results in zip(pending, recognized):
+            box_results[box] = offset(results, origin)
+        
+        parsed = parse_fields(template, {
+            zone.name: '\n'.join(text for _, text, _ in box_results[zone.box])
+            for zone in template.zones
+        })
+        if not parsed['valid']:
+            self._template_stats['rejected'] += 1
+            logger.info(f"Template {template.certificate_type.value} rejected ({'; '.join(parsed['errors'])}), running full-page OCR")
+            return None
+        self._template_stats['validated'] += 1
+        
+        results = header_results + [result for box, _, _ in pending for result in box_results[box]]
+        recognized_area = box_area(HEADER_ZONE) + sum(box_area(box) for box, _, _ in pending)
+        result = {
+            'text': self._postprocess_text('\n'.join(text for _, text, _ in results)),
+            'confidence': float(self._calculate_confidence(results)),
+            'processing_time': time.time() - start_time,
+            'language': language,
+            'profile': profile.name,
+            'fields': parsed['fields'],
+            'template': {
+                'certificate_type': template.certificate_type.value,
+                'zones': len(pending) + 1,
+                'recognized_area_pct': round(100 * min(1.0, recognized_area), 1)
+            }
+        }
+        if detail == 1:
+            result['words'] = [{
+                'text': text,
+                'confidence': float(conf),
+                'bounding_box': [list(map(int, point)) for point in bbox]
+            } for bbox, text, conf in results]
+        return result
+    
+    def _render_pdf_page(self, page, dpi: int = 200, max_dim: Optional[int] = None) -> Tuple[Any, np.ndarray]:
+        """Render a PDF page straight to a grayscale array (see `pdf_rasterizer.render_page_gray`)"""
+        try:
+            return render_page_gray(page, dpi, max_dim)
         except Exception as e:
             logger.error(f"Error processing PDF page: {e}")
             raise
     
+    def _text_layer_options(self) -> Dict[str, Any]:
+        return {'min_chars': self.PDF_TEXT_MIN_CHARS, 'min_quality': self.PDF_TEXT_MIN_QUALITY}
+    
+    def _extract_pdf_text_layer(self, page, dpi: int = 200) -> Optional[Dict[str, Any]]:
+        """Read a PDF page's embedded text layer
+        
+        Args:
+            page: PyMuPDF page
+            dpi: Resolution the bounding boxes are scaled to, matching the
+                coordinates OCR would report for the rasterized page
+            
+        Returns:
+            Page result in the same shape as `_extract_from_image`, or None if
+            the page has no usable text layer and must be OCRed
+        """
+        try:
+            return extract_text_layer(page, dpi, **self._text_layer_options())
+        except Exception as e:
+            logger.warning(f"Could not read PDF text layer, falling back to OCR: {e}")
+            return None
+    
     def _extract_from_image(self, image_data: Union[str, Path, bytes, BinaryIO, np.ndarray], 
-                          language: str = 'en') -> Dict[str, Any]:
-        """Extract text from a single image"""
+                          language: str = 'en', profile: Optional[OCRProfile] = None,
+                          out: Optional[np.ndarray] = None, crop: bool = False) -> Dict[str, Any]:
+        """Extract text from a single image
+        
+        With ``crop`` (photos, not rendered PDF pages) the page is cropped and
+        deskewed first; bounding boxes are then relative to the cropped page.
+        """
         try:
-            # Get the appropriate reader for the language
-            reader = self._get_reader(language)
+            language = self._resolve_language(language)
+            profile = profile or resolve_profile()
             
-            # Preprocess the image
-            img_array = self._preprocess_image(image_data)
+            # Crop to the document and preprocess the image
+            img_array, crop_info = self._prepare_image(image_data, profile, out, crop)
             
-            # Perform OCR
+            # Perform OCR in a worker process
             start_time = time.time()
-            results = reader.readtext(img_array, detail=1, paragraph=False)
+            results = self.batcher.readtext(
+                img_array,
+                language,
+                detail=1,
+                paragraph=False,
+                **profile.readtext_options()
+            )
             processing_time = time.time() - start_time
+            self._record_ocr_time(crop_info, processing_time)
             
             # Process results
             text_blocks = []
@@ -219,94 +493,159 @@ class OCRService:
                 'confidence': avg_confidence,
                 'processing_time': processing_time,
                 'language': language,
-                'page_count': 1
+                'page_count': 1,
+                'profile': profile.name,
+                'document_crop': crop_info
             }
             
         except Exception as e:
             logger.error(f"Error extracting text from image: {e}")
             raise
     
-    async def extract_text(
+    async def iter_pdf_pages(
         self,
-        file_data: Union[str, Path, bytes, BinaryIO],
+        file_path: Union[str, Path],
         language: str = 'en',
-        max_pages: int = 10
-    ) -> Dict[str, Any]:
-        """
-        Extract text from an image or PDF file
+        max_pages: int = 10,
+        max_buffered_pages: Optional[int] = None,
+        dpi: Optional[int] = None,
+        profile: Optional[OCRProfile] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Extract text from a PDF page by page, yielding each page as it finishes
+        
+        Pages are rasterized in worker processes (each with its own document
+        handle) ahead of OCR into a bounded buffer, so only a few rendered page
+        images are held in memory regardless of the document length or the
+        number of rasterizer workers.
         
         Args:
-            file_data: File path, bytes, or file-like object
+            file_path: Path to the PDF file
             language: Language code (default: 'en')
-            max_pages: Maximum number of pages to process for PDFs
-            
-        Returns:
-            Dictionary containing extracted text and metadata
+            max_pages: Maximum number of pages to process
+            max_buffered_pages: Total rendered pages held ahead of OCR, being
+                rendered or waiting (default: PDF_MAX_BUFFERED_PAGES); one
+                of them is the hand-off slot, the rest bound the rasterizer
+            dpi: Rendering resolution for pages without a usable text layer
+                (default: the profile's PDF DPI)
+            profile: OCR quality/speed profile (default: configured default)
+            
+        Yields:
+            {
+                'page': int (1-based page number),
+                'pages_to_process': int,
+                'total_pages': int,
+                'source': str ('text_layer' or 'ocr'),
+                'result': Dict (page result, same shape as `_extract_from_image`)
+            }
         """
-        try:
-            # Handle PDF files
-            if isinstance(file_data, (str, Path)) and str(file_data).lower().endswith('.pdf'):
-                return await self._extract_from_pdf(file_data, language, max_pages)
-            
-            # Handle image files
-            return await asyncio.get_event_loop().run_in_executor(
-                self.thread_pool,
-                self._extract_from_image,
-                file_data,
-                language
+        loop = asyncio.get_event_loop()
+        profile = profile or resolve_profile()
+        dpi = dpi or profile.pdf_dpi
+        total_pages = await loop.run_in_executor(self.thread_pool, page_count, str(file_path))
+        pages_to_process = min(total_pages, max_pages)
+        
+        max_buffered_pages = max(2, max_buffered_pages or settings.PDF_MAX_BUFFERED_PAGES)
+        queue = asyncio.Queue(maxsize=1)
+        stopped = asyncio.Event()
+        
+        # Preprocessing output buffers reused across pages of the same size
+        page_buffers: Dict[Tuple[int, ...], np.ndarray] = {}
+        
+        async def render_pages():
+            """Producer: read text layers and render pages that need OCR"""
+            pages = self.rasterizer.iter_pages(
+                str(file_path),
+                pages_to_process,
+                dpi=dpi,
+                max_dim=profile.max_dim,
+                max_buffered_pages=max_buffered_pages - 1,
+                text_layer_options=self._text_layer_options(),
+                thread_pool=self.thread_pool
             )
-            
-        except Exception as e:
-            logger.error(f"Error in extract_text: {e}")
-            raise
+            try:
+                async for page_num, source, payload in pages:
+                    if stopped.is_set():
+                        return
+                    await queue.put((page_num, source, payload))
+                await queue.put((None, 'done', None))
+            except Exception as e:
+                if not stopped.is_set():
+                    await queue.put((None, 'error', e))
+            finally:
+                await pages.aclose()
+        
+        producer = asyncio.ensure_future(render_pages())
+        try:
+            while True:
+                page_num, source, payload = await queue.get()
+                if source == 'done':
+                    break
+                if source == 'error':
+                    raise payload
+                
+                if source == 'ocr':
+                    pix, gray = payload
+                    out = page_buffers.get(gray.shape)
+                    if out is None:
+                        out = page_buffers[gray.shape] = np.empty(gray.shape, dtype=np.uint8)
+                    payload = await loop.run_in_executor(
+                        self.thread_pool,
+                        self._extract_from_image,
+                        gray,
+                        language,
+                        profile,
+                        out
+                    )
+                    del pix, gray
+                
+                yield {
+                    'page': page_num + 1,
+                    'pages_to_process': pages_to_process,
+                    'total_pages': total_pages,
+                    'source': source,
+                    'result': payload
+                }
+        finally:
+            # Stop rasterizing; workers own their document handles, so nothing to close here
+            stopped.set()
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
     
     async def _extract_from_pdf(
         self,
         file_path: Union[str, Path],
         language: str = 'en',
-        max_pages: int = 10
+        max_pages: int = 10,
+        profile: Optional[OCRProfile] = None
     ) -> Dict[str, Any]:
         """Extract text from a PDF file"""
         try:
             start_time = time.time()
-            doc = fitz.open(file_path)
-            total_pages = len(doc)
-            
-            # Limit number of pages to process
-            pages_to_process = min(total_pages, max_pages)
-            
-            # Process pages in parallel
-            futures = []
-            for page_num in range(pages_to_process):
-                page = doc.load_page(page_num)
-                futures.append(
-                    asyncio.get_event_loop().run_in_executor(
-                        self.thread_pool,
-                        self._process_pdf_page,
-                        page
-                    )
-                )
+            profile = profile or resolve_profile()
+            total_pages = 0
+            text_layer_pages = 0
             
-            # Wait for all pages to be processed
-            images = await asyncio.gather(*futures)
-            
-            # Process each page
+            # Combine page results as they stream in
             all_text_blocks = []
             all_full_text = []
             total_confidence = 0.0
             
-            for img in images:
-                result = await asyncio.get_event_loop().run_in_executor(
-                    self.thread_pool,
-                    self._extract_from_image,
-                    img,
-                    language
-                )
+            async for page in self.iter_pdf_pages(file_path, language, max_pages, profile=profile):
+                result = page['result']
+                total_pages = page['total_pages']
+                if page['source'] == 'text_layer':
+                    text_layer_pages += 1
                 
                 all_text_blocks.extend(result['text_blocks'])
                 all_full_text.append(result['text'])
                 total_confidence += result['confidence'] * len(result['text_blocks']) if result['text_blocks'] else 0
             
+            pages_to_process = len(all_full_text)
+            logger.info(
+                f"📄 PDF text layer used for {text_layer_pages}/{pages_to_process} pages, "
+                f"OCR for {pages_to_process - text_layer_pages}"
+            )
+            
             # Calculate average confidence
             total_blocks = sum(1 for _ in all_text_blocks)
             avg_confidence = total_confidence / total_blocks if total_blocks > 0 else 0
@@ -318,15 +657,14 @@ class OCRService:
                 'processing_time': time.time() - start_time,
                 'language': language,
                 'page_count': pages_to_process,
-                'total_pages': total_pages
+                'total_pages': total_pages,
+                'text_layer_pages': text_layer_pages,
+                'profile': profile.name
             }
             
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {e}")
             raise
-        finally:
-            if 'doc' in locals():
-                doc.close()
     
     def get_supported_languages(self) -> Dict[str, str]:
         """Get a dictionary of supported language codes and names"""
@@ -336,12 +674,57 @@ class OCRService:
         """Check if a language is supported"""
         return language in self.supported_languages
     
+    def warm_up(self):
+        """Start the OCR worker processes so they load their readers before the first request"""
+        try:
+            self.engine.start()
+        except Exception as e:
+            logger.warning(f"⚠️ OCR worker warm-up failed: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get worker pool, reader, batching and cache statistics"""
+        return {
+            'engine': self.engine.get_stats(),
+            'batching': self.batcher.get_stats(),
+            'pdf_rasterizer': self.rasterizer.get_stats(),
+            'document_crop': self._crop_summary(),
+            'templates': dict(self._template_stats),
+            'detected_languages': dict(self._detected_languages),
+            'cache': self.cache.get_stats() if self.cache is not None else None
+        }
+    
+    def _crop_summary(self) -> Dict[str, Any]:
+        """Crop rate, average area removed and OCR time of cropped vs. full photos"""
+        with self._crop_lock:
+            stats = dict(self._crop_stats)
+        cropped = stats['cropped']
+        uncropped = stats['images'] - cropped
+        return {
+            'images': stats['images'],
+            'cropped': cropped,
+            'avg_area_removed_pct': stats['area_removed_pct'] / cropped if cropped else 0.0,
+            'avg_crop_time': stats['crop_time'] / stats['images'] if stats['images'] else 0.0,
+            'avg_ocr_time_cropped': stats['ocr_time_cropped'] / cropped if cropped else None,
+            'avg_ocr_time_uncropped': stats['ocr_time_uncropped'] / uncropped if uncropped else None
+        }
+    
+    def memory_usage(self) -> int:
+        """Bytes of reader model weights held by the OCR worker processes"""
+        return self.engine.get_stats()['readers']['memory_bytes']
+    
+    def shutdown(self):
+        """Stop the preprocessing threads, batcher and OCR workers"""
+        self.thread_pool.shutdown(wait=True)
+        self.batcher.shutdown()
+        self.rasterizer.shutdown(wait=False)
+        self.engine.shutdown(wait=False)
+    
     def __del__(self):
         """Cleanup resources"""
         try:
-            self.thread_pool.shutdown(wait=True)
+            self.shutdown()
         except Exception as e:
-            logger.debug(f"Error shutting down thread pool: {e}")
+            logger.debug(f"Error shutting down OCR pools: {e}")
             
     def _postprocess_text(self, text: str) -> str:
         """Clean and normalize extracted text
@@ -392,7 +775,10 @@ class OCRService:
         image_path: Union[str, Path],
         languages: Optional[List[str]] = None,
         preprocess: bool = True,
-        detail: int = 0
+        detail: int = 0,
+        profile: Optional[OCRProfile] = None,
+        templates: bool = False,
+        content_hash: Optional[str] = None
     ) -> Dict:
         """Extract text from an image with confidence scoring
         
@@ -401,6 +787,12 @@ class OCRService:
             languages: List of language codes to use (e.g., ['en', 'hi'])
             preprocess: Whether to preprocess the image
             detail: Level of detail in response (0 for text only, 1 for bbox and confidence)
+            profile: OCR quality/speed profile (default: configured default)
+            templates: Recognize only the field zones of known certificate
+                layouts (see `ocr_templates`); the result then also carries
+                validated 'fields' and the 'template' used
+            content_hash: SHA-256 of the file computed while it was uploaded,
+                used for the result cache instead of hashing the file again
             
         Returns:
             {
@@ -408,12 +800,15 @@ class OCRService:
                 'confidence': float (average confidence 0-1),
                 'processing_time': float (seconds),
                 'language': str (detected language code),
+                'profile': str (name of the OCR profile used),
                 'words': List[Dict] (if detail=1)
             }
             
         Note:
-            If multiple languages are provided, the first available language reader will be used.
-            If no languages are specified, the default (English) reader will be used.
+            A single language uses that language's reader directly. With no
+            languages, ``['auto']`` or several languages, the script is
+            detected from a small text strip and only the chosen reader runs
+            on the full image (PDFs use the single requested language or English).
         """
         start_time = time.time()
         
@@ -422,47 +817,78 @@ class OCRService:
             if not os.path.exists(str(image_path)) and not isinstance(image_path, (np.ndarray, Image.Image)):
                 raise FileNotFoundError(f"Image file not found: {image_path}")
                 
-            # Determine which languages to use
-            if not languages:
-                languages = ['en']  # Default to English if no languages specified
-            
-            # Find the first available language reader
-            reader = None
-            for lang in languages:
-                if lang in self.readers:
-                    reader = self.readers[lang]
-                    break
+            # Determine which languages to use; several (or none) means detect the script
+            languages = [lang for lang in (languages or []) if lang != 'auto']
+            detect = len(languages) > 1 or (not languages and settings.OCR_SCRIPT_DETECTION)
+            language = self._resolve_language(languages[0]) if len(languages) == 1 else 'en'
+            profile = profile or resolve_profile()
+            
+            options = {
+                'detail': detail if detail == 1 else 0,
+                'paragraph': detail == 0,
+                **profile.readtext_options()
+            }
+            
+            cache_key, cached = await self._cache_lookup(
+                image_path,
+                ','.join(languages) if detect else language,
+                {
+                    'preprocess': preprocess and profile.preprocess_options(),
+                    'crop': preprocess and profile.crop_document and profile.crop_options(),
+                    'readtext': options,
+                    'templates': templates
+                },
+                content_hash
+            )
+            if cached is not None:
+                return cached
             
-            # Fall back to default reader if no matching language found
-            if reader is None:
-                logger.warning(f"No reader found for languages {languages}, falling back to default")
-                reader = self.readers['default']
+            # PDFs go through the text-layer fast path and page rasterization
+            if isinstance(image_path, (str, Path)) and str(image_path).lower().endswith('.pdf'):
+                result = await self._extract_from_pdf(image_path, language, profile=profile)
+                self._cache_store(cache_key, result)
+                return result
             
-            # Preprocess image if needed
+            # Crop to the document and preprocess image if needed
+            crop_info = None
             if preprocess:
-                image = self._preprocess_image(image_path)
+                image, crop_info = await asyncio.get_event_loop().run_in_executor(
+                    self.thread_pool,
+                    self._prepare_image,
+                    image_path,
+                    profile,
+                    None,
+                    True
+                )
             else:
                 if isinstance(image_path, (str, Path)):
                     image = np.array(Image.open(image_path))
                 else:
                     image = image_path
             
-            # Use the default reader for now (can be extended to use language-specific readers)
-            reader = self.readers['default']
-            
-            # Perform OCR
-            results = reader.readtext(
-                image,
-                detail=detail if detail == 1 else 0,
-                paragraph=detail == 0,
-                batch_size=8,
-                min_size=10,
-                text_threshold=0.3,
-                low_text=0.3,
-                link_threshold=0.4,
-                canvas_size=2560,
-                mag_ratio=1.5
-            )
+            # Pick the reader for the page's script
+            language_detection = None
+            if detect:
+                language, language_detection = await self._detect_language(
+                    np.asarray(image),
+                    [lang for lang in languages if self.is_language_supported(lang)],
+                    profile.engine
+                )
+            
+            # Known layouts: recognize the field zones only
+            if templates:
+                result = await self._extract_with_template(np.asarray(image), language, profile, detail)
+                if result is not None:
+                    result['processing_time'] = time.time() - start_time
+                    result['document_crop'] = crop_info
+                    result['language_detection'] = language_detection
+                    self._cache_store(cache_key, result)
+                    return result
+            
+            # Perform OCR in a worker process without blocking the event loop
+            ocr_start = time.time()
+            results = await self.batcher.readtext_async(image, language, **options)
+            self._record_ocr_time(crop_info, time.time() - ocr_start)
             
             # Process results
             if detail == 1:
@@ -478,22 +904,31 @@ class OCRService:
                     'bounding_box': [list(map(int, point)) for point in result[0]]
                 } for result in results]
                 
-                return {
+                result = {
                     'text': self._postprocess_text(full_text),
                     'confidence': float(confidence),
                     'processing_time': time.time() - start_time,
-                    'language': 'en',  # TODO: Add language detection
+                    'language': language,
+                    'language_detection': language_detection,
+                    'profile': profile.name,
+                    'document_crop': crop_info,
                     'words': words
                 }
             else:
                 # Simple text response
                 full_text = '\n'.join(results) if results else ''
-                return {
+                result = {
                     'text': self._postprocess_text(full_text),
                     'confidence': 1.0,  # Confidence not available in detail=0 mode
                     'processing_time': time.time() - start_time,
-                    'language': 'en'  # Default to English
+                    'language': language,
+                    'language_detection': language_detection,
+                    'profile': profile.name,
+                    'document_crop': crop_info
                 }
+            
+            self._cache_store(cache_key, result)
+            return result
                 
         except Exception as e:
             logger.error(f"Error in OCR processing: {e}", exc_info=True)
@@ -505,5 +940,5 @@ class OCRService:
             }
 
 
-# Global instance
-ocr_service = OCRService()
+# Global instance (built on first use or during startup warm-up)
+ocr_service = service_registry.register('ocr', OCRService, on_ready=lambda service: service.warm_up())
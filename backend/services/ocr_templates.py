@@ -0,0 +1,256 @@
+"""
+Field-zone OCR templates for known certificate layouts
+
+GOTS, OEKO-TEX, SA8000 and BSCI certificates print the certificate number and
+dates in the same regions on every copy. Once a cheap pass over the page
+header identifies the layout, only the configured zones are recognized
+instead of every text region on the page, and the zone text is checked
+against ``CertificateValidator.CERTIFICATE_PATTERNS`` straight away. Pages
+whose layout is unknown, or whose certificate number does not validate, fall
+back to full-page OCR.
+
+Zone boxes are fractions of the (cropped) page: (x0, y0, x1, y1).
+"""
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from database.models import CertificateType
+from utils.certificate_validators import CertificateValidator
+
+Box = Tuple[float, float, float, float]
+
+# Region read by the layout identification pass
+HEADER_ZONE: Box = (0.0, 0.0, 1.0, 0.3)
+
+
+@dataclass(frozen=True)
+class FieldZone:
+    """Page region holding one certificate field"""
+    name: str  # certificate_number, issued_date, expiry_date, issued_to, ...
+    box: Box
+    kind: str = 'text'  # 'number', 'date' or 'text'
+    label: Optional[str] = None  # Regex of the printed label preceding the value
+    last: bool = False  # Take the last date in the zone instead of the first
+
+
+@dataclass(frozen=True)
+class CertificateTemplate:
+    """Layout of one certificate type"""
+    certificate_type: CertificateType
+    keywords: Tuple[str, ...]  # Header phrases identifying the layout
+    zones: Tuple[FieldZone, ...]
+
+    def boxes(self) -> List[Box]:
+        """Distinct zone boxes; fields sharing a box are recognized once"""
+        return list(dict.fromkeys(zone.box for zone in self.zones))
+
+
+ISSUED_LABEL = r'(date\s+of\s+issue|issued\s+on|issue\s+date|place\s+and\s+date\s+of\s+issue)'
+EXPIRY_LABEL = r'(valid\s+until|valid\s+till|expiry\s+date|expires\s+on|valid\s+to)'
+
+TEMPLATES: Dict[CertificateType, CertificateTemplate] = {}
+
+
+def register_template(template: CertificateTemplate):
+    """Add or replace the template for a certificate type"""
+    TEMPLATES[template.certificate_type] = template
+
+
+register_template(CertificateTemplate(
+    certificate_type=CertificateType.GOTS,
+    keywords=('GLOBAL ORGANIC TEXTILE STANDARD', 'GOTS', 'SCOPE CERTIFICATE'),
+    zones=(
+        FieldZone('certificate_number', (0.0, 0.1, 1.0, 0.3), kind='number'),
+        FieldZone('issued_date', (0.0, 0.78, 1.0, 0.98), kind='date', label=ISSUED_LABEL),
+        FieldZone('expiry_date', (0.0, 0.78, 1.0, 0.98), kind='date', label=EXPIRY_LABEL, last=True),
+    )
+))
+
+register_template(CertificateTemplate(
+    certificate_type=CertificateType.OEKO_TEX,
+    keywords=('OEKO-TEX', 'OEKO TEX', 'STANDARD 100', 'CONFIDENCE IN TEXTILES'),
+    zones=(
+        FieldZone('certificate_number', (0.0, 0.1, 1.0, 0.3), kind='number'),
+        FieldZone('issued_date', (0.0, 0.75, 1.0, 0.95), kind='date', label=ISSUED_LABEL),
+        FieldZone('expiry_date', (0.0, 0.75, 1.0, 0.95), kind='date', label=EXPIRY_LABEL, last=True),
+    )
+))
+
+register_template(CertificateTemplate(
+    certificate_type=CertificateType.SA8000,
+    keywords=('SA8000', 'SA 8000', 'SOCIAL ACCOUNTABILITY'),
+    zones=(
+        FieldZone('certificate_number', (0.0, 0.6, 1.0, 0.8), kind='number'),
+        FieldZone('issued_date', (0.0, 0.7, 1.0, 0.95), kind='date', label=ISSUED_LABEL),
+        FieldZone('expiry_date', (0.0, 0.7, 1.0, 0.95), kind='date', label=EXPIRY_LABEL, last=True),
+    )
+))
+
+register_template(CertificateTemplate(
+    certificate_type=CertificateType.BSCI,
+    keywords=('BSCI', 'AMFORI', 'BUSINESS SOCIAL COMPLIANCE'),
+    zones=(
+        FieldZone('certificate_number', (0.0, 0.1, 1.0, 0.3), kind='number'),
+        FieldZone('issued_date', (0.0, 0.7, 1.0, 0.95), kind='date', label=ISSUED_LABEL),
+        FieldZone('expiry_date', (0.0, 0.7, 1.0, 0.95), kind='date', label=EXPIRY_LABEL, last=True),
+    )
+))
+
+
+def box_area(box: Box) -> float:
+    x0, y0, x1, y1 = box
+    return (x1 - x0) * (y1 - y0)
+
+
+def box_contains(outer: Box, inner: Box) -> bool:
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and inner[2] <= outer[2] and inner[3] <= outer[3]
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.upper().split())
+
+
+def identify_layout(header_text: str) -> Optional[CertificateTemplate]:
+    """Pick the template whose keywords best match the header pass text"""
+    header = _normalize(header_text)
+    best, best_hits = None, 0
+    for template in TEMPLATES.values():
+        hits = sum(1 for keyword in template.keywords if keyword in header)
+        if hits > best_hits:
+            best, best_hits = template, hits
+    return best
+
+
+def crop_zone(image: np.ndarray, box: Box) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """Cut a relative box out of an image
+
+    Returns:
+        Tuple of (zone view, (x, y) offset of the zone in the image)
+    """
+    height, width = image.shape[:2]
+    x0, y0, x1, y1 = box
+    left, top = int(x0 * width), int(y0 * height)
+    return image[top:int(y1 * height), left:int(x1 * width)], (left, top)
+
+
+_MONTHS = {
+    name: index + 1
+    for index, names in enumerate([
+        ('jan', 'january'), ('feb', 'february'), ('mar', 'march'), ('apr', 'april'),
+        ('may',), ('jun', 'june'), ('jul', 'july'), ('aug', 'august'),
+        ('sep', 'sept', 'september'), ('oct', 'october'), ('nov', 'november'), ('dec', 'december')
+    ])
+    for name in names
+}
+_MONTH_NAMES = '|'.join(sorted(_MONTHS, key=len, reverse=True))
+
+_DATE_PATTERNS = [
+    # 2024-01-15, 2024/01/15
+    (re.compile(r'\b(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})\b'), ('y', 'm', 'd')),
+    # 15.01.2024, 15/01/2024 (certification bodies print day first)
+    (re.compile(r'\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})\b'), ('d', 'm', 'y')),
+    # 15 January 2024
+    (re.compile(rf'\b(\d{{1,2}})(?:st|nd|rd|th)?\s+({_MONTH_NAMES})\.?,?\s+(\d{{4}})\b', re.IGNORECASE), ('d', 'b', 'y')),
+    # January 15, 2024
+    (re.compile(rf'\b({_MONTH_NAMES})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?,?\s+(\d{{4}})\b', re.IGNORECASE), ('b', 'd', 'y')),
+]
+
+
+def find_dates(text: str) -> List[Tuple[int, date]]:
+    """All dates in the text with their positions, in reading order"""
+    found = []
+    for pattern, order in _DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            parts = dict(zip(order, match.groups()))
+            month = _MONTHS[parts['b'].lower()] if 'b' in parts else int(parts['m'])
+            try:
+                found.append((match.start(), date(int(parts['y']), month, int(parts['d']))))
+            except ValueError:
+                continue
+    # Patterns can overlap (e.g. the year of one match); keep the first per position
+    seen, dates = set(), []
+    for position, value in sorted(found, key=lambda item: item[0]):
+        if position not in seen:
+            seen.add(position)
+            dates.append((position, value))
+    return dates
+
+
+def find_labeled_date(text: str, label: str) -> Optional[date]:
+    """First date after the printed label, if the label is present"""
+    match = re.search(label, text, re.IGNORECASE)
+    if match:
+        after = [value for position, value in find_dates(text) if position >= match.end()]
+        if after:
+            return after[0]
+    return None
+
+
+def _pick_date(zone: FieldZone, text: str) -> Optional[date]:
+    dates = find_dates(text)
+    if not dates:
+        return None
+    if zone.label:
+        labeled = find_labeled_date(text, zone.label)
+        if labeled is not None:
+            return labeled
+    return dates[-1][1] if zone.last else dates[0][1]
+
+
+def _number_candidates(text: str) -> List[str]:
+    """Tokens, token pairs and lines that could be the certificate number"""
+    candidates = []
+    for line in text.splitlines():
+        tokens = [token.strip('.,;:()[]') for token in line.split()]
+        candidates.extend(tokens)
+        candidates.extend(' '.join(pair) for pair in zip(tokens, tokens[1:]))
+        candidates.extend(''.join(pair) for pair in zip(tokens, tokens[1:]))
+        candidates.append(line.strip())
+    return [candidate for candidate in candidates if candidate]
+
+
+def find_certificate_number(cert_type: CertificateType, text: str) -> Optional[str]:
+    """First candidate in the text matching the type's certificate number pattern"""
+    for candidate in _number_candidates(text):
+        if CertificateValidator.validate_certificate_number(cert_type.value, candidate):
+            return candidate.upper()
+    return None
+
+
+def parse_fields(template: CertificateTemplate, zone_texts: Dict[str, str]) -> Dict[str, Any]:
+    """Turn recognized zone text into validated certificate fields
+
+    Returns:
+        {'fields': {...}, 'valid': bool, 'errors': [...]} where ``valid``
+        means the certificate number matched its pattern and the dates are
+        consistent
+    """
+    fields: Dict[str, Any] = {'certificate_type': template.certificate_type.value}
+    errors = []
+
+    for zone in template.zones:
+        text = zone_texts.get(zone.name, '')
+        if zone.kind == 'number':
+            value = find_certificate_number(template.certificate_type, text)
+            if value is None:
+                errors.append(f"No {template.certificate_type.value} certificate number found")
+        elif zone.kind == 'date':
+            value = _pick_date(zone, text)
+        else:
+            value = ' '.join(text.split()) or None
+        if value is not None:
+            fields[zone.name] = value
+
+    is_valid, date_error = CertificateValidator.validate_dates(fields.get('issued_date'), fields.get('expiry_date'))
+    if not is_valid:
+        errors.append(date_error)
+
+    for name in ('issued_date', 'expiry_date'):
+        if name in fields:
+            fields[name] = fields[name].isoformat()
+
+    return {'fields': fields, 'valid': not errors, 'errors': errors}
@@ -0,0 +1,316 @@
+"""
+Process-isolated PDF rasterization
+
+PyMuPDF documents must not be shared between threads, and rendering is
+CPU-bound, so scanned PDFs are rasterized in a pool of worker processes.
+Pages are split into small contiguous ranges; every worker opens its own
+handle to the file (kept open across the ranges it is given) and returns, per
+page, either the embedded text layer or a grayscale render. Ranges are
+submitted a bounded number at a time and their pages are yielded in order, so
+OCR starts on the first pages while later ones are still rendering.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncGenerator, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Per-process cache of open documents, keyed by (path, mtime, size)
+_worker_docs: "OrderedDict[Tuple[str, float, int], Any]" = OrderedDict()
+_WORKER_MAX_OPEN_DOCS = 4
+
+
+def page_count(file_path: str) -> int:
+    """Number of pages in a PDF"""
+    import fitz
+
+    with fitz.open(file_path) as doc:
+        return len(doc)
+
+
+def is_usable_text_layer(text: str, min_chars: int = 40, min_quality: float = 0.8) -> bool:
+    """Check whether a PDF text layer is good enough to skip OCR
+
+    Scanned pages have no text layer (or only a few stray characters),
+    and PDFs with broken font encodings produce replacement characters
+    and symbol soup; both need to be rasterized and OCRed instead.
+    """
+    chars = ''.join(text.split())
+    if len(chars) < min_chars:
+        return False
+
+    readable = sum(1 for ch in chars if ch.isalnum() or ch in '.,:;-/()&%#@\'"+')
+    return readable / len(chars) >= min_quality
+
+
+def extract_text_layer(
+    page,
+    dpi: int = 200,
+    min_chars: int = 40,
+    min_quality: float = 0.8
+) -> Optional[Dict[str, Any]]:
+    """Read a page's embedded text layer as OCR-shaped text blocks
+
+    Bounding boxes are scaled to ``dpi`` so they match the coordinates OCR
+    would report for the rasterized page. Returns None if the page has no
+    usable text layer.
+    """
+    start_time = time.time()
+    words = page.get_text("words", sort=True)
+    if not is_usable_text_layer(' '.join(w[4] for w in words), min_chars, min_quality):
+        return None
+
+    # Group words into lines so text blocks resemble OCR detections
+    scale = dpi / 72
+    lines = {}
+    for x0, y0, x1, y1, word, block_no, line_no, _ in words:
+        line = lines.setdefault((block_no, line_no), {'words': [], 'box': [x0, y0, x1, y1]})
+        line['words'].append(word)
+        box = line['box']
+        box[0], box[1] = min(box[0], x0), min(box[1], y0)
+        box[2], box[3] = max(box[2], x1), max(box[3], y1)
+
+    text_blocks = []
+    for line in lines.values():
+        x0, y0, x1, y1 = (int(round(v * scale)) for v in line['box'])
+        text_blocks.append({
+            'text': ' '.join(line['words']),
+            'confidence': 1.0,
+            'bounding_box': {
+                'x': x0,
+                'y': y0,
+                'width': x1 - x0,
+                'height': y1 - y0
+            }
+        })
+
+    return {
+        'text': '\n'.join(block['text'] for block in text_blocks),
+        'text_blocks': text_blocks,
+        'confidence': 1.0,
+        'processing_time': time.time() - start_time,
+        'language': None,
+        'page_count': 1
+    }
+
+
+def render_page_gray(page, dpi: int = 200, max_dim: Optional[int] = None) -> Tuple[Any, np.ndarray]:
+    """Render a page straight to an 8-bit grayscale array
+
+    The page is rasterized in grayscale at ``dpi``, or at the lower
+    resolution that fits ``max_dim`` so preprocessing never has to resize,
+    and the pixmap's sample buffer is wrapped without copying.
+
+    Returns:
+        Tuple of (pixmap, array view); keep the pixmap alive while the
+        array is in use
+    """
+    import fitz
+
+    zoom = dpi / 72  # Scale factor for DPI
+    longest_side = max(page.rect.width, page.rect.height)
+    if max_dim and longest_side * zoom > max_dim:
+        zoom = max_dim / longest_side
+
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+
+    samples = getattr(pix, 'samples_mv', None)  # Zero-copy view (PyMuPDF >= 1.18.17)
+    if samples is None:
+        samples = pix.samples
+    gray = np.frombuffer(samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+    return pix, gray
+
+
+def _open_worker_doc(file_path: str):
+    """Open a document once per worker process and keep it for later ranges"""
+    import fitz
+
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_mtime, stat.st_size)
+    doc = _worker_docs.get(key)
+    if doc is not None:
+        _worker_docs.move_to_end(key)
+        return doc
+
+    doc = fitz.open(file_path)
+    _worker_docs[key] = doc
+    while len(_worker_docs) > _WORKER_MAX_OPEN_DOCS:
+        _, old = _worker_docs.popitem(last=False)
+        old.close()
+    return doc
+
+
+def _rasterize_pages(
+    file_path: str,
+    page_numbers: Sequence[int],
+    dpi: int,
+    max_dim: Optional[int],
+    text_layer_options: Dict[str, Any],
+    cache_doc: bool = True
+) -> List[Tuple[int, str, Any]]:
+    """Worker: text layer or grayscale render for each page in a range
+
+    Returns:
+        List of (page_num, source, payload) where source is 'text_layer'
+        (payload: page result) or 'ocr' (payload: (pixmap or None, 2-D uint8 array))
+    """
+    import fitz
+
+    doc = _open_worker_doc(file_path) if cache_doc else fitz.open(file_path)
+    try:
+        pages = []
+        for page_num in page_numbers:
+            page = doc.load_page(page_num)
+            text_layer = None
+            try:
+                text_layer = extract_text_layer(page, dpi, **text_layer_options)
+            except Exception as e:
+                logger.warning(f"Could not read PDF text layer, falling back to OCR: {e}")
+
+            if text_layer is not None:
+                pages.append((page_num, 'text_layer', text_layer))
+            elif cache_doc:
+                # Crossing the process boundary copies anyway; send an owned array
+                pix, gray = render_page_gray(page, dpi, max_dim)
+                pages.append((page_num, 'ocr', (None, gray.copy())))
+                del pix, gray
+            else:
+                # Same process: keep the pixmap with its zero-copy view
+                pages.append((page_num, 'ocr', render_page_gray(page, dpi, max_dim)))
+        return pages
+    finally:
+        if not cache_doc:
+            doc.close()
+
+
+class PDFRasterizer:
+    """Renders PDF pages across worker processes and streams them in order"""
+
+    def __init__(self, max_workers: Optional[int] = None, pages_per_task: int = 2):
+        """Create the rasterizer (worker processes start on first use)
+
+        Args:
+            max_workers: Worker processes (default: min(4, CPU cores));
+                0 renders in the calling process' thread instead
+            pages_per_task: Contiguous pages handed to a worker per task
+        """
+        self.max_workers = min(4, os.cpu_count() or 1) if max_workers is None else max_workers
+        self.pages_per_task = max(1, pages_per_task)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {'documents': 0, 'pages': 0, 'text_layer_pages': 0, 'restarts': 0}
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.max_workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                logger.info(f"Starting PDF rasterizer pool ({self.max_workers} workers)")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is broken:
+                logger.warning("PDF rasterizer worker crashed, restarting pool")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                self._stats['restarts'] += 1
+
+    def _plan(self, max_buffered_pages: int, cache_doc: bool = True) -> Tuple[int, int]:
+        """(pages per task, tasks in flight) keeping at most ``max_buffered_pages`` rendered pages
+
+        Always at least one single-page task, so rendering can make progress.
+        """
+        budget = max(1, max_buffered_pages)
+        per_task = min(self.pages_per_task, budget)
+        # Rendering on threads keeps a single document handle open at a time
+        window = min(self.max_workers, budget // per_task) if cache_doc else 1
+        return per_task, max(1, window)
+
+    async def iter_pages(
+        self,
+        file_path: str,
+        pages_to_process: int,
+        dpi: int = 200,
+        max_dim: Optional[int] = None,
+        max_buffered_pages: int = 2,
+        text_layer_options: Optional[Dict[str, Any]] = None,
+        thread_pool=None
+    ) -> AsyncGenerator[Tuple[int, str, Any], None]:
+        """Yield (page_num, source, payload) for the first ``pages_to_process`` pages, in order
+
+        Rendered pages held by this generator (in flight or not yet yielded)
+        never exceed ``max_buffered_pages``; ranges shrink and fewer workers
+        are used when the budget is smaller than ``pages_per_task`` times the
+        worker count.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        cache_doc = executor is not None
+        text_layer_options = text_layer_options or {}
+        self._stats['documents'] += 1
+
+        per_task, window = self._plan(max_buffered_pages, cache_doc)
+        ranges = [
+            list(range(start, min(start + per_task, pages_to_process)))
+            for start in range(0, pages_to_process, per_task)
+        ]
+        pending = deque()
+        next_range = 0
+
+        try:
+            while pending or next_range < len(ranges):
+                while next_range < len(ranges) and len(pending) < window:
+                    pending.append(loop.run_in_executor(
+                        executor if executor is not None else thread_pool,
+                        _rasterize_pages,
+                        file_path,
+                        ranges[next_range],
+                        dpi,
+                        max_dim,
+                        text_layer_options,
+                        cache_doc
+                    ))
+                    next_range += 1
+
+                try:
+                    pages = await pending.popleft()
+                except BrokenProcessPool:
+                    self._restart(executor)
+                    raise RuntimeError("PDF rasterizer worker process crashed")
+
+                for page in pages:
+                    self._stats['pages'] += 1
+                    if page[1] == 'text_layer':
+                        self._stats['text_layer_pages'] += 1
+                    yield page
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'max_workers': self.max_workers,
+            'pages_per_task': self.pages_per_task,
+            'running': self._executor is not None,
+            **self._stats
+        }
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,299 @@
+"""
+Lazy service registry
+
+Heavy singletons (OCR, Whisper, Gemini, ChromaDB, the XGBoost risk model) are
+registered here instead of being built at import time. Each one is created on
+first use, or by the background warm-up task started from the application
+lifespan, so the API starts serving lightweight routes immediately.
+
+Services that hold a model on behalf of another object acquire a
+reference-counted handle instead of constructing their own copy, and the
+registry records how much memory each service added when it was built.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process, if it can be read cheaply"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+class _Entry:
+    """Registration record for one service"""
+
+    def __init__(self, name: str, factory: Callable[[], Any], warm: bool, on_ready: Optional[Callable[[Any], None]]):
+        self.name = name
+        self.factory = factory
+        self.warm = warm
+        self.on_ready = on_ready
+        self.instance = None
+        self.state = PENDING
+        self.error: Optional[str] = None
+        self.load_time: Optional[float] = None
+        self.rss_delta: Optional[int] = None
+        self.refcount = 0
+        self.lock = threading.Lock()
+        self.ref_lock = threading.Lock()
+
+
+class LazyService:
+    """Module-level stand-in that builds the real service on first attribute access"""
+
+    __slots__ = ('_registry', '_name')
+
+    def __init__(self, registry: 'ServiceRegistry', name: str):
+        object.__setattr__(self, '_registry', registry)
+        object.__setattr__(self, '_name', name)
+
+    def __getattr__(self, item):
+        return getattr(self._registry.get(self._name), item)
+
+    def __setattr__(self, item, value):
+        setattr(self._registry.get(self._name), item, value)
+
+    def __repr__(self):
+        return f"<LazyService '{self._name}' ({self._registry.state(self._name)})>"
+
+
+class ServiceHandle:
+    """Reference-counted handle on a shared service
+
+    Attribute access is forwarded to the service, so a handle can stand in
+    for the instance. Release it (or use it as a context manager) when the
+    owner goes away so the registry knows the service is no longer in use.
+    """
+
+    def __init__(self, registry: 'ServiceRegistry', name: str):
+        self._registry = registry
+        self._name = name
+        self._released = False
+
+    @property
+    def service(self) -> Any:
+        if self._released:
+            raise RuntimeError(f"Handle on service '{self._name}' was released")
+        return self._registry.get(self._name)
+
+    def __getattr__(self, item):
+        if item.startswith('_'):
+            raise AttributeError(item)
+        return getattr(self.service, item)
+
+    def release(self):
+        """Drop this reference (safe to call more than once)"""
+        if not self._released:
+            self._released = True
+            self._registry._release(self._name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def __del__(self):
+        try:
+            self.release()
+        except Exception:
+            pass
+
+
+class ServiceRegistry:
+    """Builds registered services once, on demand or during warm-up"""
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        warm: bool = True,
+        on_ready: Optional[Callable[[Any], None]] = None
+    ) -> LazyService:
+        """Register a service factory and return a lazy proxy for it
+
+        Args:
+            name: Registry key
+            factory: Zero-argument callable that builds the service
+            warm: Whether the background warm-up should build it
+            on_ready: Optional hook run after warm-up builds the service
+                (e.g. to start worker processes or load models ahead of use)
+        """
+        if name not in self._entries:
+            self._entries[name] = _Entry(name, factory, warm, on_ready)
+        return LazyService(self, name)
+
+    def get(self, name: str) -> Any:
+        """Get a service, building it on the calling thread if needed"""
+        entry = self._entries[name]
+        if entry.state == READY:
+            return entry.instance
+
+        with entry.lock:
+            if entry.state == READY:
+                return entry.instance
+
+            entry.state = LOADING
+            start_time = time.time()
+            rss_before = _rss_bytes()
+            logger.info(f"🔄 Loading service '{name}'...")
+            try:
+                entry.instance = entry.factory()
+            except Exception as e:
+                entry.state = FAILED
+                entry.error = str(e)
+                logger.error(f"❌ Service '{name}' failed to load: {e}")
+                raise
+
+            entry.load_time = time.time() - start_time
+            rss_after = _rss_bytes()
+            if rss_before is not None and rss_after is not None:
+                # Approximate: other threads may allocate during the build
+                entry.rss_delta = max(0, rss_after - rss_before)
+            entry.state = READY
+            entry.error = None
+            logger.info(f"✅ Service '{name}' ready in {entry.load_time:.2f}s")
+            return entry.instance
+
+    async def aget(self, name: str) -> Any:
+        """Get a service without blocking the event loop while it loads"""
+        entry = self._entries[name]
+        if entry.state == READY:
+            return entry.instance
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, name)
+
+    def acquire(self, name: str) -> ServiceHandle:
+        """Take a reference-counted handle on a registered service
+
+        The service itself is still built lazily on first use of the handle.
+        """
+        entry = self._entries[name]
+        with entry.ref_lock:
+            entry.refcount += 1
+        return ServiceHandle(self, name)
+
+    def _release(self, name: str):
+        entry = self._entries[name]
+        with entry.ref_lock:
+            entry.refcount = max(0, entry.refcount - 1)
+
+    def unload(self, name: str, force: bool = False) -> bool:
+        """Drop a built service so its memory can be reclaimed
+
+        Refuses while handles are outstanding unless ``force`` is set. Module
+        level proxies keep working and rebuild the service on next use.
+        """
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.state != READY or (entry.refcount and not force):
+                return False
+            instance, entry.instance = entry.instance, None
+            entry.state = PENDING
+            entry.rss_delta = None
+
+        shutdown = getattr(instance, 'shutdown', None)
+        if callable(shutdown):
+            try:
+                shutdown()
+            except Exception as e:
+                logger.warning(f"⚠️ Error shutting down service '{name}': {e}")
+        logger.info(f"🗑️ Unloaded service '{name}'")
+        return True
+
+    def state(self, name: str) -> str:
+        return self._entries[name].state
+
+    def is_ready(self, names: Optional[Iterable[str]] = None) -> bool:
+        """Whether every warm-up service (or every named service) is ready"""
+        if names is None:
+            names = [name for name, entry in self._entries.items() if entry.warm]
+        return all(self._entries[name].state == READY for name in names)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-service state, load time, references, memory and last error"""
+        return {
+            name: {
+                'state': entry.state,
+                'load_time': round(entry.load_time, 3) if entry.load_time is not None else None,
+                'error': entry.error,
+                'warm': entry.warm,
+                'refcount': entry.refcount,
+                'memory': self._memory(entry)
+            }
+            for name, entry in self._entries.items()
+        }
+
+    @staticmethod
+    def _memory(entry: _Entry) -> Dict[str, Optional[int]]:
+        """Memory attributed to a service
+
+        ``rss_delta_bytes`` is the growth of this process while the service was
+        built; ``reported_bytes`` comes from the service's own ``memory_usage()``
+        (e.g. model weights living in OCR worker processes).
+        """
+        reported = None
+        memory_usage = getattr(entry.instance, 'memory_usage', None) if entry.state == READY else None
+        if callable(memory_usage):
+            try:
+                reported = memory_usage()
+            except Exception:
+                reported = None
+        return {'rss_delta_bytes': entry.rss_delta, 'reported_bytes': reported}
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Per-service memory plus totals, for sizing workers"""
+        services = {name: self._memory(entry) for name, entry in self._entries.items()}
+        return {
+            'process_rss_bytes': _rss_bytes(),
+            'attributed_rss_bytes': sum(m['rss_delta_bytes'] or 0 for m in services.values()),
+            'reported_bytes': sum(m['reported_bytes'] or 0 for m in services.values()),
+            'services': services
+        }
+
+    async def warm_up(self, names: Optional[Iterable[str]] = None):
+        """Build services one after another in a worker thread
+
+        Failures are logged and recorded; the service is retried on first use.
+        """
+        if names is None:
+            names = [name for name, entry in self._entries.items() if entry.warm]
+
+        loop = asyncio.get_running_loop()
+        for name in names:
+            entry = self._entries[name]
+            try:
+                instance = await loop.run_in_executor(None, self.get, name)
+            except Exception:
+                continue
+
+            if entry.on_ready is not None:
+                try:
+                    await loop.run_in_executor(None, entry.on_ready, instance)
+                except Exception as e:
+                    logger.warning(f"⚠️ Warm-up hook for '{name}' failed: {e}")
+
+
+# Global instance
+service_registry = ServiceRegistry()
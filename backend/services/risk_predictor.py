@@ -1,7 +1,6 @@
 """
 XGBoost-based risk prediction service
 """
-import xgboost as xgb
 import numpy as np
 from typing import Dict, List
 from datetime import datetime, timedelta
@@ -0,0 +1,216 @@
+"""
+Deterministic certificate field extraction (LLM fast path)
+
+Most well-formed certificates print their number in a documented format
+(``CertificateValidator.CERTIFICATE_PATTERNS``) and their dates and parties
+next to fixed labels ("Valid until", "Certificate holder", ...). This
+extractor reads those fields from the OCR text with regexes and heuristics
+and scores each one. Only fields it cannot fill with at least
+RULE_EXTRACTOR_MIN_CONFIDENCE are sent to Gemini, and when every required
+field is confident the LLM call is skipped altogether.
+
+Confidence is a rough rule-quality score, not a probability: a number that
+matches its type's pattern scores higher than a value that merely follows a
+label, and anything that contradicts another field is scored down.
+"""
+import re
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from database.models import CertificateType
+from services.ocr_templates import EXPIRY_LABEL, ISSUED_LABEL, TEMPLATES, find_dates, find_labeled_date
+from utils.certificate_validators import CertificateValidator
+
+logger = logging.getLogger(__name__)
+
+FIELDS = (
+    'certificate_type', 'certificate_number', 'issued_by', 'issued_to',
+    'issued_date', 'expiry_date', 'scope'
+)
+
+# Header phrases for types without an OCR layout template
+_EXTRA_KEYWORDS = {
+    CertificateType.FAIR_TRADE: ('FAIRTRADE', 'FAIR TRADE', 'FLOCERT'),
+    CertificateType.ISO_9001: ('ISO 9001', 'QUALITY MANAGEMENT SYSTEM'),
+    CertificateType.ISO_14001: ('ISO 14001', 'ENVIRONMENTAL MANAGEMENT SYSTEM'),
+}
+
+_ISSUED_TO_LABEL = re.compile(
+    r'(?:issued\s+to|certificate\s+holder|awarded\s+to|granted\s+to|this\s+is\s+to\s+certify\s+that|company\s+name)'
+    r'\s*[:\-]?\s*',
+    re.IGNORECASE
+)
+_ISSUED_BY_LABEL = re.compile(
+    r'(?:issued\s+by|certification\s+body|certified\s+by|certifier)\s*[:\-]?\s*',
+    re.IGNORECASE
+)
+_SCOPE_LABEL = re.compile(r'(?:scope\s+of\s+certification|certified\s+scope|scope)\s*[:\-]\s*', re.IGNORECASE)
+
+# Number formats with a type-specific prefix; ISO patterns also match standard
+# versions like "9001 2015", so those numbers are left for the LLM to confirm
+_PREFIXED_NUMBER_TYPES = {
+    CertificateType.GOTS, CertificateType.OEKO_TEX, CertificateType.SA8000,
+    CertificateType.BSCI, CertificateType.FAIR_TRADE
+}
+
+# Certification bodies that commonly appear without an "issued by" label
+KNOWN_ISSUERS = (
+    'Control Union', 'Ecocert', 'Intertek', 'SGS', 'Bureau Veritas', 'TÜV SÜD', 'TÜV Rheinland', 'TUV',
+    'Hohenstein', 'CERES', 'ICEA', 'OneCert', 'IDFL', 'Social Accountability Accreditation Services',
+    'FLOCERT', 'amfori', 'DNV', 'LRQA', 'BSI'
+)
+
+
+@dataclass
+class RuleExtraction:
+    """Fields found by the rules, with a confidence per field"""
+    fields: Dict[str, Any] = field(default_factory=dict)
+    confidence: Dict[str, float] = field(default_factory=dict)
+
+    def set(self, name: str, value: Any, confidence: float):
+        if value is not None and confidence > self.confidence.get(name, 0.0):
+            self.fields[name] = value
+            self.confidence[name] = round(confidence, 2)
+
+    def confident(self, threshold: float) -> Dict[str, Any]:
+        """Fields at or above ``threshold``"""
+        return {name: value for name, value in self.fields.items() if self.confidence[name] >= threshold}
+
+    def missing(self, threshold: float, required: Sequence[str] = FIELDS) -> List[str]:
+        """Required fields the rules could not fill confidently"""
+        return [name for name in required if self.confidence.get(name, 0.0) < threshold]
+
+
+def _value_after(label: re.Pattern, text: str, max_length: int = 120) -> Optional[str]:
+    """Rest of the line after a label, or the next line when the label ends its line"""
+    match = label.search(text)
+    if not match:
+        return None
+    rest = text[match.end():]
+    line = rest.split('\n', 1)[0].strip(' :-\t')
+    if not line:
+        following = [part.strip() for part in rest.split('\n')[1:3] if part.strip()]
+        line = following[0] if following else ''
+    line = ' '.join(line.split())
+    return line[:max_length] or None
+
+
+def _detect_type(text: str) -> Optional[CertificateType]:
+    header = ' '.join(text.upper().split())
+    best, best_hits = None, 0
+    keywords = {cert_type: template.keywords for cert_type, template in TEMPLATES.items()}
+    keywords.update(_EXTRA_KEYWORDS)
+    for cert_type, phrases in keywords.items():
+        hits = sum(1 for phrase in phrases if phrase in header)
+        if hits > best_hits:
+            best, best_hits = cert_type, hits
+    return best
+
+
+def _find_number(text: str) -> Optional[Tuple[CertificateType, str]]:
+    """(type, number) of the first certificate number, preferring type-prefixed formats"""
+    fallback = None
+    for line in text.splitlines():
+        tokens = [token.strip('.,;:()[]') for token in line.split()]
+        candidates = tokens + [''.join(pair) for pair in zip(tokens, tokens[1:])]
+        candidates += [' '.join(pair) for pair in zip(tokens, tokens[1:])]
+        for candidate in filter(None, candidates):
+            for type_name, pattern in CertificateValidator.CERTIFICATE_PATTERNS.items():
+                if re.match(pattern, candidate, re.IGNORECASE):
+                    cert_type = CertificateType(type_name)
+                    if cert_type in _PREFIXED_NUMBER_TYPES:
+                        return cert_type, candidate.upper()
+                    fallback = fallback or (cert_type, candidate.upper())
+    return fallback
+
+
+def extract_fields(text: str) -> RuleExtraction:
+    """Run the rules over OCR text"""
+    result = RuleExtraction()
+    if not text or not text.strip():
+        return result
+
+    # Type and number: a number in its type's documented format settles both
+    keyword_type = _detect_type(text)
+    number = _find_number(text)
+    if number:
+        number_type, value = number
+        score = 0.95 if number_type in _PREFIXED_NUMBER_TYPES else 0.7
+        result.set('certificate_number', value, score)
+        result.set('certificate_type', number_type.value, score if keyword_type in (None, number_type) else 0.6)
+    if keyword_type is not None:
+        result.set('certificate_type', keyword_type.value, 0.75)
+
+    # Dates: labeled dates are reliable; two unlabeled dates are read as issue → expiry
+    issued = find_labeled_date(text, ISSUED_LABEL)
+    expiry = find_labeled_date(text, EXPIRY_LABEL)
+    if issued is not None:
+        result.set('issued_date', issued, 0.9)
+    if expiry is not None:
+        result.set('expiry_date', expiry, 0.9)
+    dates = sorted({value for _, value in find_dates(text)})
+    if len(dates) == 2:
+        result.set('issued_date', dates[0], 0.6)
+        result.set('expiry_date', dates[1], 0.6)
+
+    valid, _ = CertificateValidator.validate_dates(result.fields.get('issued_date'), result.fields.get('expiry_date'))
+    if not valid:
+        for name in ('issued_date', 'expiry_date'):
+            if name in result.confidence:
+                result.confidence[name] = 0.3
+    for name in ('issued_date', 'expiry_date'):
+        if name in result.fields:
+            result.fields[name] = result.fields[name].isoformat()
+
+    # Parties and scope follow their labels
+    result.set('issued_to', _value_after(_ISSUED_TO_LABEL, text), 0.85)
+    result.set('issued_by', _value_after(_ISSUED_BY_LABEL, text), 0.85)
+    lowered = text.lower()
+    for issuer in KNOWN_ISSUERS:
+        if re.search(rf'\b{re.escape(issuer.lower())}\b', lowered):
+            result.set('issued_by', issuer, 0.8)
+            break
+    result.set('scope', _value_after(_SCOPE_LABEL, text, max_length=300), 0.8)
+
+    return result
+
+
+class FastPathStats:
+    """How often the rules replaced the LLM, for /api/chat/llm/stats and tuning"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.documents = 0
+        self.skipped_llm = 0
+        self.fields_from_rules = 0
+        self.fields_from_llm = 0
+        self.field_hits = {name: 0 for name in FIELDS}
+
+    def record(self, rule_fields: Sequence[str], llm_fields: Sequence[str]):
+        with self._lock:
+            self.documents += 1
+            if not llm_fields:
+                self.skipped_llm += 1
+            self.fields_from_rules += len(rule_fields)
+            self.fields_from_llm += len(llm_fields)
+            for name in rule_fields:
+                if name in self.field_hits:
+                    self.field_hits[name] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            documents = self.documents or 1
+            total_fields = (self.fields_from_rules + self.fields_from_llm) or 1
+            return {
+                'documents': self.documents,
+                'llm_skipped': self.skipped_llm,
+                'fast_path_rate': self.skipped_llm / documents,
+                'rule_field_share': self.fields_from_rules / total_fields,
+                'field_hit_rate': {name: hits / documents for name, hits in self.field_hits.items()}
+            }
+
+
+# Global instance
+fast_path_stats = FastPathStats()
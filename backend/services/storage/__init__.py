@@ -16,9 +16,15 @@ class StorageService(ABC):
         file_obj: Union[UploadFile, BinaryIO],
         file_path: str,
         content_type: str = None,
-        metadata: Optional[Dict[str, str]] = None
+        metadata: Optional[Dict[str, str]] = None,
+        max_bytes: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Upload a file to storage"""
+        """Stream a file to storage in chunks
+
+        Returns the URL and key plus the ``size`` and ``sha256`` computed
+        while streaming; raises a 413 ``UploadTooLargeError`` as soon as the
+        file exceeds ``max_bytes`` (default: ``MAX_FILE_SIZE_MB``).
+        """
         pass
     
     @abstractmethod
@@ -6,10 +6,11 @@ import shutil
 import uuid
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import BinaryIO, Dict, Optional, Union
+from typing import Any, BinaryIO, Dict, Optional, Union
 from fastapi import UploadFile, HTTPException
 from urllib.parse import urljoin
 from ...utils.config import settings
+from ...utils.uploads import max_upload_bytes, save_upload
 
 class LocalStorage:
     """Local file system storage implementation"""
@@ -34,10 +35,11 @@ class LocalStorage:
         file_obj: Union[UploadFile, BinaryIO],
         file_path: str,
         content_type: str = None,
-        metadata: Optional[Dict[str, str]] = None
+        metadata: Optional[Dict[str, str]] = None,
+        max_bytes: Optional[int] = None
     ) -> Dict[str, Any]:
         """
-        Save a file to the local filesystem
+        Stream a file to the local filesystem in chunks
         """
         try:
             # Generate a unique filename
@@ -53,13 +55,9 @@ class LocalStorage:
             
             # Handle both UploadFile and file-like objects
             if hasattr(file_obj, 'file'):  # UploadFile
-                content = await file_obj.read()
                 content_type = content_type or file_obj.content_type
-            else:  # File-like object
-                content = file_obj.read()
             
-            with open(file_path, 'wb') as f:
-                f.write(content)
+            digest = await save_upload(file_obj, file_path, max_upload_bytes() if max_bytes is None else max_bytes)
             
             # Generate URL
             relative_path = str(file_path.relative_to(self.base_dir)).replace('\\', '/')
@@ -70,9 +68,13 @@ class LocalStorage:
                 "key": str(relative_path),
                 "bucket": str(self.base_dir),
                 "content_type": content_type,
-                "metadata": metadata or {}
+                "metadata": metadata or {},
+                "size": digest.size,
+                "sha256": digest.sha256
             }
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500,
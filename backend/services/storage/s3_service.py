@@ -3,12 +3,14 @@ AWS S3 Storage Service for file uploads and management
 """
 import os
 import uuid
+import asyncio
 from datetime import datetime, timedelta
 from typing import Optional, BinaryIO, Union, Dict, Any
 from fastapi import UploadFile, HTTPException
 import boto3
 from botocore.exceptions import ClientError
 from ...utils.config import settings
+from ...utils.uploads import UploadDigest, iter_upload, max_upload_bytes
 
 class S3Service:
     """AWS S3 Storage Service"""
@@ -22,52 +24,81 @@ class S3Service:
         )
         self.bucket_name = settings.S3_BUCKET_NAME
         self.presigned_url_expiry = 3600  # 1 hour
+        self.part_size = 8 * 1024 * 1024  # Multipart part size (S3 minimum is 5MB)
     
     async def upload_file(
         self,
         file_obj: Union[UploadFile, BinaryIO],
         file_path: str,
         content_type: str = None,
-        metadata: Optional[Dict[str, str]] = None
+        metadata: Optional[Dict[str, str]] = None,
+        max_bytes: Optional[int] = None
     ) -> Dict[str, Any]:
         """
-        Upload a file to S3
+        Stream a file to S3
+        
+        Files up to one part are sent with a single ``put_object``; larger
+        files use a multipart upload, so at most one part is held in memory.
         
         Args:
             file_obj: File-like object or FastAPI UploadFile
             file_path: Path where the file will be stored in the bucket
             content_type: MIME type of the file
             metadata: Additional metadata to store with the file
+            max_bytes: Size limit (default: MAX_FILE_SIZE_MB); exceeding it aborts with 413
             
         Returns:
-            Dict containing file information including URL and key
+            Dict containing file information including URL, key, size and SHA-256
         """
+        upload_id = None
+        s3_key = None
         try:
             # Generate a unique filename to prevent collisions
             file_extension = os.path.splitext(getattr(file_obj, 'filename', 'file'))[1]
             unique_filename = f"{uuid.uuid4()}{file_extension}"
             s3_key = f"{file_path}/{unique_filename}"
             
-            # Get file content
             if hasattr(file_obj, 'file'):  # Handle FastAPI UploadFile
-                file_content = await file_obj.read()
                 content_type = content_type or file_obj.content_type
-            else:  # Handle file-like object
-                file_content = file_obj.read()
             
-            # Upload to S3
             extra_args = {}
             if content_type:
                 extra_args['ContentType'] = content_type
             if metadata:
                 extra_args['Metadata'] = metadata
             
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=file_content,
-                **extra_args
-            )
+            digest = UploadDigest(max_upload_bytes() if max_bytes is None else max_bytes)
+            buffer = bytearray()
+            parts = []
+            
+            async for chunk in iter_upload(file_obj, digest):
+                buffer += chunk
+                if len(buffer) < self.part_size:
+                    continue
+                
+                # Start the multipart upload once the file outgrows a single part
+                if upload_id is None:
+                    response = await asyncio.to_thread(
+                        self.s3_client.create_multipart_upload,
+                        Bucket=self.bucket_name, Key=s3_key, **extra_args
+                    )
+                    upload_id = response['UploadId']
+                parts.append(await self._upload_part(s3_key, upload_id, len(parts) + 1, bytes(buffer)))
+                buffer.clear()
+            
+            if upload_id is None:
+                await asyncio.to_thread(
+                    self.s3_client.put_object,
+                    Bucket=self.bucket_name, Key=s3_key, Body=bytes(buffer), **extra_args
+                )
+            else:
+                if buffer:
+                    parts.append(await self._upload_part(s3_key, upload_id, len(parts) + 1, bytes(buffer)))
+                await asyncio.to_thread(
+                    self.s3_client.complete_multipart_upload,
+                    Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id,
+                    MultipartUpload={'Parts': parts}
+                )
             
             # Generate public URL
             url = f"https://{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/{s3_key}"
@@ -77,14 +108,34 @@ class S3Service:
                 "key": s3_key,
                 "bucket": self.bucket_name,
                 "content_type": content_type,
-                "metadata": metadata or {}
+                "metadata": metadata or {},
+                "size": digest.size,
+                "sha256": digest.sha256
             }
             
-        except ClientError as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to upload file to S3: {str(e)}"
-            )
+        except BaseException as e:
+            if upload_id is not None:
+                # Don't leave (billed) orphaned parts behind
+                try:
+                    await asyncio.to_thread(
+                        self.s3_client.abort_multipart_upload,
+                        Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id
+                    )
+                except ClientError:
+                    pass
+            if isinstance(e, ClientError):
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Failed to upload file to S3: {str(e)}"
+                )
+            raise
+    
+    async def _upload_part(self, key: str, upload_id: str, number: int, body: bytes) -> Dict[str, Any]:
+        response = await asyncio.to_thread(
+            self.s3_client.upload_part,
+            Bucket=self.bucket_name, Key=key, UploadId=upload_id, PartNumber=number, Body=body
+        )
+        return {'ETag': response['ETag'], 'PartNumber': number}
     
     def generate_presigned_url(self, key: str, expires_in: int = None) -> str:
         """
@@ -0,0 +1,161 @@
+"""
+Micro-batching for Gemini certificate structuring
+
+During bulk onboarding most structuring requests carry a short OCR text, so
+a per-certificate call is mostly prompt overhead and round-trip latency. The
+batcher holds requests for a short window (or until a batch is full or its
+token budget is used up), packs the texts of requests asking for the same
+fields into one indexed prompt, and splits the JSON answer back into one
+result per caller. Items the batch answer leaves out or garbles, and every
+item of a batch whose call fails outright, are retried with an individual
+request, so a batch never fails more certificates than single calls would.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+BatchRunner = Callable[[List[str], Optional[Sequence[str]]], Awaitable[List[Optional[Dict[str, Any]]]]]
+SingleRunner = Callable[[str, Optional[Sequence[str]]], Awaitable[Dict[str, Any]]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for Latin-script text)"""
+    return len(text) // 4 + 1
+
+
+class _BatchItemFailed(Exception):
+    """The batch answer had no usable result for this item"""
+
+
+# Result for a request nobody joined within the window: it goes out as a single call
+_ALONE = object()
+
+
+class _Bucket:
+    def __init__(self):
+        self.items: List[Tuple[str, asyncio.Future]] = []
+        self.tokens = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class StructureBatcher:
+    """Packs concurrent structuring requests into shared Gemini calls"""
+
+    def __init__(
+        self,
+        run_batch: BatchRunner,
+        run_single: SingleRunner,
+        window_ms: int = 100,
+        max_items: int = 8,
+        token_budget: int = 6000
+    ):
+        """Create the batcher
+
+        Args:
+            run_batch: Structures several texts in one call; one result (or None) per text, in order
+            run_single: Structures one text; used for lone requests and retries
+            window_ms: How long the first request of a batch waits for others (0 disables batching)
+            max_items: Texts per batch; a full batch is dispatched immediately
+            token_budget: Estimated OCR-text tokens per batch; larger texts go alone
+        """
+        self.run_batch = run_batch
+        self.run_single = run_single
+        self.window = window_ms / 1000
+        self.max_items = max(1, max_items)
+        self.token_budget = token_budget
+
+        self._buckets: Dict[Optional[Tuple[str, ...]], _Bucket] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats = {'requests': 0, 'batches': 0, 'batched_items': 0, 'single_calls': 0, 'retried': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_items > 1
+
+    async def structure(self, ocr_text: str, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Structured fields for one OCR text, sharing a Gemini call with concurrent requests"""
+        tokens = estimate_tokens(ocr_text)
+        if not self.enabled or tokens > self.token_budget // 2:
+            return await self._single(ocr_text, fields)
+
+        key = tuple(sorted(fields)) if fields is not None else None
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._stats['requests'] += 1
+
+        bucket = self._buckets.get(key)
+        if bucket is not None and bucket.tokens + tokens > self.token_budget:
+            self._flush(key)
+            bucket = None
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+            bucket.timer = loop.call_later(self.window, self._flush, key)
+        bucket.items.append((ocr_text, future))
+        bucket.tokens += tokens
+        if len(bucket.items) >= self.max_items:
+            self._flush(key)
+
+        try:
+            result = await future
+        except _BatchItemFailed:
+            self._stats['retried'] += 1
+            return await self._single(ocr_text, fields)
+        if result is _ALONE:
+            return await self._single(ocr_text, fields)
+        return result
+
+    async def _single(self, ocr_text: str, fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+        self._stats['single_calls'] += 1
+        return await self.run_single(ocr_text, fields)
+
+    def _flush(self, key: Optional[Tuple[str, ...]]):
+        """Dispatch the pending bucket for ``key``"""
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            return
+        if bucket.timer is not None:
+            bucket.timer.cancel()
+        task = asyncio.ensure_future(self._dispatch(list(key) if key is not None else None, bucket.items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, fields: Optional[List[str]], items: List[Tuple[str, asyncio.Future]]):
+        """Run one batch and resolve each caller's future"""
+        if len(items) == 1:
+            _, future = items[0]
+            if not future.done():
+                future.set_result(_ALONE)
+            return
+
+        self._stats['batches'] += 1
+        self._stats['batched_items'] += len(items)
+        try:
+            results = await self.run_batch([text for text, _ in items], fields)
+        except Exception as e:
+            logger.warning(f"⚠️ Structuring batch of {len(items)} failed, retrying individually: {e}")
+            results = [None] * len(items)
+
+        missing = 0
+        for (_, future), result in zip(items, list(results) + [None] * (len(items) - len(results))):
+            if future.done():
+                continue  # Caller went away
+            if isinstance(result, dict):
+                future.set_result(result)
+            else:
+                missing += 1
+                future.set_exception(_BatchItemFailed())
+        if missing:
+            logger.info(f"🔁 {missing} of {len(items)} batched certificates retried individually")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request/batch counters"""
+        batches = self._stats['batches']
+        return {
+            **self._stats,
+            'avg_batch_size': self._stats['batched_items'] / batches if batches else 0.0,
+            'window_ms': self.window * 1000,
+            'max_items': self.max_items,
+            'token_budget': self.token_budget
+        }
@@ -5,16 +5,9 @@ import logging
 from typing import Dict
 import os
 
-logger = logging.getLogger(__name__)
+from services.registry import service_registry
 
-# Try to import whisper, but don't fail if not available
-try:
-    import whisper
-    WHISPER_AVAILABLE = True
-except ImportError:
-    WHISPER_AVAILABLE = False
-    logger.warning("⚠️ Whisper not installed. Voice transcription will not be available.")
-    logger.warning("   Install with: pip install openai-whisper")
+logger = logging.getLogger(__name__)
 
 
 class VoiceService:
@@ -22,8 +15,12 @@ class VoiceService:
         """Initialize Whisper model"""
         self.model = None
         
-        if not WHISPER_AVAILABLE:
-            logger.warning("⚠️ Whisper AI not available - voice features disabled")
+        # Imported here so that importing the API does not load torch/whisper
+        try:
+            import whisper
+        except ImportError:
+            logger.warning("⚠️ Whisper not installed. Voice transcription will not be available.")
+            logger.warning("   Install with: pip install openai-whisper")
             return
         
         try:
@@ -36,6 +33,12 @@ class VoiceService:
             logger.error("   Make sure FFmpeg is installed: choco install ffmpeg")
             self.model = None
     
+    def memory_usage(self) -> int:
+        """Bytes of Whisper model weights"""
+        if self.model is None:
+            return 0
+        return sum(p.numel() * p.element_size() for p in self.model.parameters())
+    
     def transcribe_audio(
         self,
         audio_path: str,
@@ -79,5 +82,5 @@ class VoiceService:
             raise
 
 
-# Global instance
-voice_service = VoiceService()
+# Global instance (built on first use or during startup warm-up)
+voice_service = service_registry.register('voice', VoiceService)
@@ -0,0 +1,142 @@
+"""
+Unit tests for bulk certificate ingestion
+"""
+import io
+import os
+import zipfile
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from services import bulk_ingest
+from services.bulk_ingest import BulkIngestor, extract_zip
+
+
+def _zip(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def test_extract_zip_streams_supported_entries(tmp_path):
+    """Test supported files are saved under sanitized names and the rest reported"""
+    archive = _zip({
+        'gots.png': b'png',
+        'scans/oeko tex.PDF': b'pdf',
+        '../../etc/evil.jpg': b'jpg',
+        'notes.txt': b'text',
+        'huge.png': b'x' * 2048,
+        '__MACOSX/._gots.png': b'meta',
+    })
+
+    saved, skipped = extract_zip(archive, str(tmp_path), max_files=10, max_bytes=1024)
+
+    assert [item['filename'] for item in saved] == ['gots.png', 'scans/oeko tex.PDF', '../../etc/evil.jpg']
+    for item in saved:
+        assert os.path.dirname(item['file_path']) == str(tmp_path)
+    assert saved[1]['file_path'].endswith('_oeko_tex.PDF')
+    assert open(saved[2]['file_path'], 'rb').read() == b'jpg'
+    assert {item['filename']: item['status'] for item in skipped} == {'notes.txt': 'skipped', 'huge.png': 'skipped'}
+
+    saved, skipped = extract_zip(_zip({'a.png': b'1', 'b.png': b'2'}), str(tmp_path), max_files=1, max_bytes=1024)
+    assert len(saved) == 1 and 'limit' in skipped[0]['error']
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCertificates:
+    def __init__(self, existing=()):
+        self.existing = list(existing)
+        self.batches = []
+
+    def find(self, query, projection=None):
+        return FakeCursor([doc for doc in self.existing if doc['job_id'] == query['job_id']])
+
+    async def insert_many(self, docs, ordered=True):
+        for i, doc in enumerate(docs):
+            doc['_id'] = f"cert-{len(self.batches)}-{i}"
+        self.batches.append(docs)
+
+
+class FakeDB:
+    def __init__(self, certificates):
+        self.certificates = certificates
+
+
+class FakeChroma:
+    def __init__(self):
+        self.calls = []
+
+    def add_documents(self, ids, texts, metadatas):
+        self.calls.append(ids)
+
+
+@pytest.mark.asyncio
+async def test_bulk_ingestor_batches_writes_and_reports_each_file(monkeypatch):
+    """Test pipelined stages, batched insert_many/Chroma add, failures and resumed files in the manifest"""
+    async def fake_ocr(file_path, owner, profile=None, engine=None, content_hash=None):
+        if 'blurry' in file_path:
+            raise RuntimeError('OCR failed: no text')
+        return {
+            'ocr_text': f"text of {file_path}",
+            'ocr_confidence': 0.9,
+            'ocr_fields': {},
+            'ocr_profile': 'fast',
+            'ocr_engine': 'easyocr'
+        }
+
+    async def fake_structure(text, fields=None):
+        if 'garbled' in text:
+            raise ValueError('Gemini returned invalid JSON')
+        return {'certificate_type': 'GOTS', 'certificate_number': text[-5:]}
+
+    monkeypatch.setattr(bulk_ingest, 'run_ocr', fake_ocr)
+    monkeypatch.setattr(bulk_ingest, 'structure_text', fake_structure)
+
+    files = [{'filename': f"{i}.png", 'file_path': f"/up/{i}.png"} for i in range(7)]
+    files += [
+        {'filename': 'blurry.png', 'file_path': '/up/blurry.png'},
+        {'filename': 'garbled.png', 'file_path': '/up/garbled.png'},
+        {'filename': 'done.png', 'file_path': '/up/done.png'},
+    ]
+    certificates = FakeCertificates(existing=[{'_id': 'earlier', 'job_id': 'job-1', 'file_path': '/up/done.png'}])
+    chroma = FakeChroma()
+    ingestor = BulkIngestor(
+        'supplier-1', 'job-1',
+        ocr_workers=2, structure_workers=2, write_batch=3, queue_size=2,
+        db=FakeDB(certificates), chroma=chroma
+    )
+
+    manifest = await ingestor.run(files)
+
+    by_name = {entry['filename']: entry for entry in manifest}
+    assert by_name['blurry.png']['status'] == 'failed' and by_name['blurry.png']['stage'] == 'ocr'
+    assert by_name['garbled.png']['status'] == 'failed' and by_name['garbled.png']['stage'] == 'structure'
+    assert by_name['done.png'] == {'filename': 'done.png', 'status': 'processed', 'certificate_id': 'earlier'}
+    for i in range(7):
+        entry = by_name[f"{i}.png"]
+        assert entry['status'] == 'processed' and entry['certificate_type'] == 'GOTS'
+
+    inserted = [doc for batch in certificates.batches for doc in batch]
+    assert len(inserted) == 7 and all(len(batch) <= 3 for batch in certificates.batches)
+    assert len(certificates.batches) < 7
+    assert all(doc['job_id'] == 'job-1' and doc['supplier_id'] == 'supplier-1' for doc in inserted)
+    assert sum(len(ids) for ids in chroma.calls) == 7 and len(chroma.calls) == len(certificates.batches)
+    assert ingestor.summary(manifest) == {'files': 10, 'processed': 8, 'failed': 2, 'skipped': 0}
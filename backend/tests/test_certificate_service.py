@@ -252,3 +252,25 @@ async def test_delete_certificate(cert_service):
     # Verify results
     assert result is True
     cert_service.certificates_collection.delete_one.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_extract_structured_data_caches_llm_result(cert_service, monkeypatch):
+    """Test structured data comes from the LLM once and from the extraction cache afterwards"""
+    from services import certificate_service as certificate_module
+    from services.extraction_cache import ExtractionCache
+    
+    collection = AsyncMock()
+    collection.find_one.return_value = None
+    monkeypatch.setattr(certificate_module, "extraction_cache", ExtractionCache(db={"extraction_cache": collection}))
+    
+    llm = MagicMock()
+    llm.primary_model = "test-model"
+    llm.chat_completion = AsyncMock(return_value='Here you go: {"certificate_type": "GOTS", "certificate_number": "GOTS-23-ABC12345"}')
+    cert_service.llm_service = llm
+    
+    first = await cert_service._extract_structured_data("GOTS certificate text", "gots.pdf")
+    second = await cert_service._extract_structured_data("GOTS  certificate\ntext", "gots.pdf")
+    
+    assert first == second == {"certificate_type": "GOTS", "certificate_number": "GOTS-23-ABC12345"}
+    llm.chat_completion.assert_awaited_once()
+    assert llm.chat_completion.await_args.kwargs == {"use_rag": False}
@@ -0,0 +1,241 @@
+"""
+Unit tests for the durable MongoDB job queue (lease, retry and dead-letter logic)
+"""
+import copy
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from services.durable_queue import LEASED, DurableQueue, backoff_delay, claim_filter, expired_filter
+from services.job_queue import FAILED, QUEUED, RUNNING, SKIPPED, SUCCEEDED
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        if key == '$or':
+            if not any(_matches(doc, sub) for sub in condition):
+                return False
+            continue
+        value = doc.get(key)
+        if isinstance(condition, dict):
+            for op, operand in condition.items():
+                if op == '$in' and value not in operand:
+                    return False
+                if op == '$lte' and (value is None or value > operand):
+                    return False
+                if op == '$lt' and (value is None or value >= operand):
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCollection:
+    """In-memory stand-in for the handful of Motor collection calls the queue makes"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def count_documents(self, query):
+        return sum(_matches(doc, query) for doc in self.docs.values())
+
+    async def insert_one(self, doc):
+        self.docs[doc['_id']] = copy.deepcopy(doc)
+
+    async def replace_one(self, query, doc, upsert=False):
+        self.docs[doc['_id']] = copy.deepcopy(doc)
+
+    def _apply(self, doc, update):
+        for path, value in update.get('$set', {}).items():
+            target, *rest = path.split('.')
+            if rest:
+                doc[target][int(rest[0])] = copy.deepcopy(value)
+            else:
+                doc[target] = copy.deepcopy(value)
+        for path, value in update.get('$inc', {}).items():
+            doc[path] = doc.get(path, 0) + value
+
+    async def update_one(self, query, update):
+        for doc in self.docs.values():
+            if _matches(doc, query):
+                self._apply(doc, update)
+                return type('Result', (), {'matched_count': 1})()
+        return type('Result', (), {'matched_count': 0})()
+
+    async def find_one_and_update(self, query, update, sort=None, return_document=None):
+        field = sort[0][0] if sort else 'available_at'
+        candidates = sorted((d for d in self.docs.values() if _matches(d, query)), key=lambda d: d[field])
+        if not candidates:
+            return None
+        self._apply(candidates[0], update)
+        return copy.deepcopy(candidates[0])
+
+    async def find_one(self, query):
+        doc = self.docs.get(query['_id'])
+        return copy.deepcopy(doc) if doc else None
+
+
+def make_queue(**options):
+    db = {'jobs': FakeCollection(), 'jobs_dead': FakeCollection()}
+    return DurableQueue(db=db, backoff_base=0, backoff_max=0, **options), db
+
+
+def test_backoff_doubles_up_to_the_cap():
+    """Test exponential retry delays"""
+    delays = [backoff_delay(attempt, 5, 30, jitter=0) for attempt in range(1, 6)]
+    assert delays == [5, 10, 20, 30, 30]
+
+
+def test_claim_filter_takes_due_jobs_and_expired_filter_finds_lost_leases():
+    """Test which documents are claimable, and which leases must be settled first"""
+    now = datetime.utcnow()
+    query = claim_filter(['ocr'], now)
+    due = {'stage': 'ocr', 'status': QUEUED, 'available_at': now - timedelta(seconds=1)}
+    backing_off = {'stage': 'ocr', 'status': QUEUED, 'available_at': now + timedelta(seconds=30)}
+    expired = {'stage': 'ocr', 'status': LEASED, 'lease_expires_at': now - timedelta(seconds=1)}
+    held = {'stage': 'ocr', 'status': LEASED, 'lease_expires_at': now + timedelta(seconds=60)}
+    other_stage = dict(due, stage='index')
+
+    assert [_matches(d, query) for d in (due, backing_off, expired, held, other_stage)] == [
+        True, False, False, False, False
+    ]
+    query = expired_filter(['ocr'], now)
+    assert [_matches(d, query) for d in (due, backing_off, expired, held, other_stage)] == [
+        False, False, True, False, False
+    ]
+
+
+@pytest.mark.asyncio
+async def test_job_advances_through_stages_under_lease():
+    """Test claim → run → advance until the job succeeds"""
+    queue, db = make_queue()
+
+    async def ocr(job):
+        job.context['text'] = 'GOTS'
+
+    async def store(job):
+        job.result = {'text': job.context['text']}
+
+    queue.register_stage('ocr', ocr)
+    queue.register_stage('store', store)
+    queue.register_pipeline('upload', ['ocr', 'store'])
+
+    job = await queue.submit('upload', {'file_path': 'x.png'}, owner='u1')
+    assert await queue.claim(['store']) is None
+
+    doc = await queue.claim(['ocr'])
+    assert doc['lease_owner'] == queue.worker_id and doc['attempts'] == 1
+    assert await queue.claim(['ocr']) is None  # Leased, not visible to other workers
+    await queue.process(doc)
+
+    assert (await queue.find(job.id)).status == RUNNING
+    await queue.process(await queue.claim(['store']))
+
+    finished = await queue.find(job.id)
+    assert finished.status == SUCCEEDED
+    assert finished.info()['result'] == {'text': 'GOTS'}
+    assert [s['status'] for s in finished.info()['stages']] == [SUCCEEDED, SUCCEEDED]
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed_and_stale_worker_loses():
+    """Test a crashed worker's job is picked up again and its late result is ignored"""
+    queue, db = make_queue()
+    calls = []
+
+    async def ocr(job):
+        calls.append(job.id)
+
+    queue.register_stage('ocr', ocr)
+    queue.register_pipeline('p', ['ocr'])
+    job = await queue.submit('p', {})
+
+    stale = await queue.claim(['ocr'])
+    db['jobs'].docs[job.id]['lease_expires_at'] = datetime.utcnow() - timedelta(seconds=1)
+
+    queue.worker_id = 'other-node:1'
+    fresh = await queue.claim(['ocr'])
+    assert fresh['attempts'] == 2
+    await queue.process(fresh)
+
+    queue.worker_id = stale['lease_owner']
+    await queue.process(stale)
+    assert queue._stats['lost_leases'] == 1
+    assert (await queue.find(job.id)).status == SUCCEEDED
+
+
+@pytest.mark.asyncio
+async def test_failures_retry_then_dead_letter():
+    """Test retries up to max_attempts, then the dead-letter collection"""
+    queue, db = make_queue(max_attempts=2)
+    cleaned = []
+
+    async def broken(job):
+        raise RuntimeError('model not found')
+
+    async def never(job):
+        raise AssertionError('should not run')
+
+    async def cleanup(job):
+        cleaned.append(job.id)
+
+    queue.register_stage('ocr', broken)
+    queue.register_stage('store', never)
+    queue.register_pipeline('p', ['ocr', 'store'], on_finish=cleanup)
+    job = await queue.submit('p', {})
+
+    await queue.process(await queue.claim(['ocr']))
+    retry = db['jobs'].docs[job.id]
+    assert retry['status'] == QUEUED and retry['error'] == 'model not found'
+    assert cleaned == []
+
+    await queue.process(await queue.claim(['ocr']))
+    failed = await queue.find(job.id)
+    assert failed.status == FAILED
+    assert [s.status for s in failed.stages] == [FAILED, SKIPPED]
+    assert job.id in db['jobs_dead'].docs
+    assert cleaned == [job.id]
+    assert await queue.claim(['ocr']) is None
+
+
+@pytest.mark.asyncio
+async def test_job_that_keeps_losing_its_lease_is_dead_lettered():
+    """Test a stage that kills its worker is retried with backoff, then dead-lettered"""
+    queue, db = make_queue(max_attempts=2)
+    cleaned = []
+
+    async def crashes_worker(job):
+        raise AssertionError('the worker dies before it can report anything')
+
+    async def cleanup(job):
+        cleaned.append(job.id)
+
+    queue.register_stage('ocr', crashes_worker)
+    queue.register_pipeline('p', ['ocr'], on_finish=cleanup)
+    job = await queue.submit('p', {})
+
+    def crash():
+        db['jobs'].docs[job.id]['lease_expires_at'] = datetime.utcnow() - timedelta(seconds=1)
+
+    assert (await queue.claim(['ocr']))['attempts'] == 1
+    crash()
+
+    # The lost attempt is retried only after its backoff
+    queue.backoff_base = queue.backoff_max = 60
+    assert await queue.claim(['ocr']) is None
+    retry = db['jobs'].docs[job.id]
+    assert retry['status'] == QUEUED and retry['available_at'] > datetime.utcnow()
+
+    retry['available_at'] = datetime.utcnow() - timedelta(seconds=1)
+    assert (await queue.claim(['ocr']))['attempts'] == 2
+    crash()
+
+    assert await queue.claim(['ocr']) is None
+    failed = await queue.find(job.id)
+    assert failed.status == FAILED and 'lost its lease' in failed.error
+    assert job.id in db['jobs_dead'].docs
+    assert cleaned == [job.id]
+    assert queue._stats['expired_leases'] == 2 and queue._stats['dead_lettered'] == 1
+    assert await queue.claim(['ocr']) is None
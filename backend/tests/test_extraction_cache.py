@@ -0,0 +1,124 @@
+"""
+Unit tests for the structured-extraction result cache
+"""
+import copy
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from services.extraction_cache import ExtractionCache, normalize_text, prompt_version
+
+
+class FakeCollection:
+    """In-memory stand-in for the Motor collection calls the cache makes"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def create_index(self, *args, **kwargs):
+        pass
+
+    async def find_one(self, query):
+        doc = self.docs.get(query['_id'])
+        if doc is None or doc['expires_at'] <= query['expires_at']['$gt']:
+            return None
+        return copy.deepcopy(doc)
+
+    async def replace_one(self, query, doc, upsert=False):
+        self.docs[query['_id']] = copy.deepcopy(doc)
+
+    async def delete_many(self, query):
+        doomed = [
+            key for key, doc in self.docs.items()
+            if doc['namespace'] == query['namespace']
+            and ('version' not in query or doc['version'] != query['version']['$ne'])
+        ]
+        for key in doomed:
+            del self.docs[key]
+        return type('Result', (), {'deleted_count': len(doomed)})()
+
+
+def make_cache(db=None, **options):
+    db = db if db is not None else {'extraction_cache': FakeCollection()}
+    return ExtractionCache(db=db, **options), db
+
+
+def counting_extractor(result):
+    calls = []
+
+    async def extract():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return dict(result)
+    return extract, calls
+
+
+def test_key_ignores_layout_whitespace_but_not_prompt_version():
+    """Test normalized text shares a key and a new prompt version does not"""
+    assert normalize_text('  GOTS\n\nCertificate   No. 12\t') == 'GOTS Certificate No. 12'
+    v1, v2 = prompt_version('prompt v1', 'gemini'), prompt_version('prompt v2', 'gemini')
+    key = ExtractionCache.make_key('structure', v1, 'GOTS\nCertificate')
+    assert key == ExtractionCache.make_key('structure', v1, ' GOTS   Certificate ')
+    assert key != ExtractionCache.make_key('structure', v2, 'GOTS Certificate')
+    assert key != ExtractionCache.make_key('structure', v1, 'GOTS Certificate', context='report.pdf')
+
+
+@pytest.mark.asyncio
+async def test_hits_skip_extraction_across_tiers_and_processes():
+    """Test memory hits, MongoDB hits from a fresh process, and that failures are not cached"""
+    cache, db = make_cache()
+    extract, calls = counting_extractor({'certificate_type': 'GOTS'})
+
+    assert await cache.get_or_extract('structure', 'v1', 'GOTS  text', extract) == {'certificate_type': 'GOTS'}
+    assert await cache.get_or_extract('structure', 'v1', 'GOTS text\n', extract) == {'certificate_type': 'GOTS'}
+    assert len(calls) == 1 and cache.get_stats()['memory_hits'] == 1
+
+    other_process, _ = make_cache(db=db)
+    assert await other_process.get_or_extract('structure', 'v1', 'GOTS text', extract) == {'certificate_type': 'GOTS'}
+    assert len(calls) == 1 and other_process.get_stats()['db_hits'] == 1
+
+    async def broken():
+        raise ValueError('Failed to structure certificate data')
+
+    with pytest.raises(ValueError):
+        await cache.get_or_extract('structure', 'v1', 'garbled', broken)
+    assert ExtractionCache.make_key('structure', 'v1', 'garbled') not in db['extraction_cache'].docs
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_call_and_entries_expire():
+    """Test single-flight extraction, TTL expiry and prompt-version invalidation"""
+    cache, db = make_cache()
+    extract, calls = counting_extractor({'certificate_type': 'OEKO-TEX'})
+
+    results = await asyncio.gather(*(cache.get_or_extract('structure', 'v1', 'same text', extract) for _ in range(5)))
+    assert len(calls) == 1 and all(r == {'certificate_type': 'OEKO-TEX'} for r in results)
+    assert cache.get_stats()['shared_calls'] == 4
+
+    expired, _ = make_cache(ttl_seconds=0)
+    await expired.get_or_extract('structure', 'v1', 'text', extract)
+    await expired.get_or_extract('structure', 'v1', 'text', extract)
+    assert len(calls) == 3
+
+    await cache.get_or_extract('structure', 'v2', 'same text', extract)
+    assert await cache.invalidate('structure', keep_version='v2') == 1
+    assert [doc['version'] for doc in db['extraction_cache'].docs.values()] == ['v2']
+    assert all(doc['expires_at'] > datetime.utcnow() for doc in db['extraction_cache'].docs.values())
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_extraction():
+    """Test waiters still get the result when the request that started the extraction goes away"""
+    cache, db = make_cache()
+    extract, calls = counting_extractor({'certificate_type': 'SA8000'})
+
+    owner = asyncio.ensure_future(cache.get_or_extract('structure', 'v1', 'shared text', extract))
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(cache.get_or_extract('structure', 'v1', 'shared text', extract))
+    await asyncio.sleep(0)
+    owner.cancel()
+
+    assert await waiter == {'certificate_type': 'SA8000'}
+    assert owner.cancelled() and len(calls) == 1
+    assert len(db['extraction_cache'].docs) == 1
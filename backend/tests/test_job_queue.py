@@ -0,0 +1,131 @@
+"""
+Unit tests for the staged background job queue
+"""
+import asyncio
+
+import pytest
+
+from services.job_queue import FAILED, SKIPPED, SUCCEEDED, JobQueue, QueueFullError
+
+
+@pytest.mark.asyncio
+async def test_job_runs_through_stages_with_bounded_concurrency():
+    """Test stages run in order and never exceed their worker count"""
+    queue = JobQueue(concurrency={'slow': 2})
+    active = {'now': 0, 'peak': 0}
+
+    async def slow(job):
+        active['now'] += 1
+        active['peak'] = max(active['peak'], active['now'])
+        await asyncio.sleep(0.02)
+        active['now'] -= 1
+        job.context['trail'] = ['slow']
+
+    async def fast(job):
+        job.context['trail'].append('fast')
+        job.result = {'value': job.context['value'] * 2}
+
+    queue.register_stage('slow', slow)
+    queue.register_stage('fast', fast)
+    queue.register_pipeline('double', ['slow', 'fast'])
+
+    jobs = [await queue.submit('double', {'value': i}, owner='u1') for i in range(6)]
+    for job in jobs:
+        await queue.wait(job.id, timeout=5)
+    await queue.stop()
+
+    assert active['peak'] == 2
+    for i, job in enumerate(jobs):
+        info = job.info()
+        assert info['status'] == SUCCEEDED
+        assert info['result'] == {'value': i * 2}
+        assert job.context['trail'] == ['slow', 'fast']
+        assert [s['status'] for s in info['stages']] == [SUCCEEDED, SUCCEEDED]
+        assert info['stages'][0]['run_time'] >= 0.02
+    assert queue.get_stats()['stages']['slow']['processed'] == 6
+
+
+@pytest.mark.asyncio
+async def test_failed_stage_skips_the_rest_and_runs_cleanup():
+    """Test a failing stage marks the job failed, skips later stages and still cleans up"""
+    queue = JobQueue()
+    cleaned = []
+
+    async def broken(job):
+        raise RuntimeError('OCR failed: unreadable')
+
+    async def never(job):
+        raise AssertionError('should not run')
+
+    async def cleanup(job):
+        cleaned.append(job.id)
+
+    queue.register_stage('ocr', broken)
+    queue.register_stage('store', never)
+    queue.register_pipeline('upload', ['ocr', 'store'], on_finish=cleanup)
+
+    job = await queue.submit('upload', {})
+    await queue.wait(job.id, timeout=5)
+    await queue.stop()
+
+    info = job.info()
+    assert info['status'] == FAILED
+    assert info['error'] == 'OCR failed: unreadable'
+    assert [s['status'] for s in info['stages']] == [FAILED, SKIPPED]
+    assert info['result'] is None
+    assert cleaned == [job.id]
+
+
+@pytest.mark.asyncio
+async def test_submit_refuses_jobs_beyond_max_pending():
+    """Test admission control and unknown pipelines"""
+    queue = JobQueue(max_pending=1)
+    release = asyncio.Event()
+
+    async def blocked(job):
+        await release.wait()
+
+    queue.register_stage('work', blocked)
+    queue.register_pipeline('p', ['work'])
+
+    with pytest.raises(ValueError):
+        await queue.submit('missing', {})
+
+    first = await queue.submit('p', {})
+    with pytest.raises(QueueFullError):
+        await queue.submit('p', {})
+
+    release.set()
+    await queue.wait(first.id, timeout=5)
+    second = await queue.submit('p', {})
+    await queue.wait(second.id, timeout=5)
+    await queue.stop()
+    assert queue.get_stats()['rejected'] == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_cleans_up_jobs_still_in_flight(tmp_path):
+    """Test shutting down runs the finish hook, removing the working copy of an unfinished job"""
+    pytest.importorskip("bson")  # services.certificate_pipeline
+    from services.certificate_pipeline import remove_working_copy
+
+    queue = JobQueue()
+    started = asyncio.Event()
+
+    async def stuck(job):
+        started.set()
+        await asyncio.sleep(60)
+
+    queue.register_stage('ocr', stuck)
+    queue.register_pipeline('certificate', ['ocr'], on_finish=remove_working_copy)
+
+    work_file = tmp_path / "upload.pdf"
+    work_file.write_bytes(b"%PDF-1.4")
+    running = await queue.submit('certificate', {'file_path': str(work_file)})
+    waiting = await queue.submit('certificate', {'file_path': str(tmp_path / "missing.pdf")})
+    await asyncio.wait_for(started.wait(), timeout=5)
+
+    await queue.stop()
+
+    assert running.status == FAILED and waiting.status == FAILED
+    assert not work_file.exists()
@@ -0,0 +1,99 @@
+"""
+Unit tests for LLM provider routing (circuit breakers, deadline, hedging)
+"""
+import asyncio
+
+import pytest
+
+from services.llm_router import CLOSED, HALF_OPEN, OPEN, LLMRouter, NoProviderAvailable
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def answer(value, delay=0.0):
+    async def call():
+        await asyncio.sleep(delay)
+        return value
+    return call
+
+
+def broken(message='429 rate limited'):
+    async def call():
+        raise RuntimeError(message)
+    return call
+
+
+@pytest.mark.asyncio
+async def test_failing_provider_opens_circuit_then_probes_after_cooldown():
+    """Test failures fall back, open the circuit, skip the provider, and a probe closes it again"""
+    clock = FakeClock()
+    router = LLMRouter(deadline=5, failure_threshold=2, cooldown=30, hedge=False, clock=clock)
+
+    for _ in range(2):
+        assert await router.call([('groq', broken()), ('gemma', answer('fallback'))]) == 'fallback'
+    assert router.providers['groq'].state == OPEN
+
+    calls = []
+
+    async def groq():
+        calls.append('groq')
+        return 'primary'
+
+    assert await router.call([('groq', groq), ('gemma', answer('fallback'))]) == 'fallback'
+    assert calls == [] and router.providers['groq'].totals['skipped'] == 1
+
+    clock.now += 31
+    assert router.order(['groq', 'gemma']) == ['gemma', 'groq']
+    assert router.providers['groq'].state == HALF_OPEN
+    assert await router.call([('groq', groq)]) == 'primary'
+    assert router.providers['groq'].state == CLOSED
+
+    stats = router.get_stats()['providers']
+    assert stats['groq']['circuit_opened'] == 1 and stats['groq']['failures'] == 2
+    assert stats['gemma']['error_rate'] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_slow_provider_gets_only_its_share_of_the_deadline():
+    """Test a hanging primary is cut off so the fallback answers within the deadline"""
+    router = LLMRouter(deadline=0.4, hedge=False)
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    result = await router.call([('groq', answer('late', delay=5)), ('gemma', answer('fallback'))])
+
+    assert result == 'fallback'
+    assert loop.time() - start < 0.4
+    assert 'no answer within' in router.providers['groq'].last_error
+
+    with pytest.raises(NoProviderAvailable):
+        await router.call([('groq', answer('late', delay=5))], deadline=0.05)
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_after_p95_wins_and_loser_is_cancelled():
+    """Test a second request goes out once the first exceeds its p95, and the first answer wins"""
+    router = LLMRouter(deadline=5, hedge=True, hedge_min_delay=0)
+    for _ in range(5):
+        router.provider('groq').record_success(0.02)
+
+    cancelled = []
+
+    async def slow_groq():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append('groq')
+            raise
+        return 'primary'
+
+    assert await router.call([('groq', slow_groq), ('gemma', answer('hedged', delay=0.01))]) == 'hedged'
+    await asyncio.sleep(0)
+    assert cancelled == ['groq']
+    assert router.providers['gemma'].totals['hedged'] == 1
@@ -0,0 +1,76 @@
+"""
+Unit tests for the async LLM service clients
+"""
+import time
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("groq")
+httpx = pytest.importorskip("httpx")
+
+from services.llm_router import LLMRouter
+from services.llm_service import LLMService
+
+
+class SlowCompletions:
+    """Async stand-in for Groq chat.completions that takes a fixed time per call"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    async def create(self, model, messages, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        message = SimpleNamespace(content=f"answer to {messages[-1]['content']}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def make_service(completions=None, openrouter_client=None):
+    service = LLMService.__new__(LLMService)
+    service.router = LLMRouter(deadline=5, hedge=False)
+    service.groq_client = SimpleNamespace(chat=SimpleNamespace(completions=completions)) if completions else None
+    service.primary_model = 'primary'
+    service.reasoning_model = 'reasoning'
+    service.openrouter_key = 'key' if openrouter_client else None
+    service.fallback_model = 'gemma'
+    service.openrouter_client = openrouter_client
+    return service
+
+
+@pytest.mark.asyncio
+async def test_concurrent_chats_do_not_serialize():
+    """Test concurrent chat calls overlap instead of blocking the event loop"""
+    completions = SlowCompletions(delay=0.2)
+    service = make_service(completions)
+
+    start = time.perf_counter()
+    answers = await asyncio.gather(*(
+        service.chat_completion(f"q{i}", use_rag=False) for i in range(10)
+    ))
+
+    assert answers == [f"answer to q{i}" for i in range(10)]
+    assert completions.peak == 10
+    assert time.perf_counter() - start < 1.0
+
+
+@pytest.mark.asyncio
+async def test_openrouter_fallback_uses_pooled_client():
+    """Test the Gemma fallback goes through the async OpenRouter client"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={'choices': [{'message': {'content': 'fallback answer'}}]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler), headers={'Authorization': 'Bearer key'})
+    service = make_service(openrouter_client=client)
+
+    assert await service.chat_completion('hello', use_rag=False) == 'fallback answer'
+    assert requests[0].headers['Authorization'] == 'Bearer key'
+    await service.aclose()
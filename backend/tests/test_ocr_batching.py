@@ -0,0 +1,63 @@
+"""
+Unit tests for the OCR micro-batching scheduler
+"""
+import threading
+
+from services.ocr_batching import OCRBatchScheduler
+
+
+class FakePool:
+    """Stands in for OCRProcessPool; records which thread ran each call"""
+
+    def __init__(self, max_workers=4, busy=0):
+        self.max_workers = max_workers
+        self.max_pending = max_workers * 2
+        self.busy = busy
+        self.calls = []
+        self._lock = threading.Lock()
+        self._started = threading.Barrier(max(1, min(max_workers - busy, 4)), timeout=2)
+
+    @property
+    def idle_workers(self):
+        return max(0, self.max_workers - self.busy)
+
+    def _record(self, images):
+        with self._lock:
+            self.calls.append(list(images))
+        try:
+            self._started.wait()  # Every part must be in flight at the same time
+        except threading.BrokenBarrierError:
+            pass
+        return [[(None, image, 1.0)] for image in images]
+
+    def readtext(self, image, language='en', **options):
+        return self._record([image])[0]
+
+    def readtext_batch(self, images, language='en', **options):
+        return self._record(images)
+
+
+def test_bucket_is_spread_across_idle_workers():
+    """Test one full bucket runs on several workers at once instead of serially on one"""
+    pool = FakePool(max_workers=4)
+    scheduler = OCRBatchScheduler(pool, window_ms=1000, max_batch=8)
+
+    futures = [scheduler.submit(f"img-{i}") for i in range(8)]
+    results = [future.result(timeout=5) for future in futures]
+
+    assert [r[0][1] for r in results] == [f"img-{i}" for i in range(8)]
+    assert sorted(len(call) for call in pool.calls) == [2, 2, 2, 2]
+    assert scheduler.get_stats()['batches'] == 4
+    scheduler.shutdown()
+
+
+def test_busy_pool_stacks_images_on_the_idle_worker():
+    """Test images are batched onto one worker when the others are occupied"""
+    pool = FakePool(max_workers=4, busy=3)
+    scheduler = OCRBatchScheduler(pool, window_ms=1000, max_batch=4)
+
+    futures = [scheduler.submit(f"img-{i}") for i in range(4)]
+    [future.result(timeout=5) for future in futures]
+
+    assert pool.calls == [['img-0', 'img-1', 'img-2', 'img-3']]
+    scheduler.shutdown()
@@ -0,0 +1,109 @@
+"""
+Unit tests for the content-addressed OCR result cache
+"""
+import io
+import pytest
+
+from services.ocr_cache import OCRResultCache, hash_content
+
+SAMPLE_RESULT = {
+    "text": "GLOBAL ORGANIC TEXTILE STANDARD\nGOTS-23-ABC12345",
+    "text_blocks": [
+        {
+            "text": "GOTS-23-ABC12345",
+            "confidence": 0.93,
+            "bounding_box": {"x": 10, "y": 20, "width": 200, "height": 30}
+        }
+    ],
+    "confidence": 0.93,
+    "processing_time": 4.2,
+    "language": "en",
+    "page_count": 1
+}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture for a cache with a small memory tier"""
+    return OCRResultCache(cache_dir=tmp_path / "ocr_cache", memory_entries=2)
+
+
+def test_hash_content_matches_for_bytes_path_and_file(tmp_path):
+    """Test that the same content hashes identically regardless of input type"""
+    data = b"fake certificate scan"
+    path = tmp_path / "scan.png"
+    path.write_bytes(data)
+    stream = io.BytesIO(data)
+
+    assert hash_content(data) == hash_content(path) == hash_content(stream)
+    assert stream.tell() == 0
+
+
+def test_make_key_depends_on_language_and_params():
+    """Test that language and preprocessing parameters change the key"""
+    base = OCRResultCache.make_key("abc", "en", {"max_dim": 2000})
+
+    assert base == OCRResultCache.make_key("abc", "en", {"max_dim": 2000})
+    assert base != OCRResultCache.make_key("abc", "ta", {"max_dim": 2000})
+    assert base != OCRResultCache.make_key("abc", "en", {"max_dim": 1600})
+
+
+def test_put_and_get_roundtrip(cache):
+    """Test a stored result is returned and counted as a memory hit"""
+    cache.put("key1", SAMPLE_RESULT)
+
+    result = cache.get("key1")
+
+    assert result == SAMPLE_RESULT
+    assert cache.get_stats()["memory_hits"] == 1
+
+
+def test_get_returns_copy(cache):
+    """Test that mutating a returned result does not corrupt the cache"""
+    cache.put("key1", SAMPLE_RESULT)
+
+    cache.get("key1")["text"] = "changed"
+
+    assert cache.get("key1")["text"] == SAMPLE_RESULT["text"]
+
+
+def test_miss_is_counted(cache):
+    """Test that a lookup for an unknown key counts as a miss"""
+    assert cache.get("missing") is None
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_memory_eviction_falls_back_to_disk(cache):
+    """Test LRU eviction from memory still serves the entry from disk"""
+    for i in range(3):
+        cache.put(f"key{i}", {**SAMPLE_RESULT, "page_count": i})
+
+    stats = cache.get_stats()
+    assert stats["memory_entries"] == 2
+    assert stats["memory_evictions"] == 1
+
+    assert cache.get("key0")["page_count"] == 0
+    assert cache.get_stats()["disk_hits"] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Test a new cache instance picks up entries persisted by a previous one"""
+    OCRResultCache(cache_dir=tmp_path).put("key1", SAMPLE_RESULT)
+
+    reopened = OCRResultCache(cache_dir=tmp_path)
+
+    assert reopened.get("key1") == SAMPLE_RESULT
+    assert reopened.get_stats()["disk_hits"] == 1
+
+
+def test_disk_eviction_respects_size_budget(tmp_path):
+    """Test the disk tier drops least recently used entries when over budget"""
+    cache = OCRResultCache(cache_dir=tmp_path, memory_entries=1, disk_max_bytes=1000)
+
+    for i in range(5):
+        cache.put(f"key{i}", SAMPLE_RESULT)
+
+    stats = cache.get_stats()
+    assert stats["disk_bytes"] <= 1000
+    assert stats["disk_evictions"] > 0
+    assert cache.get("key0") is None
@@ -0,0 +1,81 @@
+"""
+Unit tests for the document crop/deskew stage
+"""
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from services import ocr_crop
+from services.ocr_crop import crop_document, estimate_text_height
+
+
+def make_page(size=(1240, 1754), line_height=40) -> Image.Image:
+    """Create a white certificate page with rows of dark text"""
+    page = Image.new('L', size, 235)
+    draw = ImageDraw.Draw(page)
+    try:
+        font = ImageFont.load_default(size=line_height)
+    except TypeError:
+        font = ImageFont.load_default()
+    for y in range(150, size[1] - 150, int(line_height * 2.2)):
+        draw.text((100, y), "GOTS-23-ABC12345 Valid until 2026", fill=20, font=font)
+    return page
+
+
+def make_photo(page: Image.Image, angle: float = 7) -> np.ndarray:
+    """Paste a rotated page onto a dark, noisy tabletop"""
+    rotated = page.rotate(angle, expand=True, fillcolor=40, resample=Image.BILINEAR)
+    photo = Image.new('L', (rotated.width + 900, rotated.height + 700), 50)
+    photo.paste(rotated, (450, 350))
+    noise = np.random.default_rng(0).normal(0, 6, (photo.height, photo.width))
+    return (np.asarray(photo) + noise).clip(0, 255).astype(np.uint8)
+
+
+@pytest.fixture(params=[True, False], ids=['opencv', 'numpy'])
+def backend(request, monkeypatch):
+    """Run each test with the OpenCV path and with the NumPy fallback"""
+    if request.param and not ocr_crop.OPENCV_AVAILABLE:
+        pytest.skip("OpenCV not installed")
+    monkeypatch.setattr(ocr_crop, 'OPENCV_AVAILABLE', request.param)
+    return 'opencv' if request.param else 'numpy'
+
+
+def test_crops_and_deskews_photographed_page(backend):
+    """Test the page is found, straightened and most of the background removed"""
+    page = make_page()
+    result = crop_document(make_photo(page, angle=7))
+
+    assert result.applied and result.method == backend
+    assert abs(abs(result.skew_angle) - 7) < 1.5
+    assert result.area_removed_pct > 50
+    # The cropped page is close to the original page size
+    height, width = result.image.shape
+    assert abs(width - page.width) < 0.05 * page.width
+    assert abs(height - page.height) < 0.05 * page.height
+
+
+def test_full_bleed_scan_is_left_alone(backend):
+    """Test a scan with no background around the page is not cropped"""
+    gray = np.asarray(make_page())
+    result = crop_document(gray)
+
+    assert not result.applied
+    assert result.area_removed_pct == 0
+    assert result.image.shape == gray.shape
+
+
+def test_downsamples_to_target_text_height_without_upscaling():
+    """Test large text is shrunk towards the target and small text is never enlarged"""
+    large = np.asarray(make_page(line_height=80))
+    text_height = estimate_text_height(large)
+    assert text_height is not None and text_height > 50
+
+    result = crop_document(large, target_text_height=30)
+    assert result.scale < 1
+    assert result.area_removed_pct > 50
+    assert estimate_text_height(result.image) < text_height * 0.7
+
+    small = np.asarray(make_page(line_height=20))
+    result = crop_document(small, target_text_height=60)
+    assert result.scale == 1
+    assert result.image.shape == small.shape
@@ -0,0 +1,71 @@
+"""
+Unit tests for the pluggable OCR engines
+"""
+import numpy as np
+import pytest
+
+from services.ocr_engines import create_engine
+from services.ocr_profiles import resolve_profile
+
+
+def test_create_engine_rejects_unknown_names():
+    """Test the factory only builds known engines"""
+    with pytest.raises(ValueError):
+        create_engine('paddle')
+
+
+def test_engine_selected_per_request_and_tenant(monkeypatch):
+    """Test request > tenant > default precedence for the engine, carried on the profile"""
+    from utils.config import settings
+
+    monkeypatch.setattr(settings, 'OCR_DEFAULT_ENGINE', 'easyocr')
+    monkeypatch.setattr(settings, 'OCR_TENANT_ENGINES', {'supplier-1': 'onnx'})
+
+    assert resolve_profile('fast').engine == 'easyocr'
+    assert resolve_profile('fast', tenant_id='supplier-1').engine == 'onnx'
+    profile = resolve_profile('fast', tenant_id='supplier-1', engine='tesseract')
+    assert profile.engine == 'tesseract' and profile.name == 'fast'
+    assert profile.readtext_options()['engine'] == 'tesseract'
+    assert profile.cache_params() != resolve_profile('fast').cache_params()
+
+    with pytest.raises(ValueError):
+        resolve_profile(engine='paddle')
+
+
+class FakeTesseract:
+    """Minimal pytesseract stand-in returning two lines of word boxes"""
+
+    class Output:
+        DICT = 'dict'
+
+    def image_to_data(self, image, lang, config, output_type):
+        self.lang = lang
+        return {
+            'text': ['GOTS-23-ABC12345', '', 'Valid', 'until', '2026'],
+            'conf': ['96', '-1', '90', '80', '70'],
+            'block_num': [1, 1, 1, 1, 1],
+            'par_num': [1, 1, 1, 1, 1],
+            'line_num': [1, 1, 2, 2, 2],
+            'left': [10, 0, 10, 60, 110],
+            'top': [10, 0, 50, 52, 50],
+            'width': [200, 0, 40, 40, 40],
+            'height': [20, 0, 20, 20, 22],
+        }
+
+
+def test_tesseract_results_match_easyocr_shape():
+    """Test Tesseract words are grouped into EasyOCR-style line boxes"""
+    pytest.importorskip('pytesseract')
+    engine = create_engine('tesseract')
+    engine.pytesseract = FakeTesseract()
+    image = np.zeros((100, 300), dtype=np.uint8)
+
+    results = engine.readtext(image, 'ta', detail=1, canvas_size=2560)
+    assert engine.pytesseract.lang == 'tam'
+    assert [text for _, text, _ in results] == ['GOTS-23-ABC12345', 'Valid until 2026']
+    bbox, _, confidence = results[1]
+    assert bbox == [[10, 50], [150, 50], [150, 72], [10, 72]]
+    assert confidence == pytest.approx(0.8)
+
+    assert engine.readtext(image, detail=0) == ['GOTS-23-ABC12345', 'Valid until 2026']
+    assert engine.readtext(image, paragraph=True, detail=0) == ['GOTS-23-ABC12345 Valid until 2026']
@@ -0,0 +1,141 @@
+"""
+Unit tests for the vectorized OCR preprocessing pipeline
+"""
+import io
+import pytest
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageOps
+
+from services.ocr_preprocessing import (
+    preprocess_image,
+    equalize_lut,
+    histogram,
+    apply_lut,
+    otsu_threshold,
+    sharpen
+)
+
+
+def legacy_preprocess(img: Image.Image) -> np.ndarray:
+    """The original PIL pipeline from OCRService._preprocess_image"""
+    img = img.convert('L')
+    max_dim = 2000
+    if max(img.size) > max_dim:
+        ratio = max_dim / max(img.size)
+        new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
+        img = img.resize(new_size, Image.LANCZOS)
+    img = ImageOps.equalize(img)
+    img = img.point(lambda p: p > 128 and 255)
+    img = img.filter(ImageFilter.SHARPEN)
+    img_array = np.array(img)
+    img_array = (img_array > 150) * 255
+    return img_array.astype(np.uint8)
+
+
+def make_certificate(size=(800, 600)) -> Image.Image:
+    """Create a synthetic certificate-like RGB image with text and a gradient"""
+    width, height = size
+    gradient = np.linspace(180, 240, width, dtype=np.uint8)
+    base = np.tile(gradient, (height, 1))
+    img = Image.fromarray(np.dstack([base, base, base - 20]), 'RGB')
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([20, 20, width - 20, height - 20], outline=(40, 40, 40), width=4)
+    for i, line in enumerate(["GLOBAL ORGANIC TEXTILE STANDARD", "Certificate No: GOTS-23-ABC12345",
+                              "Valid until: 2026-01-14"]):
+        draw.text((60, 80 + i * 60), line, fill=(10, 10, 10))
+    return img
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(42)
+
+
+@pytest.mark.parametrize("size", [(64, 48), (320, 240), (800, 600), (2600, 1800)])
+def test_legacy_mode_matches_pil_pipeline(size):
+    """Test the default pipeline is bit-identical to the original PIL one"""
+    img = make_certificate(size)
+
+    assert np.array_equal(preprocess_image(img), legacy_preprocess(img))
+
+
+def test_legacy_mode_matches_pil_pipeline_on_noise(rng):
+    """Test equivalence on random noise, which exercises every histogram bin"""
+    img = Image.fromarray(rng.integers(0, 256, (480, 640), dtype=np.uint8))
+
+    assert np.array_equal(preprocess_image(img), legacy_preprocess(img))
+
+
+@pytest.mark.parametrize("value", [0, 77, 255])
+def test_legacy_mode_matches_pil_pipeline_on_flat_image(value):
+    """Test the single-colour edge case where equalization is a no-op"""
+    img = Image.new('L', (64, 48), color=value)
+
+    assert np.array_equal(preprocess_image(img), legacy_preprocess(img))
+
+
+def test_accepts_bytes_input():
+    """Test encoded image bytes are decoded before preprocessing"""
+    img = make_certificate()
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+
+    assert np.array_equal(preprocess_image(buffer.getvalue()), legacy_preprocess(img))
+
+
+def test_equalize_lut_matches_pil(rng):
+    """Test the equalization table against ImageOps.equalize"""
+    gray = rng.integers(30, 200, (120, 160), dtype=np.uint8)
+
+    expected = np.array(ImageOps.equalize(Image.fromarray(gray)))
+
+    assert np.array_equal(apply_lut(gray, equalize_lut(histogram(gray))), expected)
+
+
+def test_sharpen_matches_pil(rng):
+    """Test the sharpen convolution against ImageFilter.SHARPEN"""
+    gray = rng.integers(0, 256, (90, 110), dtype=np.uint8)
+
+    expected = np.array(Image.fromarray(gray).filter(ImageFilter.SHARPEN))
+
+    assert np.array_equal(sharpen(gray), expected)
+
+
+def test_otsu_threshold_separates_bimodal_histogram():
+    """Test Otsu's threshold falls between two intensity clusters"""
+    hist = np.zeros(256)
+    hist[40] = 500
+    hist[210] = 300
+
+    assert 40 <= otsu_threshold(hist) < 210
+
+
+@pytest.mark.parametrize("mode", ["otsu", "adaptive"])
+def test_binarizing_modes_produce_binary_output(mode):
+    """Test the alternative thresholding modes only emit 0 and 255"""
+    result = preprocess_image(make_certificate(), threshold=mode)
+
+    assert result.dtype == np.uint8
+    assert set(np.unique(result)) <= {0, 255}
+
+
+def test_reuses_output_buffer():
+    """Test a matching preallocated buffer is written in place"""
+    img = make_certificate()
+    out = np.empty((600, 800), dtype=np.uint8)
+
+    result = preprocess_image(img, out=out)
+
+    assert result is out
+    assert np.array_equal(out, legacy_preprocess(img))
+
+
+def test_readonly_grayscale_array_input(rng):
+    """Test a read-only 2-D uint8 array (e.g. a pixmap view) is read, never written"""
+    gray = rng.integers(0, 256, (300, 400), dtype=np.uint8)
+    gray.flags.writeable = False  # Like a read-only view over a pixmap buffer
+
+    result = preprocess_image(gray)
+
+    assert not np.shares_memory(result, gray)
+    assert np.array_equal(result, legacy_preprocess(Image.fromarray(gray)))
@@ -0,0 +1,155 @@
+"""
+Unit tests for the memory-budgeted OCR reader pool
+"""
+import pytest
+
+from services.ocr_readers import ReaderPool
+
+MB = 1024 * 1024
+
+
+class FakeTensor:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+    def numel(self):
+        return self.nbytes
+
+    def element_size(self):
+        return 1
+
+
+class FakeModule:
+    def __init__(self, nbytes):
+        self._tensors = [FakeTensor(nbytes)]
+
+    def parameters(self):
+        return self._tensors
+
+    def buffers(self):
+        return []
+
+
+class FakeReader:
+    def __init__(self, language, with_detector):
+        self.language = language
+        self.recognizer = FakeModule(100 * MB)
+        self.detector = FakeModule(80 * MB) if with_detector else None
+
+
+@pytest.fixture
+def factory_calls():
+    return []
+
+
+@pytest.fixture
+def pool(factory_calls):
+    """Fixture for a pool that fits the detector plus three recognizers"""
+    def factory(language, use_gpu, with_detector):
+        factory_calls.append((language, with_detector))
+        if language == 'xx':
+            raise ValueError("unsupported language")
+        return FakeReader(language, with_detector)
+
+    return ReaderPool(memory_budget_mb=400, pinned_languages=('en',), reader_factory=factory)
+
+
+def test_reuses_loaded_reader(pool, factory_calls):
+    """Test a language is only loaded once while it stays resident"""
+    assert pool.get('en') is pool.get('en')
+    assert len(factory_calls) == 1
+
+
+def test_detector_is_shared(pool, factory_calls):
+    """Test only the first reader loads a detector and later ones reuse it"""
+    en = pool.get('en')
+    ta = pool.get('ta')
+
+    assert factory_calls == [('en', True), ('ta', False)]
+    assert ta.detector is en.detector
+    assert pool.get_stats()['memory_bytes'] == 280 * MB
+
+
+def test_evicts_least_recently_used_unpinned_language(pool):
+    """Test going over budget drops the LRU language but never a pinned one"""
+    for language in ('en', 'ta', 'hi', 'te'):
+        pool.get(language)
+
+    stats = pool.get_stats()
+    assert stats['loaded_languages'] == ['en', 'hi', 'te']
+    assert stats['evictions'] == 1
+    assert stats['memory_bytes'] <= stats['budget_bytes']
+
+
+def test_recent_use_protects_from_eviction(pool):
+    """Test touching a reader moves it to the back of the eviction order"""
+    for language in ('en', 'ta', 'hi'):
+        pool.get(language)
+    pool.get('ta')
+    pool.get('te')
+
+    assert pool.get_stats()['loaded_languages'] == ['en', 'ta', 'te']
+
+
+def test_failed_load_falls_back_to_english(pool):
+    """Test an unavailable language model falls back to the English reader"""
+    reader = pool.get('xx')
+
+    assert reader.language == 'en'
+    assert pool.get_stats()['load_failures'] == 1
+    assert pool.get_stats()['requests'] == {'en': 1}
+
+
+def test_most_requested_languages_stay_resident(factory_calls):
+    """Test usage, not only configuration, keeps a language from being evicted"""
+    pool = ReaderPool(
+        memory_budget_mb=400,
+        pinned_languages=('en',),
+        reader_factory=lambda language, use_gpu, with_detector: FakeReader(language, with_detector),
+        hot_languages=1
+    )
+    pool.get('en')
+    for _ in range(3):
+        pool.get('ta')
+    for language in ('hi', 'te', 'kn'):
+        pool.get(language)
+
+    stats = pool.get_stats()
+    assert stats['hot_languages'] == ['ta']
+    assert 'ta' in stats['loaded_languages'] and 'hi' not in stats['loaded_languages']
+
+
+def test_pool_stats_cover_every_engine():
+    """Test reader stats from every engine in every worker are aggregated"""
+    from services.ocr_pool import OCRProcessPool
+
+    def reader_stats(loads, memory, hot):
+        return {'loads': loads, 'evictions': 0, 'memory_bytes': memory, 'hot_languages': hot}
+
+    pool = OCRProcessPool(max_workers=2)
+    pool._worker_stats = {
+        1: {'easyocr': reader_stats(2, 300 * MB, ['en']), 'onnx': reader_stats(1, 50 * MB, ['ta'])},
+        2: {'easyocr': reader_stats(1, 200 * MB, ['en'])},
+    }
+
+    readers = pool.get_stats()['readers']
+    assert readers['loads'] == 4 and readers['memory_bytes'] == 550 * MB
+    assert readers['engines']['onnx'] == {'loads': 1, 'evictions': 0, 'memory_bytes': 50 * MB, 'hot_languages': {'ta': 1}}
+    assert readers['engines']['easyocr']['hot_languages'] == {'en': 2}
+
+
+def test_pool_counters_survive_concurrent_jobs():
+    """Test job counters add up when many threads run jobs at once"""
+    from concurrent.futures import ThreadPoolExecutor
+    from services.ocr_pool import OCRProcessPool
+
+    pool = OCRProcessPool(max_workers=4, max_pending=64)
+    pool._executor = ThreadPoolExecutor(max_workers=8)  # Threads stand in for worker processes
+    try:
+        with ThreadPoolExecutor(max_workers=32) as callers:
+            list(callers.map(lambda i: pool.run(abs, -i), range(500)))
+    finally:
+        pool.shutdown()
+
+    stats = pool.get_stats()
+    assert stats['submitted'] == stats['completed'] == 500 and stats['active'] == 0
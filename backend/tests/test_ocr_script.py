@@ -0,0 +1,57 @@
+"""
+Unit tests for script detection
+"""
+import numpy as np
+import pytest
+
+from services.ocr_script import (
+    candidate_languages,
+    choose_language,
+    dominant_script,
+    probe_score,
+    text_sample
+)
+
+
+def box():
+    return [[0, 0], [10, 0], [10, 10], [0, 10]]
+
+
+def test_dominant_script_from_unicode_blocks():
+    """Test letters are attributed to their Unicode script, ignoring digits and punctuation"""
+    assert dominant_script("GOTS-23-ABC12345")[0] == 'latin'
+    assert dominant_script("प्रमाणपत्र संख्या 2024")[0] == 'devanagari'
+    script, share = dominant_script("சான்றிதழ் GOTS")
+    assert script == 'tamil' and share > 0.5
+    assert dominant_script("12345 -/") is None
+
+
+def test_probe_score_rewards_own_script_and_confidence():
+    """Test a reader reading its own script confidently outscores garbage output"""
+    tamil_page = [(box(), "சான்றிதழ் எண்", 0.8)]
+    assert probe_score(tamil_page, 'ta') == pytest.approx(0.8)
+    assert probe_score([(box(), "ABC", 0.9)], 'ta') == 0.0
+    assert probe_score([(box(), "abc", 0.2), (box(), "def", 0.4)], 'en') == pytest.approx(0.3)
+    assert probe_score([], 'en') == 0.0
+
+
+def test_language_choice_prefers_requested():
+    """Test requested languages decide between languages sharing a script"""
+    assert choose_language('devanagari', ['mr', 'hi']) == 'mr'
+    assert choose_language('devanagari') == 'hi'
+    assert choose_language('latin', ['de']) == 'de'
+    # One probe per script, Latin excluded
+    assert candidate_languages(['en', 'hi', 'mr', 'ta'], ['bn']) == ['hi', 'ta']
+    assert candidate_languages(None, ['hi', 'mr', 'ta']) == ['hi', 'ta']
+
+
+def test_text_sample_is_a_small_ink_dense_strip():
+    """Test the sample covers the text band, not the blank margins"""
+    page = np.full((2000, 1500), 255, dtype=np.uint8)
+    for top in range(900, 1100, 50):
+        page[top:top + 20, 200:1300] = 0
+
+    sample = text_sample(page)
+    assert sample.shape[0] < 400
+    assert sample.shape[1] <= 1280
+    assert (sample < 128).mean() > 0.2
@@ -0,0 +1,78 @@
+"""
+Unit tests for OCRService.extract_text with the OCR workers replaced by a fake
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from services.ocr_cache import OCRResultCache
+from services.ocr_service import OCRService
+
+
+class FakeBatcher:
+    """Stands in for the OCR batch scheduler and records each call"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def readtext_async(self, image, language='en', **options):
+        self.calls.append((language, options))
+        if options.get('detail') == 0:
+            return ['GOTS-23-ABC12345']
+        return [([[0, 0], [10, 0], [10, 10], [0, 10]], 'GOTS-23-ABC12345', 0.9)]
+
+    def get_stats(self):
+        return {}
+
+    def shutdown(self):
+        pass
+
+
+@pytest.fixture
+def service(tmp_path):
+    """OCR service with a fake batcher and a cache in a temporary directory"""
+    service = OCRService()
+    service.batcher = FakeBatcher()
+    service.cache = OCRResultCache(cache_dir=tmp_path / "ocr_cache", memory_entries=4)
+    yield service
+    service.shutdown()
+
+
+@pytest.fixture
+def scan(tmp_path):
+    path = tmp_path / "scan.png"
+    Image.fromarray(np.full((200, 300), 255, dtype=np.uint8)).save(path)
+    return path
+
+
+@pytest.mark.asyncio
+async def test_repeated_upload_is_served_from_the_cache(service, scan):
+    """Test the second extraction of the same file skips OCR and is marked as a cache hit"""
+    first = await service.extract_text(str(scan), languages=['en'], detail=1)
+    second = await service.extract_text(str(scan), languages=['en'], detail=1)
+
+    assert len(service.batcher.calls) == 1
+    assert not first.get('cache_hit') and second['cache_hit'] is True
+    assert second['text'] == first['text'] == 'GOTS-23-ABC12345'
+    assert service.cache.get_stats()['memory_hits'] == 1
+
+
+@pytest.mark.asyncio
+async def test_call_without_profile_keeps_the_previous_detection_settings(service, scan):
+    """Test a profile-less call still uses the magnified, low-threshold detection it always had"""
+    result = await service.extract_text(str(scan), languages=['en'])
+
+    language, options = service.batcher.calls[0]
+    assert result['profile'] == 'balanced' and language == 'en'
+    assert options == {
+        'detail': 0,
+        'paragraph': True,
+        'engine': 'easyocr',
+        'batch_size': 8,
+        'min_size': 10,
+        'text_threshold': 0.3,
+        'low_text': 0.3,
+        'link_threshold': 0.4,
+        'canvas_size': 2560,
+        'mag_ratio': 1.5
+    }
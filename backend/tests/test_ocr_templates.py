@@ -0,0 +1,70 @@
+"""
+Unit tests for field-zone OCR templates
+"""
+from datetime import date
+
+import numpy as np
+import pytest
+
+pytest.importorskip("bson")  # database.models
+
+from database.models import CertificateType
+from services.ocr_templates import (
+    TEMPLATES,
+    crop_zone,
+    find_certificate_number,
+    find_dates,
+    identify_layout,
+    parse_fields
+)
+
+
+def test_identify_layout_from_header_text():
+    """Test the header pass text selects the matching template"""
+    assert identify_layout("Global Organic Textile Standard\nSCOPE CERTIFICATE").certificate_type == CertificateType.GOTS
+    assert identify_layout("STANDARD 100 by OEKO-TEX®").certificate_type == CertificateType.OEKO_TEX
+    assert identify_layout("Social Accountability International SA8000").certificate_type == CertificateType.SA8000
+    assert identify_layout("Annual report 2023") is None
+
+
+def test_find_dates_in_common_certificate_formats():
+    """Test ISO, day-first and month-name dates are parsed in reading order"""
+    text = "Issued 15.01.2024, valid until 14 January 2025 (renewal 2025-02-01, March 3, 2025)"
+    assert [value for _, value in find_dates(text)] == [
+        date(2024, 1, 15), date(2025, 1, 14), date(2025, 2, 1), date(2025, 3, 3)
+    ]
+
+
+def test_certificate_number_must_match_type_pattern():
+    """Test only numbers matching CERTIFICATE_PATTERNS are accepted"""
+    assert find_certificate_number(CertificateType.GOTS, "Certificate No: GOTS-23-ABC12345") == "GOTS-23-ABC12345"
+    assert find_certificate_number(CertificateType.GOTS, "Certificate No: 12345") is None
+
+
+def test_parse_fields_validates_number_and_dates():
+    """Test labelled dates are picked and inconsistent zones are rejected"""
+    template = TEMPLATES[CertificateType.GOTS]
+    parsed = parse_fields(template, {
+        'certificate_number': "Scope Certificate No. GOTS-23-ABC12345",
+        'issued_date': "Date of issue: 15.01.2024  Valid until: 14.01.2030",
+        'expiry_date': "Date of issue: 15.01.2024  Valid until: 14.01.2030",
+    })
+    assert parsed['valid']
+    assert parsed['fields'] == {
+        'certificate_type': 'GOTS',
+        'certificate_number': 'GOTS-23-ABC12345',
+        'issued_date': '2024-01-15',
+        'expiry_date': '2030-01-14'
+    }
+
+    rejected = parse_fields(template, {'certificate_number': "No. 12345"})
+    assert not rejected['valid'] and rejected['errors']
+
+
+def test_crop_zone_returns_view_and_offset():
+    """Test zones are views into the page with their pixel offset"""
+    page = np.zeros((1000, 800), dtype=np.uint8)
+    zone, origin = crop_zone(page, (0.25, 0.5, 1.0, 0.75))
+    assert zone.shape == (250, 600)
+    assert origin == (200, 500)
+    assert zone.base is page
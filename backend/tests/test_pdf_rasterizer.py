@@ -0,0 +1,67 @@
+"""
+Unit tests for process-isolated PDF rasterization
+"""
+import pytest
+
+from services.pdf_rasterizer import PDFRasterizer, is_usable_text_layer
+
+
+def test_text_layer_quality_check():
+    """Test short or garbled text layers are rejected so the page gets OCRed"""
+    assert is_usable_text_layer("GLOBAL ORGANIC TEXTILE STANDARD Certificate No: GOTS-23-ABC12345")
+    assert not is_usable_text_layer("GOTS")
+    assert not is_usable_text_layer("��□□ " * 20)
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    """Fixture for a 5-page PDF: even pages have a text layer, odd pages are blank scans"""
+    fitz = pytest.importorskip("fitz")
+    path = tmp_path / "certificates.pdf"
+    doc = fitz.open()
+    for index in range(5):
+        page = doc.new_page(width=595, height=842)
+        if index % 2 == 0:
+            page.insert_text((72, 72), f"GLOBAL ORGANIC TEXTILE STANDARD Certificate No: GOTS-23-ABC{index:05d}")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_workers", [0, 2])
+async def test_pages_stream_in_order_and_honor_max_pages(sample_pdf, max_workers):
+    """Test pages arrive in order, up to the page limit, with text layers or renders"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    rasterizer = PDFRasterizer(max_workers=max_workers, pages_per_task=2)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as thread_pool:
+            pages = [
+                page async for page in rasterizer.iter_pages(
+                    sample_pdf, pages_to_process=4, dpi=72, max_dim=400, thread_pool=thread_pool
+                )
+            ]
+    finally:
+        rasterizer.shutdown()
+
+    assert [page_num for page_num, _, _ in pages] == [0, 1, 2, 3]
+    assert [source for _, source, _ in pages] == ['text_layer', 'ocr', 'text_layer', 'ocr']
+
+    _, gray = pages[1][2]
+    assert gray.dtype.name == 'uint8' and gray.ndim == 2
+    assert max(gray.shape) <= 400
+
+
+def test_buffered_pages_bound_does_not_grow_with_workers():
+    """Test the pages in flight stay within max_buffered_pages whatever the worker count"""
+    many_workers = PDFRasterizer(max_workers=16, pages_per_task=2)
+    assert many_workers._plan(4) == (2, 2)
+    assert many_workers._plan(1) == (1, 1)
+    assert many_workers._plan(5) == (2, 2)
+    assert many_workers._plan(40) == (2, 16)
+    assert many_workers._plan(40, cache_doc=False) == (2, 1)
+
+    for budget in range(1, 20):
+        per_task, window = many_workers._plan(budget)
+        assert per_task * window <= budget
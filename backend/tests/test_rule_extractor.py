@@ -0,0 +1,75 @@
+"""
+Unit tests for the rule-based extraction fast path
+"""
+import pytest
+
+pytest.importorskip("bson")  # database.models
+
+from services import certificate_pipeline, document_ai_service as document_ai_module
+from services.rule_extractor import FIELDS, FastPathStats, extract_fields
+
+GOTS_TEXT = """GLOBAL ORGANIC TEXTILE STANDARD
+SCOPE CERTIFICATE
+Certificate No. GOTS-23-ABC12345
+Certification Body: Control Union Certifications B.V.
+Certificate Holder:
+Shree Textiles Pvt Ltd, Tiruppur, India
+Scope of certification: Spinning, knitting and dyeing of organic cotton fabrics
+Date of issue: 15.01.2024    Valid until: 14 January 2025
+"""
+
+
+def test_well_formed_certificate_fills_every_field_confidently():
+    """Test pattern-matched numbers and labelled fields score above the LLM threshold"""
+    rules = extract_fields(GOTS_TEXT)
+
+    assert rules.missing(0.8) == []
+    assert rules.confident(0.8) == {
+        'certificate_type': 'GOTS',
+        'certificate_number': 'GOTS-23-ABC12345',
+        'issued_by': 'Control Union Certifications B.V.',
+        'issued_to': 'Shree Textiles Pvt Ltd, Tiruppur, India',
+        'scope': 'Spinning, knitting and dyeing of organic cotton fabrics',
+        'issued_date': '2024-01-15',
+        'expiry_date': '2025-01-14',
+    }
+
+
+def test_ambiguous_text_leaves_fields_to_the_llm():
+    """Test unlabelled dates, ISO-style numbers and inconsistent dates stay below the threshold"""
+    rules = extract_fields("ISO 9001 2015\nQuality Management System\n01.03.2023 and 28.02.2026")
+    assert set(rules.missing(0.8)) == set(FIELDS)
+    assert rules.fields['issued_date'] == '2023-03-01' and rules.confidence['issued_date'] < 0.8
+
+    rules = extract_fields("Date of issue: 01.03.2026\nValid until: 01.03.2023")
+    assert 'issued_date' in rules.missing(0.8) and 'expiry_date' in rules.missing(0.8)
+    assert extract_fields("").fields == {}
+
+
+class FakeDocumentAI:
+    def __init__(self):
+        self.requests = []
+
+    async def structure_certificate_data(self, ocr_text, fields=None, batched=False):
+        self.requests.append(fields)
+        return {name: f"llm {name}" for name in fields or FIELDS}
+
+
+@pytest.mark.asyncio
+async def test_structure_text_only_asks_the_llm_for_missing_fields(monkeypatch):
+    """Test the LLM is skipped for well-formed text and asked only for what the rules miss"""
+    fake = FakeDocumentAI()
+    stats = FastPathStats()
+    monkeypatch.setattr(document_ai_module, 'document_ai_service', fake)
+    monkeypatch.setattr(certificate_pipeline, 'fast_path_stats', stats)
+
+    data = await certificate_pipeline.structure_text(GOTS_TEXT)
+    assert fake.requests == [] and data['certificate_number'] == 'GOTS-23-ABC12345'
+
+    partial = GOTS_TEXT.replace('Scope of certification', 'Products')
+    data = await certificate_pipeline.structure_text(partial, {'expiry_date': '2025-01-31'})
+    assert fake.requests == [['scope']]
+    assert data['scope'] == 'llm scope' and data['expiry_date'] == '2025-01-31'
+
+    report = stats.get_stats()
+    assert report['documents'] == 2 and report['llm_skipped'] == 1 and report['fast_path_rate'] == 0.5
@@ -0,0 +1,115 @@
+"""
+Unit tests for the lazy service registry
+"""
+import pytest
+
+from services.registry import ServiceRegistry
+
+
+class FakeModel:
+    instances = 0
+
+    def __init__(self):
+        FakeModel.instances += 1
+        self.loaded = True
+
+    def predict(self, value):
+        return value * 2
+
+
+@pytest.fixture
+def registry():
+    FakeModel.instances = 0
+    return ServiceRegistry()
+
+
+def test_service_is_built_on_first_use(registry):
+    """Test registering does not build the service and first access does, once"""
+    model = registry.register('model', FakeModel)
+
+    assert FakeModel.instances == 0
+    assert registry.state('model') == 'pending'
+
+    assert model.predict(2) == 4
+    assert model.loaded
+    assert FakeModel.instances == 1
+    assert registry.state('model') == 'ready'
+
+
+@pytest.mark.asyncio
+async def test_warm_up_builds_services_and_records_failures(registry):
+    """Test warm-up loads every service and reports failed ones"""
+    def broken():
+        raise RuntimeError("model file missing")
+
+    registry.register('model', FakeModel)
+    registry.register('broken', broken)
+    registry.register('optional', FakeModel, warm=False)
+
+    await registry.warm_up()
+
+    status = registry.status()
+    assert status['model']['state'] == 'ready'
+    assert status['broken']['state'] == 'failed'
+    assert status['broken']['error'] == 'model file missing'
+    assert status['optional']['state'] == 'pending'
+    assert not registry.is_ready()
+    assert registry.is_ready(['model'])
+
+
+@pytest.mark.asyncio
+async def test_aget_returns_shared_instance(registry):
+    """Test async access returns the same instance as the lazy proxy"""
+    proxy = registry.register('model', FakeModel)
+
+    instance = await registry.aget('model')
+
+    assert instance is registry.get('model')
+    assert proxy.predict(3) == 6
+    assert FakeModel.instances == 1
+
+
+def test_handles_share_one_instance_and_count_references(registry):
+    """Test every handle resolves to the same instance and is reference counted"""
+    registry.register('model', FakeModel)
+
+    first = registry.acquire('model')
+    second = registry.acquire('model')
+
+    assert first.service is second.service
+    assert first.predict(1) == 2
+    assert FakeModel.instances == 1
+    assert registry.status()['model']['refcount'] == 2
+
+    first.release()
+    first.release()
+    assert registry.status()['model']['refcount'] == 1
+
+
+def test_unload_refuses_while_handles_are_held(registry):
+    """Test a referenced service stays loaded and is rebuilt after unloading"""
+    proxy = registry.register('model', FakeModel)
+
+    with registry.acquire('model') as handle:
+        handle.predict(1)
+        assert not registry.unload('model')
+
+    assert registry.unload('model')
+    assert registry.state('model') == 'pending'
+
+    proxy.predict(1)
+    assert FakeModel.instances == 2
+
+
+def test_status_reports_service_memory(registry):
+    """Test services exposing memory_usage() have it included in the report"""
+    class SizedModel(FakeModel):
+        def memory_usage(self):
+            return 1024
+
+    registry.register('model', SizedModel)
+    registry.get('model')
+
+    report = registry.memory_report()
+    assert report['services']['model']['reported_bytes'] == 1024
+    assert report['reported_bytes'] == 1024
@@ -0,0 +1,105 @@
+"""
+Unit tests for batched Gemini structuring
+"""
+import asyncio
+
+import pytest
+
+from services.document_ai_service import batch_structure_prompt, parse_batch_response
+from services.structure_batching import StructureBatcher
+
+
+class FakeGemini:
+    def __init__(self, drop=(), fail_batches=False):
+        self.batches = []
+        self.singles = []
+        self.drop = set(drop)
+        self.fail_batches = fail_batches
+
+    async def run_batch(self, texts, fields=None):
+        self.batches.append(list(texts))
+        await asyncio.sleep(0)
+        if self.fail_batches:
+            raise RuntimeError("quota exceeded")
+        return [None if text in self.drop else {'certificate_number': text.upper()} for text in texts]
+
+    async def run_single(self, text, fields=None):
+        self.singles.append(text)
+        return {'certificate_number': text.upper()}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_call():
+    """Test requests within the window are packed into one batch and split back in order"""
+    gemini = FakeGemini()
+    batcher = StructureBatcher(gemini.run_batch, gemini.run_single, window_ms=20, max_items=8)
+
+    texts = [f"cert-{i}" for i in range(5)]
+    results = await asyncio.gather(*(batcher.structure(text) for text in texts))
+
+    assert [r['certificate_number'] for r in results] == [text.upper() for text in texts]
+    assert gemini.batches == [texts] and gemini.singles == []
+    stats = batcher.get_stats()
+    assert stats['avg_batch_size'] == 5 and stats['single_calls'] == 0 and stats['retried'] == 0
+
+
+@pytest.mark.asyncio
+async def test_batches_respect_item_and_token_limits():
+    """Test full batches go out immediately and oversized texts are sent alone"""
+    gemini = FakeGemini()
+    batcher = StructureBatcher(gemini.run_batch, gemini.run_single, window_ms=20, max_items=3, token_budget=100)
+
+    await asyncio.gather(*(batcher.structure(f"cert-{i}") for i in range(6)))
+    assert [len(batch) for batch in gemini.batches] == [3, 3]
+
+    # ~30 tokens each: three fit the 100-token budget, the fourth starts a new batch
+    texts = [f"{i}" * 120 for i in range(4)]
+    await asyncio.gather(*(batcher.structure(text) for text in texts))
+    assert [len(batch) for batch in gemini.batches[2:]] == [3]
+    assert gemini.singles == [texts[3]]  # Nobody joined it within the window
+
+    await batcher.structure("x" * 400)
+    assert gemini.singles[-1] == "x" * 400
+
+    stats = batcher.get_stats()
+    assert stats['batches'] == 3 and stats['single_calls'] == 2 and stats['retried'] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_items_are_retried_individually():
+    """Test items missing from the answer, and whole failed batches, fall back to single calls"""
+    gemini = FakeGemini(drop={'cert-1'})
+    batcher = StructureBatcher(gemini.run_batch, gemini.run_single, window_ms=20)
+    results = await asyncio.gather(*(batcher.structure(f"cert-{i}") for i in range(3)))
+    assert results[1] == {'certificate_number': 'CERT-1'} and gemini.singles == ['cert-1']
+    assert batcher.get_stats()['retried'] == 1 and batcher.get_stats()['single_calls'] == 1
+
+    gemini = FakeGemini(fail_batches=True)
+    batcher = StructureBatcher(gemini.run_batch, gemini.run_single, window_ms=20)
+    await asyncio.gather(*(batcher.structure(f"cert-{i}") for i in range(3)))
+    assert sorted(gemini.singles) == ['cert-0', 'cert-1', 'cert-2']
+    assert batcher.get_stats()['retried'] == 3 and batcher.get_stats()['single_calls'] == 3
+
+
+@pytest.mark.asyncio
+async def test_requests_for_different_fields_are_not_mixed():
+    """Test only requests asking for the same fields share a prompt"""
+    gemini = FakeGemini()
+    batcher = StructureBatcher(gemini.run_batch, gemini.run_single, window_ms=20)
+    await asyncio.gather(
+        batcher.structure("a", ['scope']), batcher.structure("b", ['scope']),
+        batcher.structure("c", ['scope', 'issued_by']), batcher.structure("d", ['issued_by', 'scope'])
+    )
+    assert sorted(gemini.batches) == [['a', 'b'], ['c', 'd']]
+
+
+def test_batch_prompt_and_response_parsing():
+    """Test the indexed prompt and tolerant splitting of the JSON answer"""
+    prompt = batch_structure_prompt(["first text", "second text"], ['scope'])
+    assert "### Certificate 0\nfirst text" in prompt and "### Certificate 1\nsecond text" in prompt
+    assert '"scope"' in prompt and '"issued_by"' not in prompt
+
+    response = '```json\n[{"index": 1, "scope": "dyeing"}, {"index": 7, "scope": "x"}, "junk", {"scope": "y"}]\n```'
+    assert parse_batch_response(response, 3) == [None, {'scope': 'dyeing'}, None]
+    assert parse_batch_response('{"results": [{"index": 0, "scope": "a"}]}', 1) == [{'scope': 'a'}]
+    assert parse_batch_response('not json', 2) == [None, None]
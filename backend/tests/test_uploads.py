@@ -0,0 +1,62 @@
+"""
+Unit tests for streaming uploads and the request size limit middleware
+"""
+import io
+import hashlib
+
+import pytest
+
+from api.middleware.upload_limit import UploadSizeLimitMiddleware
+from utils.uploads import UploadTooLargeError, save_upload
+
+
+@pytest.mark.asyncio
+async def test_save_upload_hashes_and_rejects_oversized_files(tmp_path):
+    """Test chunked saves report size/sha256 and remove the partial file past the limit"""
+    data = b'certificate' * 1000
+    path = tmp_path / 'ok.png'
+    digest = await save_upload(io.BytesIO(data), path, max_bytes=len(data))
+    assert digest.size == len(data)
+    assert digest.sha256 == hashlib.sha256(data).hexdigest()
+    assert path.read_bytes() == data
+
+    path = tmp_path / 'big.png'
+    with pytest.raises(UploadTooLargeError) as exc:
+        await save_upload(io.BytesIO(data), path, max_bytes=len(data) - 1)
+    assert exc.value.status_code == 413
+    assert not path.exists()
+
+
+async def _call(middleware, path, headers, chunks):
+    sent, reached = [], []
+    messages = [{'type': 'http.request', 'body': c, 'more_body': i < len(chunks) - 1} for i, c in enumerate(chunks)]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    async def app(scope, receive, send):
+        while (await receive()).get('more_body'):
+            pass
+        reached.append(scope['path'])
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    scope = {'type': 'http', 'method': 'POST', 'path': path, 'headers': headers}
+    await middleware(app)(scope, receive, send)
+    return sent[0]['status'], reached
+
+
+@pytest.mark.asyncio
+async def test_middleware_rejects_by_content_length_and_streamed_size():
+    """Test 413 before the app runs, per-path limits, and chunked bodies cut off mid-stream"""
+    def middleware(app):
+        return UploadSizeLimitMiddleware(app, max_bytes=10, path_limits={'/api/documents/bulk': 100})
+
+    assert await _call(middleware, '/api/documents/upload', [(b'content-length', b'50')], [b'x' * 50]) == (413, [])
+    assert await _call(middleware, '/api/documents/bulk', [(b'content-length', b'50')], [b'x' * 50]) == (
+        200, ['/api/documents/bulk']
+    )
+    assert await _call(middleware, '/api/documents/upload', [], [b'x' * 6, b'x' * 6]) == (413, [])
@@ -13,6 +13,23 @@ class Settings(BaseSettings):
     GROQ_API_KEY: str = ""
     OPENROUTER_API_KEY: str = ""
     
+    # LLM Clients (one pooled keep-alive connection pool per provider)
+    LLM_MAX_CONNECTIONS: int = 20  # Open connections per provider; further calls wait for a free one
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10  # Idle connections kept open for reuse
+    LLM_KEEPALIVE_EXPIRY: float = 30.0  # Seconds an idle connection is kept
+    LLM_CONNECT_TIMEOUT: float = 5.0
+    LLM_TIMEOUT: float = 30.0  # Per call, including waiting for a pooled connection
+    LLM_MAX_RETRIES: int = 1  # Groq SDK retries on connection errors and 429/5xx
+    LLM_ROUTER_DEADLINE: float = 20.0  # Seconds for a chat answer across all providers, fallbacks included
+    LLM_ROUTER_WINDOW: int = 50  # Recent calls per model kept for latency/error rates
+    LLM_BREAKER_FAILURES: int = 3  # Consecutive failures that open a model's circuit
+    LLM_BREAKER_ERROR_RATE: float = 0.5  # Error rate over the window that opens a circuit
+    LLM_BREAKER_COOLDOWN: float = 30.0  # Seconds before an open circuit lets a probe call through
+    LLM_HEDGE_ENABLED: bool = False  # Also ask the next model once a call exceeds its p95 (costs extra calls)
+    LLM_HEDGE_MIN_DELAY: float = 1.0  # Never hedge sooner than this
+    GEMINI_TIMEOUT: float = 30.0  # Per generate call
+    GEMINI_MAX_CONCURRENCY: int = 8  # Gemini calls in flight per process
+    
     # Database
     MONGODB_URI: str = "mongodb://localhost:27017/scap_local"
     MONGODB_DB_NAME: str = "scap_local"
@@ -49,8 +66,87 @@ class Settings(BaseSettings):
     
     # File Upload Settings
     MAX_FILE_SIZE_MB: int = 10  # 10MB max file size
+    MAX_REQUEST_SIZE_MB: int = 32  # Whole request body; larger uploads get 413 before they are read
+    BULK_MAX_REQUEST_SIZE_MB: int = 2048  # Request body limit for /api/documents/bulk
     ALLOWED_FILE_TYPES: list = ["application/pdf", "image/jpeg", "image/png"]
     
+    # Service Warm-up
+    SERVICE_WARMUP: bool = True  # Build models in the background after startup
+    
+    # OCR Worker Pool
+    OCR_WORKERS: int = 0  # 0 = one worker process per CPU core
+    OCR_MAX_PENDING: int = 0  # 0 = twice the number of workers
+    OCR_BATCH_WINDOW_MS: int = 20  # 0 disables cross-request batching
+    OCR_BATCH_MAX_SIZE: int = 8
+    OCR_READER_MEMORY_MB: int = 2048  # Per-worker budget for loaded language models
+    OCR_PINNED_LANGUAGES: list = ["en"]  # Never evicted from a worker
+    OCR_HOT_LANGUAGES: int = 2  # A worker's most requested languages, also never evicted
+    
+    # PDF Rasterization
+    PDF_RASTER_WORKERS: int = 4  # 0 renders on threads in the API process
+    PDF_RASTER_PAGES_PER_TASK: int = 2
+    PDF_MAX_BUFFERED_PAGES: int = 5  # Rendered pages held ahead of OCR per document, across all raster workers
+    PDF_STREAM_MAX_PAGES: int = 100  # Upper limit for max_pages on /api/documents/ocr/stream
+    
+    # OCR Profiles
+    OCR_DEFAULT_PROFILE: str = "balanced"  # fast, balanced or accurate
+    OCR_TENANT_PROFILES: dict = {}  # Supplier/user ID -> profile name
+
+    # OCR Engines
+    OCR_DEFAULT_ENGINE: str = "easyocr"  # easyocr, onnx or tesseract
+    OCR_TENANT_ENGINES: dict = {}  # Supplier/user ID -> engine name
+    OCR_ONNX_MODEL_DIR: str = "../data/ocr_onnx"  # Written by scripts/export_easyocr_onnx.py
+    OCR_ONNX_QUANTIZED: bool = False  # Use the int8 models
+    OCR_TESSERACT_CONFIG: str = "--oem 1 --psm 3"
+
+    # OCR Script Detection
+    OCR_SCRIPT_DETECTION: bool = True  # Pick the reader from a small text strip when no language is given
+    OCR_SCRIPT_CANDIDATES: list = ["hi", "ta", "te", "kn", "bn"]  # Non-Latin readers probed if the Latin pass fails
+
+    # OCR Field Templates
+    OCR_TEMPLATES_ENABLED: bool = True  # Recognize only the field zones of known layouts
+    
+    # OCR Result Cache
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_DIR: str = "../data/ocr_cache"
+    OCR_CACHE_MEMORY_ENTRIES: int = 256
+    OCR_CACHE_DISK_MB: int = 512
+    
+    # Rule-Based Extraction (fields filled from the OCR text before asking the LLM)
+    RULE_EXTRACTOR_ENABLED: bool = True
+    RULE_EXTRACTOR_MIN_CONFIDENCE: float = 0.8  # Fields scored lower are left to Gemini
+    RULE_EXTRACTOR_REQUIRED_FIELDS: list = [
+        "certificate_type", "certificate_number", "issued_by", "issued_to", "issued_date", "expiry_date", "scope"
+    ]  # Gemini is skipped only when all of these are confident
+    
+    # Structured-Extraction Cache (LLM results keyed on normalized OCR text + prompt version)
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_MEMORY_ENTRIES: int = 1024
+    EXTRACTION_CACHE_TTL_SECONDS: int = 30 * 24 * 3600  # 30 days
+    
+    # Batched Structuring (pipeline and bulk jobs pack several certificates into one Gemini request)
+    STRUCTURE_BATCH_WINDOW_MS: int = 100  # How long a request waits for others to join; 0 disables batching
+    STRUCTURE_BATCH_MAX_ITEMS: int = 8  # Certificates per request
+    STRUCTURE_BATCH_TOKEN_BUDGET: int = 6000  # Estimated OCR-text tokens per request (~4 characters each)
+    
+    # Background Jobs
+    JOB_QUEUE_BACKEND: str = "memory"  # memory (in-process) or mongo (durable; run worker.py)
+    JOB_STAGE_CONCURRENCY: dict = {"ocr": 2, "structure": 8, "store": 8, "index": 2, "update": 8, "bulk": 1}  # Worker tasks per pipeline stage
+    JOB_MAX_PENDING: int = 500  # Unfinished jobs before uploads are refused with 503
+    JOB_RETENTION_SECONDS: int = 3600  # How long finished job status stays queryable
+    JOB_VISIBILITY_TIMEOUT: int = 300  # Seconds before an unrenewed lease lets another worker take the job
+    JOB_MAX_ATTEMPTS: int = 3  # Per stage, then the job is dead-lettered
+    JOB_RETRY_BACKOFF_SECONDS: float = 5.0  # Doubled after each failed attempt
+    JOB_RETRY_BACKOFF_MAX_SECONDS: float = 300.0
+    JOB_POLL_INTERVAL: float = 1.0  # Idle wait between claims in worker.py
+    
+    # Bulk Ingestion
+    BULK_MAX_FILES: int = 500  # Files per ZIP or multipart batch
+    BULK_OCR_CONCURRENCY: int = 2  # Files in OCR at once within a batch
+    BULK_STRUCTURE_CONCURRENCY: int = 8  # Files being structured at once within a batch (batched into shared Gemini calls)
+    BULK_WRITE_BATCH: int = 50  # Certificates per insert_many / Chroma add
+    BULK_QUEUE_SIZE: int = 8  # Files buffered between stages before the previous stage waits
+    
     class Config:
         env_file = "../.env"  # Look for .env in parent directory (project root)
         env_file_encoding = 'utf-8'
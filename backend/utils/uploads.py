@@ -0,0 +1,91 @@
+"""
+Streaming upload helpers
+
+Uploads are copied in fixed-size chunks instead of ``await file.read()``, so
+memory per upload stays constant whatever the file size. The SHA-256 and size
+are computed on the way through (the hash doubles as the OCR cache key), and
+a file that grows past the limit is rejected with 413 at the chunk that
+crosses it.
+"""
+import os
+import hashlib
+import inspect
+from typing import AsyncIterator, BinaryIO, Optional, Union
+
+from fastapi import HTTPException, UploadFile
+
+from utils.config import settings
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(HTTPException):
+    """413 raised as soon as a streamed upload exceeds its size limit"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(
+            status_code=413,
+            detail=f"File too large. Max size is {max_bytes / (1024 * 1024):g}MB"
+        )
+        self.max_bytes = max_bytes
+
+
+def max_upload_bytes(max_mb: Optional[float] = None) -> int:
+    """Size limit in bytes (default: ``MAX_FILE_SIZE_MB``)"""
+    return int((max_mb if max_mb is not None else settings.MAX_FILE_SIZE_MB) * 1024 * 1024)
+
+
+class UploadDigest:
+    """Running size and SHA-256 of a streamed upload, enforcing the size limit"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hash = hashlib.sha256()
+
+    def update(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise UploadTooLargeError(self.max_bytes)
+        self._hash.update(chunk)
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+
+async def iter_upload(
+    file_obj: Union[UploadFile, BinaryIO],
+    digest: UploadDigest,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """Yield an UploadFile or file-like object in chunks, updating ``digest``"""
+    is_async = inspect.iscoroutinefunction(file_obj.read)
+    while True:
+        chunk = await file_obj.read(chunk_size) if is_async else file_obj.read(chunk_size)
+        if not chunk:
+            return
+        digest.update(chunk)
+        yield chunk
+
+
+async def save_upload(
+    file_obj: Union[UploadFile, BinaryIO],
+    path: Union[str, os.PathLike],
+    max_bytes: Optional[int] = None
+) -> UploadDigest:
+    """Stream an upload to ``path``; a partial file is removed on failure
+
+    Raises:
+        UploadTooLargeError: The upload exceeded ``max_bytes``
+    """
+    digest = UploadDigest(max_bytes)
+    try:
+        with open(path, 'wb') as f:
+            async for chunk in iter_upload(file_obj, digest):
+                f.write(chunk)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return digest
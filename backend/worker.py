@@ -0,0 +1,81 @@
+"""
+SCAP Worker - processes queued certificate jobs
+
+Claims jobs from the durable MongoDB queue (JOB_QUEUE_BACKEND=mongo) and runs
+their OCR, structuring, storage and indexing stages. Start as many workers as
+needed on any node; each stage runs JOB_STAGE_CONCURRENCY tasks per process.
+
+    python worker.py [--stages ocr,structure]
+"""
+import sys
+import signal
+import asyncio
+import logging
+import argparse
+
+from database.mongodb import connect_db, close_db
+from database.chroma_db import chroma_client  # noqa: F401 (register the shared services)
+from services.document_ai_service import document_ai_service  # noqa: F401
+from services.ocr_service import ocr_service  # noqa: F401
+from services.registry import service_registry
+from services.durable_queue import durable_queue
+from services import certificate_pipeline  # noqa: F401 (registers the stages on the durable queue)
+from utils.config import settings
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+# Services each stage needs loaded before its first job
+STAGE_SERVICES = {
+    'ocr': ['ocr'],
+    'structure': ['document_ai'],
+    'index': ['chroma'],
+    'bulk': ['ocr', 'document_ai', 'chroma'],
+}
+
+
+async def run(stages, grace: float):
+    await connect_db()
+    await durable_queue.ensure_indexes()
+    print(f"✅ Connected to MongoDB: {settings.MONGODB_DB_NAME}")
+
+    if settings.SERVICE_WARMUP:
+        names = sorted({name for stage in stages for name in STAGE_SERVICES.get(stage, [])})
+        print(f"🔄 Warming up {', '.join(names) or 'nothing'}")
+        await service_registry.warm_up(names)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    durable_queue.start_workers(stages)
+    print(f"🧵 Worker {durable_queue.worker_id} processing: {', '.join(stages)}")
+
+    await stop.wait()
+
+    print(f"🛑 Stopping; finishing running stages (up to {grace:.0f}s)")
+    await durable_queue.stop_workers(grace)
+    await close_db()
+    print("👋 Worker stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', help='Comma-separated stages to process (default: all)')
+    parser.add_argument('--grace', type=float, default=30, help='Seconds running stages get to finish on shutdown')
+    args = parser.parse_args()
+
+    if settings.JOB_QUEUE_BACKEND.lower() != 'mongo':
+        sys.exit("JOB_QUEUE_BACKEND must be 'mongo' for the API to queue jobs this worker can see")
+
+    known = durable_queue.stages
+    stages = args.stages.split(',') if args.stages else known
+    unknown = [stage for stage in stages if stage not in known]
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(unknown)} (available: {', '.join(known)})")
+
+    asyncio.run(run(stages, args.grace))
+
+
+if __name__ == "__main__":
+    main()